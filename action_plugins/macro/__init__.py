@@ -1450,6 +1450,7 @@ class MacroFunctor(AbstractFunctor):
             self.macro.add_action(seq)
         self.macro.exclusive = action.exclusive
         self.macro.repeat = action.repeat
+        self.macro.compile()
 
     def process_event(self, event, value):
         MacroFunctor.manager.queue_macro(self.macro)
@@ -99,14 +99,23 @@ class MapToKeyboardFunctor(AbstractFunctor):
 
     def __init__(self, action):
         super().__init__(action)
+        # Keys are separated by zero length pauses, which results in all
+        # of them being sent at once
         self.press = gremlin.macro.Macro()
-        for key in action.keys:
+        for i, key in enumerate(action.keys):
+            if i > 0:
+                self.press.pause(0)
             self.press.press(gremlin.macro.key_from_code(key[0], key[1]))
 
         self.release = gremlin.macro.Macro()
-        for key in action.keys:
+        for i, key in enumerate(action.keys):
+            if i > 0:
+                self.release.pause(0)
             self.release.release(gremlin.macro.key_from_code(key[0], key[1]))
 
+        self.press.compile()
+        self.release.compile()
+
     def process_event(self, event, value):
         if value.current:
             gremlin.macro.MacroManager().queue_macro(self.press)
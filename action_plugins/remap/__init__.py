@@ -176,6 +176,11 @@ class RemapFunctor(gremlin.base_classes.AbstractFunctor):
 
         return True
 
+    def axis_output(self):
+        if self.input_type == InputType.JoystickAxis:
+            return self.vjoy_device_id, self.vjoy_input_id
+        return None
+
     def _check_for_auto_release(self, action):
         activation_condition = None
         if action.parent.activation_condition:
@@ -1242,11 +1242,23 @@ class ResponseCurveFunctor(AbstractFunctor):
                 gremlin.spline.CubicBezierSpline(action.control_points)
         else:
             raise gremlin.error.GremlinError("Invalid curve type")
+        self.transform_key = (
+            ResponseCurve.tag,
+            action.mapping_type,
+            tuple(tuple(point) for point in action.control_points),
+            tuple(action.deadzone)
+        )
 
     def process_event(self, event, value):
         value.current = self.response_fn(self.deadzone_fn(value.current))
         return True
 
+    def axis_transform(self):
+        return lambda x: self.response_fn(self.deadzone_fn(x))
+
+    def axis_transform_key(self):
+        return self.transform_key
+
 
 class ResponseCurve(AbstractAction):
 
@@ -0,0 +1,71 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Benchmarks and regression checks of the timing critical code.
+
+Every module provides a run function, whose parameters default to the
+values in the module's default_arguments tuple, and can be run on its own
+via python -m benchmarks.<module>. Running python -m benchmarks runs all
+of them with their default arguments.
+"""
+
+
+import sys
+
+
+# Modules run by python -m benchmarks, in order
+modules = [
+    "event_dispatch",
+    "axis_buttons",
+    "conditions",
+    "macros",
+    "mouse_motion",
+    "process_monitor",
+    "input_batches"
+]
+
+
+class CheckFailure(Exception):
+
+    """Raised when the result of a benchmark is outside of its limits."""
+
+
+def check(condition, message):
+    """Raises an exception if a benchmark result is outside of its limits.
+
+    :param condition True if the result is acceptable, False otherwise
+    :param message description of the failure
+    """
+    if not condition:
+        raise CheckFailure(message)
+
+
+def main(run, default_arguments):
+    """Runs a benchmark with the arguments given on the command line.
+
+    Arguments which are not given on the command line use their default
+    value, the type of which determines how the argument is parsed.
+
+    :param run the run function of the benchmark
+    :param default_arguments tuple of default arguments of the benchmark
+    """
+    arguments = [
+        type(default)(value)
+        for value, default in zip(sys.argv[1:], default_arguments)
+    ]
+    run(*(arguments + list(default_arguments[len(arguments):])))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Runs all benchmarks with their default arguments.
+
+Usage: python -m benchmarks [module ...]
+"""
+
+
+import importlib
+import sys
+
+import benchmarks
+
+
+def run_all(names):
+    """Runs the given benchmarks and reports the failed checks.
+
+    :param names names of the benchmark modules to run
+    :return number of benchmarks whose checks failed
+    """
+    failures = 0
+    for name in names:
+        print("== {}".format(name))
+        module = importlib.import_module("benchmarks.{}".format(name))
+        try:
+            module.run(*module.default_arguments)
+        except benchmarks.CheckFailure as e:
+            print("FAILED: {}".format(e))
+            failures += 1
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_all(sys.argv[1:] or benchmarks.modules) > 0 else 0)
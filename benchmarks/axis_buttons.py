@@ -0,0 +1,162 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Checks that forced axis button activations do not block processing.
+
+The axis is split into many virtual axis buttons and swept back and forth
+in steps large enough to jump over several buttons at once, which forces
+the activation of every skipped button. The release of forced activations
+is scheduled on the shared scheduler and happens later on the thread
+processing events, processing an event therefore has to cost about as much
+as processing one which moves the axis through the buttons in small steps.
+
+The check compares median latencies, as individual events can be delayed
+by unrelated load on the machine. A blocking release would delay the
+majority of events by the forced activation delay, orders of magnitude
+more than processing an event costs.
+
+Usage: python -m benchmarks.axis_buttons [buttons] [sweeps] [max_ratio]
+"""
+
+
+import time
+
+import dill
+from gremlin import base_classes, common, event_handler, execution_graph
+
+import benchmarks
+
+
+# Number of buttons, number of sweeps, and largest acceptable ratio of the
+# median latency with forced activations to the one without
+default_arguments = (50, 20, 4.0)
+
+
+def create_buttons(count):
+    """Creates virtual axis buttons evenly covering the axis range.
+
+    :param count the number of buttons to create
+    :return list of VirtualButtonProcess instances
+    """
+    width = 2.0 / count
+    processes = []
+    for i in range(count):
+        data = base_classes.VirtualAxisButton(
+            -1.0 + i * width,
+            -1.0 + (i + 0.5) * width
+        )
+        processes.append(execution_graph.VirtualButtonProcess(data))
+    return processes
+
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of values lies.
+
+    :param values the values to evaluate
+    :param fraction fraction of values in [0, 1]
+    :return value at the requested percentile
+    """
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def sweep(processes, positions, sweeps):
+    """Processes events moving the axis through the given positions.
+
+    :param processes the virtual button processes handling the events
+    :param positions axis positions of a single sweep
+    :param sweeps number of times to repeat the sweep
+    :return list of times in seconds taken to process each event
+    """
+    latencies = []
+    for _ in range(sweeps):
+        for position in positions:
+            event = event_handler.Event(
+                common.InputType.JoystickAxis,
+                1,
+                dill.GUID_Virtual,
+                value=position,
+                raw_value=int(position * 32768)
+            )
+            start = time.perf_counter()
+            for process in processes:
+                process(event)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def print_latencies(name, latencies):
+    """Prints statistics of the given latencies.
+
+    :param name name of the measurement
+    :param latencies list of latencies in seconds
+    """
+    print(
+        "{:>10}: mean {:.3f} ms, p50 {:.3f} ms, p90 {:.3f} ms, "
+        "p99 {:.3f} ms, max {:.3f} ms".format(
+            name,
+            sum(latencies) / len(latencies) * 1000,
+            percentile(latencies, 0.5) * 1000,
+            percentile(latencies, 0.9) * 1000,
+            percentile(latencies, 0.99) * 1000,
+            max(latencies) * 1000
+        )
+    )
+
+
+def run(button_count, sweeps, max_ratio):
+    """Runs the benchmark, prints the results, and checks the latency.
+
+    :param button_count number of virtual axis buttons on the axis
+    :param sweeps number of times to sweep the axis back and forth
+    :param max_ratio largest acceptable ratio of the median time to
+        process an event with forced activations to the one without
+    """
+    # Steps of a quarter button width pass through every button's region
+    step = 0.5 / button_count
+    steps = int(2.0 / step)
+    normal_positions = [-1.0 + step * i for i in range(steps + 1)]
+    normal_positions += list(reversed(normal_positions))
+    normal = sweep(create_buttons(button_count), normal_positions, 1)
+
+    processes = create_buttons(button_count)
+    positions = [-1.0 + 0.37 * i for i in range(6)]
+    positions += list(reversed(positions))
+    forcing = sweep(processes, positions, sweeps)
+
+    forced = sum(
+        1 for process in processes
+        if process._forced_release is not None
+    )
+    print("{:d} events, {:d} buttons with forced activations".format(
+        len(forcing),
+        forced
+    ))
+    print_latencies("normal", normal)
+    print_latencies("forced", forcing)
+    ratio = percentile(forcing, 0.5) / percentile(normal, 0.5)
+    benchmarks.check(forced > 0, "Sweep did not cause any forced activations")
+    benchmarks.check(
+        ratio < max_ratio,
+        "Forced activations made processing {:.1f} times slower".format(
+            ratio
+        )
+    )
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Measures the cost of evaluating activation conditions.
+
+Builds the activation conditions of a profile in which every action set is
+guarded by a combination of input action, keyboard, and joystick conditions
+and compares evaluating them one by one, as done previously, with the
+compiled predicates. The previous evaluation queries the joystick wrapper
+for the state of the input, while the compiled predicates read the state
+recorded by the event listener.
+
+Usage: python -m benchmarks.conditions [action sets] [repetitions]
+"""
+
+
+import functools
+import time
+
+import dill
+from gremlin import actions, base_classes, common, event_handler, \
+    input_devices, util
+
+import benchmarks
+
+
+# Number of action sets and number of events to evaluate them for
+default_arguments = (200, 500)
+
+
+class BenchmarkJoystick:
+
+    """Joystick with a fixed state used in place of a physical device."""
+
+    class Input:
+
+        def __init__(self, value=0.25, is_pressed=True, direction=(0, 1)):
+            self.value = value
+            self.is_pressed = is_pressed
+            self.direction = direction
+
+    def __init__(self):
+        self._input = BenchmarkJoystick.Input()
+
+    def axis(self, index):
+        return self._input
+
+    def button(self, index):
+        return self._input
+
+    def hat(self, index):
+        return self._input
+
+
+def joystick_condition(device_guid, input_type, comparison, **kwargs):
+    """Returns the data of a joystick condition.
+
+    :param device_guid GUID of the device the condition reads
+    :param input_type type of input the condition reads
+    :param comparison comparison the condition performs
+    :return JoystickCondition data object
+    """
+    condition = base_classes.JoystickCondition()
+    condition.device_guid = device_guid
+    condition.input_type = input_type
+    condition.input_id = 1
+    condition.comparison = comparison
+    condition.range = kwargs.get("range", [0.0, 0.0])
+    return condition
+
+
+def create_conditions(count, device_guid):
+    """Creates the activation conditions of a condition heavy profile.
+
+    :param count the number of action sets to create conditions for
+    :param device_guid GUID of the device joystick conditions read
+    :return list of ActivationCondition instances
+    """
+    conditions = []
+    for i in range(count):
+        rule = base_classes.ActivationRule.All if i % 4 != 3 \
+            else base_classes.ActivationRule.Any
+        data = [
+            joystick_condition(
+                device_guid,
+                common.InputType.JoystickAxis,
+                "inside",
+                range=[0.0, 0.5]
+            ),
+            joystick_condition(
+                device_guid,
+                common.InputType.JoystickHat,
+                "north"
+            ),
+            actions.KeyboardCondition(0x2a, False, "released"),
+            actions.InputActionCondition(
+                "pressed" if i % 2 == 0 else "released"
+            )
+        ]
+        # Half of the action sets additionally check a button
+        if i % 2 == 0:
+            data.insert(0, joystick_condition(
+                device_guid,
+                common.InputType.JoystickButton,
+                "pressed"
+            ))
+        conditions.append(actions.ActivationCondition(
+            [actions.JoystickCondition(c)
+             if isinstance(c, base_classes.JoystickCondition) else c
+             for c in data],
+            rule
+        ))
+    return conditions
+
+
+def record_state(device_guid):
+    """Records the benchmark joystick's state in the event listener.
+
+    :param device_guid GUID of the device whose state to record
+    :return DeviceState instance holding the recorded state
+    """
+    state = event_handler.EventListener().input_state.device(device_guid)
+    state.axes[1] = int(BenchmarkJoystick.Input().value * 32768)
+    state.axis_known[1] = 1
+    state.buttons[1] = 1
+    state.button_known[1] = 1
+    state.hats[1] = 0
+    state.hat_known[1] = 1
+    return state
+
+
+def evaluate_condition(condition, event, value):
+    """Evaluates a single condition the way it was done before compilation.
+
+    :param condition the condition to evaluate
+    :param event the event triggering the evaluation
+    :param value the value of the event
+    :return True if the condition is satisfied, False otherwise
+    """
+    if not isinstance(condition, actions.JoystickCondition):
+        return condition(event, value)
+
+    joy = input_devices.JoystickProxy()[condition.device_guid]
+    if condition.input_type == common.InputType.JoystickAxis:
+        in_range = condition.condition.range[0] <= \
+            joy.axis(condition.input_id).value <= \
+            condition.condition.range[1]
+        return in_range if condition.comparison == "inside" else not in_range
+    elif condition.input_type == common.InputType.JoystickButton:
+        is_pressed = joy.button(condition.input_id).is_pressed
+        return is_pressed if condition.comparison == "pressed" \
+            else not is_pressed
+    else:
+        return joy.hat(condition.input_id).direction == \
+            util.hat_direction_to_tuple(condition.comparison)
+
+
+def evaluate_individually(condition, event, value):
+    """Evaluates a condition the way it was done before compilation.
+
+    :param condition the ActivationCondition to evaluate
+    :param event the event triggering the evaluation
+    :param value the value of the event
+    :return True if the condition is satisfied, False otherwise
+    """
+    fn = actions.smart_all \
+        if condition._rule == base_classes.ActivationRule.All \
+        else actions.smart_any
+    return fn([functools.partial(evaluate_condition, c, event, value)
+               for c in condition._conditions])
+
+
+def run(action_sets, repetitions):
+    """Runs the benchmark and prints the results.
+
+    :param action_sets number of action sets with conditions
+    :param repetitions number of events to evaluate all conditions for
+    """
+    device_guid = dill.GUID_Virtual
+    input_devices.JoystickProxy.joystick_devices[device_guid] = \
+        BenchmarkJoystick()
+    state = record_state(device_guid)
+
+    conditions = create_conditions(action_sets, device_guid)
+    event = event_handler.Event(
+        common.InputType.JoystickButton,
+        1,
+        device_guid,
+        is_pressed=True
+    )
+    values = [actions.Value(True), actions.Value(False)]
+
+    # Both variants have to agree before their speed is compared
+    for value in values:
+        for condition in conditions:
+            benchmarks.check(
+                condition.process_event(event, value) ==
+                evaluate_individually(condition, event, value),
+                "Compiled condition disagrees with individual evaluation"
+            )
+
+    variants = [
+        ("individual", lambda c, v: evaluate_individually(c, event, v)),
+        ("compiled", lambda c, v: c.process_event(event, v))
+    ]
+    for name, fn in variants:
+        start = time.perf_counter()
+        for i in range(repetitions):
+            value = values[i % 2]
+            for condition in conditions:
+                fn(condition, value)
+        duration = time.perf_counter() - start
+        print("{:>10}: {:8.3f} us per condition".format(
+            name,
+            duration / (repetitions * action_sets) * 1e6
+        ))
+
+    del input_devices.JoystickProxy.joystick_devices[device_guid]
+    state.invalidate()
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Checks that the dispatch queue keeps the latest sample of every axis.
+
+The dispatcher is held up while a burst of axis samples of several axes,
+interleaved with button events, is queued. The burst exceeds the queue
+capacity, which forces new axis samples to supersede queued ones. Once
+the dispatcher resumes, every button event and the final value of every
+axis have to be processed.
+
+Usage: python -m benchmarks.event_dispatch [samples per axis] [capacity]
+"""
+
+
+import threading
+import time
+
+import dill
+from gremlin import common, event_handler
+
+import benchmarks
+
+
+# Number of samples per axis and capacity of the dispatch queue
+default_arguments = (5000, 256)
+
+
+class RecordingHandler:
+
+    """Event handler recording the last value of every input."""
+
+    def __init__(self):
+        self.resume = threading.Event()
+        self.done = threading.Event()
+        self.values = {}
+        self.buttons = 0
+
+    def process_event(self, event):
+        self.resume.wait()
+        if event.event_type == common.InputType.JoystickAxis:
+            self.values[event.identifier] = event.value
+        elif event.event_type == common.InputType.JoystickButton:
+            self.buttons += 1
+            if event.identifier == 0:
+                self.done.set()
+
+
+def run(samples, capacity):
+    """Runs the check and prints the results.
+
+    :param samples number of samples queued per axis
+    :param capacity capacity of the dispatch queue
+    """
+    handler = RecordingHandler()
+    dispatcher = event_handler.EventDispatcher(handler, capacity)
+    dispatcher.start()
+
+    axes = range(1, 5)
+    expected = {}
+    buttons = 0
+    start = time.perf_counter()
+    for i in range(samples):
+        for axis in axes:
+            value = ((i * 7919 + axis * 104729) % 20001) / 10000.0 - 1.0
+            dispatcher.enqueue(event_handler.Event(
+                common.InputType.JoystickAxis,
+                axis,
+                dill.GUID_Virtual,
+                value=value,
+                raw_value=int(value * 32767)
+            ))
+            expected[axis] = value
+        if i % 10 == 0:
+            dispatcher.enqueue(event_handler.Event(
+                common.InputType.JoystickButton,
+                1,
+                dill.GUID_Virtual,
+                is_pressed=i % 20 == 0
+            ))
+            buttons += 1
+    duration = time.perf_counter() - start
+
+    # Marks the end of the burst
+    dispatcher.enqueue(event_handler.Event(
+        common.InputType.JoystickButton,
+        0,
+        dill.GUID_Virtual,
+        is_pressed=True
+    ))
+    handler.resume.set()
+    handler.done.wait(10.0)
+    dispatcher.stop()
+
+    print("{:d} samples queued in {:.3f} ms, {:d} superseded".format(
+        samples * len(axes),
+        duration * 1000,
+        dispatcher.dropped
+    ))
+    benchmarks.check(
+        dispatcher.dropped > 0,
+        "Burst did not exceed the queue capacity"
+    )
+    benchmarks.check(handler.buttons == buttons + 1, "Button events were lost")
+    benchmarks.check(handler.values == expected, "Final axis values were lost")
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
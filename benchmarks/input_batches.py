@@ -0,0 +1,134 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Checks how the inputs of a macro are grouped into SendInput calls.
+
+A macro presses and releases a key chord, built the way map to keyboard
+does by separating the keys with zero length pauses, and then taps a
+single key. The inputs are recorded instead of being sent. Each half of
+the chord has to arrive as a single batch, while the press and release
+of the tap, which are separated by the default delay, arrive on their own.
+
+Usage: python -m benchmarks.input_batches [chord size]
+"""
+
+
+import threading
+
+from gremlin import macro, sendinput
+
+import benchmarks
+
+
+# Number of keys in the chord
+default_arguments = (3,)
+
+
+class SignalAction(macro.AbstractAction):
+
+    """Macro action which signals that the macro reached it."""
+
+    def __init__(self):
+        self.reached = threading.Event()
+
+    def __call__(self):
+        self.reached.set()
+
+
+def create_macro(keys):
+    """Creates a macro pressing and releasing a chord followed by a tap.
+
+    :param keys the keys of the chord, followed by the key to tap
+    :return the macro and the action signaling its end
+    """
+    chord, tapped = keys[:-1], keys[-1]
+    m = macro.Macro()
+    for i, key in enumerate(chord):
+        if i > 0:
+            m.pause(0)
+        m.press(key)
+    m.pause(0.05)
+    for i, key in enumerate(reversed(chord)):
+        if i > 0:
+            m.pause(0)
+        m.release(key)
+    m.pause(0.05)
+    m.tap(tapped)
+
+    end = SignalAction()
+    m.add_action(end)
+    return m, end
+
+
+def describe(batch):
+    """Returns the scan codes and key directions of a recorded batch.
+
+    :param batch list of recorded _INPUT structures
+    :return list of (scan code, is released) tuples
+    """
+    return [
+        (entry.union.ki.wScan,
+         entry.union.ki.dwFlags & sendinput.KEYEVENTF_KEYUP != 0)
+        for entry in batch
+    ]
+
+
+def run(chord_size):
+    """Runs the macro, prints the recorded batches, and checks them.
+
+    :param chord_size number of keys pressed together
+    """
+    keys = [
+        macro.Key("key{:d}".format(i), 0x10 + i, False, 0x41 + i)
+        for i in range(chord_size + 1)
+    ]
+    m, end = create_macro(keys)
+
+    sink = sendinput.RecordingSink()
+    previous_sink = sendinput.set_output_sink(sink)
+    manager = macro.MacroManager()
+    manager.start()
+    manager.queue_macro(m)
+    end.reached.wait(5.0)
+    manager.stop()
+    sendinput.set_output_sink(previous_sink)
+
+    batches = [describe(batch) for batch in sink.batches]
+    for batch in batches:
+        print(batch)
+
+    chord = [key.scan_code for key in keys[:-1]]
+    tapped = keys[-1].scan_code
+    expected = [
+        [(code, False) for code in chord],
+        [(code, True) for code in reversed(chord)],
+        [(tapped, False)],
+        [(tapped, True)]
+    ]
+    benchmarks.check(end.reached.is_set(), "Macro did not finish")
+    benchmarks.check(
+        batches == expected,
+        "Inputs were grouped into {} instead of {}".format(
+            [len(batch) for batch in batches],
+            [len(batch) for batch in expected]
+        )
+    )
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Measures the throughput of many concurrently repeating macros.
+
+Starts a large number of toggle repeat macros whose actions only count how
+often they are executed and lets them run for a while. All macros are
+executed by the macro manager's scheduler thread, running them must not
+create any additional threads.
+
+Usage: python -m benchmarks.macros [macros] [duration]
+"""
+
+
+import threading
+import time
+
+from gremlin import macro
+
+import benchmarks
+
+
+# Number of macros and time in seconds to run them for
+default_arguments = (300, 2.0)
+
+
+class CountingAction(macro.AbstractAction):
+
+    """Macro action which counts how often it is executed."""
+
+    executed = 0
+
+    def __call__(self):
+        CountingAction.executed += 1
+
+
+def create_macros(count):
+    """Creates toggle repeat macros consisting of counting actions.
+
+    :param count the number of macros to create
+    :return list of Macro instances
+    """
+    macros = []
+    for _ in range(count):
+        m = macro.Macro()
+        m.add_action(CountingAction())
+        m.pause(0.01)
+        m.add_action(CountingAction())
+        m.repeat = macro.ToggleRepeat(0.01)
+        macros.append(m)
+    return macros
+
+
+def run(macro_count, duration):
+    """Runs the benchmark, prints the results, and checks thread usage.
+
+    :param macro_count number of macros to run concurrently
+    :param duration time in seconds for which to run the macros
+    """
+    manager = macro.MacroManager()
+    manager.start()
+    macros = create_macros(macro_count)
+    thread_count = threading.active_count()
+
+    CountingAction.executed = 0
+    for m in macros:
+        manager.queue_macro(m)
+    time.sleep(duration)
+    extra_threads = threading.active_count() - thread_count
+
+    # Queueing a running toggle macro again terminates it
+    for m in macros:
+        manager.queue_macro(m)
+    manager.stop()
+
+    print("{:d} macros, {:.0f} actions per second, {:d} additional "
+          "threads".format(
+              macro_count,
+              CountingAction.executed / duration,
+              extra_threads
+          ))
+    benchmarks.check(
+        extra_threads <= 0,
+        "Running macros created additional threads"
+    )
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Measures idle cost and smoothness of the mouse controller.
+
+The controller first runs without any motion configured, during which it
+must not perform any updates. Afterwards it moves the mouse slowly along
+both axes, the generated inputs are recorded instead of being sent and
+compared against the requested speed.
+
+Usage: python -m benchmarks.mouse_motion [speed] [duration] [rate]
+"""
+
+
+import time
+
+from gremlin import sendinput
+
+import benchmarks
+
+
+# Speed in pixels per second, duration of each phase in seconds, and
+# number of updates per second
+default_arguments = (37.5, 2.0, 500)
+
+
+def run(speed, duration, rate):
+    """Runs the benchmark, prints the results, and checks the motion.
+
+    :param speed motion along the x axis in pixels per second, the y axis
+        moves at half the speed in the opposite direction
+    :param duration time in seconds for each of the two phases
+    :param rate number of motion updates per second
+    """
+    sink = sendinput.RecordingSink()
+    previous_sink = sendinput.set_output_sink(sink)
+    controller = sendinput.MouseController()
+    controller.rate = rate
+    controller.reset_statistics()
+    controller.start()
+
+    time.sleep(duration)
+    idle_updates = controller.updates
+
+    controller.set_absolute_motion(speed, -speed / 2)
+    time.sleep(duration)
+    controller.set_absolute_motion(0, 0)
+    controller.stop()
+    sendinput.set_output_sink(previous_sink)
+
+    dx = sum(batch[0].union.mi.dx for batch in sink.batches)
+    dy = sum(batch[0].union.mi.dy for batch in sink.batches)
+    print("idle: {:d} updates".format(idle_updates))
+    print("moving: {:d} updates, {:d} moves, max interval {:.3f} ms".format(
+        controller.updates - idle_updates,
+        controller.moves,
+        controller.max_interval * 1000
+    ))
+    print("requested ({:.2f}, {:.2f}) px, sent ({:d}, {:d}) px".format(
+        controller.requested_distance[0],
+        controller.requested_distance[1],
+        dx,
+        dy
+    ))
+    benchmarks.check(
+        idle_updates == 0,
+        "Controller updated without any motion"
+    )
+    benchmarks.check(
+        abs(controller.requested_distance[0] - dx) < 1.0 and
+        abs(controller.requested_distance[1] - dy) < 1.0,
+        "Sent motion deviates from the requested motion"
+    )
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Measures the time from a foreground process change to its signal.
+
+A scripted provider replays rapid switches between a few applications,
+mixed with ones where the application stays in the foreground. Only the
+latter have to be signaled, each after the debounce delay, and repeated
+switches to the same application have to be served from the path cache.
+Latencies are measured from the time the script intends a switch, which
+includes any delay in replaying it.
+
+Usage: python -m benchmarks.process_monitor [switches] [max_latency]
+"""
+
+
+import time
+
+from PyQt5 import QtCore
+
+from gremlin import process_monitor
+
+import benchmarks
+
+
+# Number of lasting switches and largest acceptable time in seconds from
+# the time the script intends a switch until it is signaled
+default_arguments = (20, process_monitor.ProcessMonitor.debounce_delay + 0.1)
+
+
+def create_script(switches):
+    """Creates a script alternating between brief and lasting switches.
+
+    :param switches the number of lasting switches to perform
+    :return list of (delay, pid) tuples
+    """
+    script = []
+    for i in range(switches):
+        # Briefly pass over another application before settling
+        script.append((0.2 if i > 0 else 0.0, 100 + (i + 1) % 4))
+        script.append((0.01, 100 + i % 4))
+    return script
+
+
+def intended_switch_times(script, started_at):
+    """Returns the times at which the script intends lasting switches.
+
+    :param script list of (delay, pid) tuples as created by create_script
+    :param started_at time, as given by time.perf_counter, at which the
+        replay of the script started
+    :return list containing the time of every lasting switch
+    """
+    times = []
+    due = started_at
+    for delay, _ in script:
+        due += delay
+        times.append(due)
+    # Every second entry of the script is a lasting switch
+    return times[1::2]
+
+
+def run(switches, max_latency):
+    """Runs the benchmark and prints the results.
+
+    :param switches number of lasting foreground process changes
+    :param max_latency largest acceptable time in seconds from the time
+        the script intends a switch until it is signaled
+    """
+    paths = {100 + i: "C:/Games/game{:d}.exe".format(i) for i in range(4)}
+    script = create_script(switches)
+    provider = process_monitor.ScriptedProvider(script, paths)
+    monitor = process_monitor.ProcessMonitor(provider)
+
+    # No event loop is running, the signal time is therefore recorded
+    # directly by the scheduler thread emitting the signal
+    signaled_at = []
+    monitor.process_changed.connect(
+        lambda path: signaled_at.append(time.perf_counter()),
+        QtCore.Qt.DirectConnection
+    )
+    monitor.start()
+    provider.finished.wait(sum(delay for delay, _ in script) + 5.0)
+    # Leave the last switch time to be signaled before stopping
+    time.sleep(process_monitor.ProcessMonitor.debounce_delay + max_latency)
+    monitor.stop()
+
+    intended = intended_switch_times(script, provider.started_at)
+    latencies = [s - i for s, i in zip(signaled_at, intended)]
+    print("{:d} changes signaled, {:d} path queries, {:d} cache hits".format(
+        len(signaled_at),
+        provider.path_queries,
+        monitor.cache_hits
+    ))
+    print("latency mean {:.3f} ms, max {:.3f} ms".format(
+        sum(latencies) / max(len(latencies), 1) * 1000,
+        max(latencies, default=0.0) * 1000
+    ))
+    benchmarks.check(
+        provider.finished.is_set(),
+        "Script was not replayed completely"
+    )
+    benchmarks.check(
+        provider.path_queries <= len(paths),
+        "Process paths were queried repeatedly"
+    )
+    benchmarks.check(
+        len(signaled_at) == switches,
+        "Expected {:d} changes to be signaled".format(switches)
+    )
+    benchmarks.check(
+        max(latencies, default=0.0) < max_latency,
+        "Changes were signaled late"
+    )
+
+
+if __name__ == "__main__":
+    benchmarks.main(run, default_arguments)
@@ -174,9 +174,9 @@ class ChainContainerFunctor(gremlin.base_classes.AbstractFunctor):
 
     def process_event(self, event, value):
         if self.timeout > 0.0:
-            if self.last_execution + self.timeout < time.time():
+            if self.last_execution + self.timeout < time.perf_counter():
                 self.index = 0
-            self.last_execution = time.time()
+            self.last_execution = time.perf_counter()
 
         result = self.action_sets[self.index].process_event(event, value)
 
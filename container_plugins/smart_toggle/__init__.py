@@ -15,9 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import copy
+import functools
 import logging
-import threading
 import time
 from xml.etree import ElementTree
 
@@ -186,25 +185,28 @@ class SmartToggleContainerFunctor(gremlin.base_classes.AbstractFunctor):
 
         # Copy state when input is pressed
         if value.current:
-            self.value_press = copy.deepcopy(value)
+            self.value_press = value.fork()
             self.event_press = event.clone()
 
         # Execute smart trigger logic
         if value.current:
-            self.start_time = time.time()
+            self.start_time = time.perf_counter()
             self.toggle_status = not self.toggle_status
 
             if self.activate_on == "press":
                 self._process_hold_toggle(self.toggle_status, event, value)
             elif self.delay > 0.0:
                 # on release, we still want to send a toggle after delay seconds
-                self.timer = threading.Timer(self.delay, self._long_press)
-                self.timer.start()
+                self.timer = gremlin.scheduler.Scheduler().schedule(
+                    self.delay,
+                    gremlin.event_handler.call_in_event_thread,
+                    functools.partial(self._long_press, self.event_press)
+                )
         else:
             if self.timer:
                 self.timer.cancel()
             # Short press
-            if (self.start_time + self.delay) > time.time() or self.delay == 0.0:
+            if (self.start_time + self.delay) > time.perf_counter() or self.delay == 0.0:
                 if self.activate_on == "release":
                     self._process_hold_toggle(self.toggle_status, self.event_press, self.value_press, event, value)
             # Long press
@@ -227,7 +229,7 @@ class SmartToggleContainerFunctor(gremlin.base_classes.AbstractFunctor):
         if event_r is None:
             event_r = event_p.clone()
         if value_r is None:
-            value_r = copy.deepcopy(value_p)
+            value_r = value_p.fork()
             value_r.current = False
         return event_p, value_p, event_r, value_r
 
@@ -240,8 +242,14 @@ class SmartToggleContainerFunctor(gremlin.base_classes.AbstractFunctor):
             self.action_set.process_event(event_r, value_r)
         return True
 
-    def _long_press(self):
-        """Callback executed, when the delay expires."""
+    def _long_press(self, event_press):
+        """Callback executed, when the delay expires.
+
+        :param event_press the event of the press the delay belongs to, the
+            callback does nothing if that press has already been released
+        """
+        if self.timer is None or event_press is not self.event_press:
+            return
         self._process_hold_toggle(self.toggle_status, self.event_press, self.value_press)
 
 
@@ -15,9 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import copy
+import functools
 import logging
-import threading
 import time
 from xml.etree import ElementTree
 
@@ -240,29 +239,32 @@ class TempoContainerFunctor(gremlin.base_classes.AbstractFunctor):
 
         # Copy state when input is pressed
         if value.current:
-            self.value_press = copy.deepcopy(value)
+            self.value_press = value.fork()
             self.event_press = event.clone()
 
         # Execute tempo logic
         if value.current:
-            self.start_time = time.time()
-            self.timer = threading.Timer(self.delay, self._long_press)
-            self.timer.start()
+            self.start_time = time.perf_counter()
+            self.timer = gremlin.scheduler.Scheduler().schedule(
+                self.delay,
+                gremlin.event_handler.call_in_event_thread,
+                functools.partial(self._long_press, self.event_press)
+            )
 
             if self.activate_on == "press":
                 self.short_set.process_event(self.event_press, self.value_press)
         else:
             # Short press
-            if (self.start_time + self.delay) > time.time():
+            if (self.start_time + self.delay) > time.perf_counter():
                 self.timer.cancel()
 
                 if self.activate_on == "release":
-                    threading.Thread(target=lambda: self._short_press(
+                    self._short_press(
                         self.event_press,
                         self.value_press,
-                        event,
-                        value
-                    )).start()
+                        event.clone(),
+                        value.fork()
+                    )
                 else:
                     self.short_set.process_event(event, value)
             # Long press
@@ -278,17 +280,29 @@ class TempoContainerFunctor(gremlin.base_classes.AbstractFunctor):
     def _short_press(self, event_p, value_p, event_r, value_r):
         """Callback executed for a short press action.
 
+        The release is sent after a short delay without blocking the
+        calling thread.
+
         :param event_p event to press the action
         :param value_p value to press the action
         :param event_r event to release the action
         :param value_r value to release the action
         """
         self.short_set.process_event(event_p, value_p)
-        time.sleep(0.05)
-        self.short_set.process_event(event_r, value_r)
+        gremlin.scheduler.Scheduler().schedule(
+            0.05,
+            gremlin.event_handler.call_in_event_thread,
+            functools.partial(self.short_set.process_event, event_r, value_r)
+        )
 
-    def _long_press(self):
-        """Callback executed, when the delay expires."""
+    def _long_press(self, event_press):
+        """Callback executed, when the delay expires.
+
+        :param event_press the event of the press the delay belongs to, the
+            callback does nothing if that press has already been released
+        """
+        if self.timer is None or event_press is not self.event_press:
+            return
         self.long_set.process_event(self.event_press, self.value_press)
 
 
@@ -95,9 +95,47 @@ class _DeviceSummary(ctypes.Structure):
 
 class GUID:
 
-    def __init__(self, guid):
+    """Immutable GUID representation of a device.
+
+    Instances are interned, i.e. every distinct raw GUID maps onto a single
+    canonical instance which stores its own copy of the raw data alongside
+    a precomputed hash. This allows comparisons to take an identity based
+    fast path and hashing to be a simple attribute access.
+    """
+
+    __slots__ = ("_ctypes_guid", "_key", "_hash", "guid")
+
+    def __new__(cls, guid):
         assert isinstance(guid, _GUID)
+        key = bytes(guid)
+        instance = _guid_registry.get(key, None)
+        if instance is None:
+            instance = object.__new__(cls)
+            instance._init(key)
+            # setdefault ensures concurrent creation yields a single instance
+            instance = _guid_registry.setdefault(key, instance)
+        return instance
+
+    def _init(self, key):
+        """Initializes the data of a newly created canonical instance.
+
+        :param key the raw bytes of the GUID structure
+        """
+        guid = _GUID.from_buffer_copy(key)
         self._ctypes_guid = guid
+        self._hash = hash((
+            guid.Data1,
+            guid.Data2,
+            guid.Data3,
+            guid.Data4[0],
+            guid.Data4[1],
+            guid.Data4[2],
+            guid.Data4[3],
+            guid.Data4[4],
+            guid.Data4[5],
+            guid.Data4[6],
+            guid.Data4[7]
+        ))
         self.guid = (
             guid.Data1,
             guid.Data2,
@@ -107,6 +145,8 @@ class GUID:
             (guid.Data4[4] << 24) + (guid.Data4[5] << 16) +
             (guid.Data4[6] << 8) + guid.Data4[7]
         )
+        # Setting the key last seals the instance against modification
+        self._key = key
 
     @property
     def ctypes(self):
@@ -121,23 +161,36 @@ class GUID:
             self.guid[4]
         )
 
+    def __setattr__(self, key, value):
+        if hasattr(self, "_key"):
+            raise AttributeError("GUID instances are immutable")
+        object.__setattr__(self, key, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (GUID, (self._ctypes_guid,))
+
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        if self is other:
+            return True
+        if isinstance(other, GUID):
+            return self._key == other._key
+        return self._hash == hash(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
-        return hash((
-            self._ctypes_guid.Data1,
-            self._ctypes_guid.Data2,
-            self._ctypes_guid.Data3,
-            self._ctypes_guid.Data4[0],
-            self._ctypes_guid.Data4[1],
-            self._ctypes_guid.Data4[2],
-            self._ctypes_guid.Data4[3],
-            self._ctypes_guid.Data4[4],
-            self._ctypes_guid.Data4[5],
-            self._ctypes_guid.Data4[6],
-            self._ctypes_guid.Data4[7]
-        ))
+        return self._hash
+
+
+# Registry mapping the raw bytes of a GUID to its canonical instance
+_guid_registry = {}
 
 
 GUID_Keyboard = GUID(_GUID_SysKeyboard)
@@ -27,6 +27,7 @@ import gremlin.error
 import gremlin.event_handler
 import gremlin.execution_graph
 import gremlin.fsm
+import gremlin.fused_axis
 import gremlin.hid_guardian
 import gremlin.hints
 import gremlin.input_devices
@@ -36,6 +37,7 @@ import gremlin.plugin_manager
 import gremlin.process_monitor
 import gremlin.profile
 import gremlin.repeater
+import gremlin.scheduler
 import gremlin.shared_state
 import gremlin.sendinput
 import gremlin.spline
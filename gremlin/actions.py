@@ -16,13 +16,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import abstractmethod, ABCMeta
-from functools import partial
 import logging
 
 import dill
 
-from . import base_classes, common, event_handler, fsm, input_devices, \
-    macro, util
+from . import base_classes, common, error, event_handler, fsm, \
+    input_devices, macro, util
 
 
 def smart_all(conditions):
@@ -39,6 +38,26 @@ def smart_all(conditions):
     return True
 
 
+def _never(event, value):
+    """Predicate which is never satisfied.
+
+    :param event the event that triggered the evaluation
+    :param value the possibly modified value
+    :return always False
+    """
+    return False
+
+
+def _always(event, value):
+    """Predicate which is always satisfied.
+
+    :param event the event that triggered the evaluation
+    :param value the possibly modified value
+    :return always True
+    """
+    return True
+
+
 def smart_any(conditions):
     """Returns True if any conditions is True, False if none is True.
 
@@ -55,7 +74,15 @@ def smart_any(conditions):
 
 class Value:
 
-    """Represents an input value, keeping track of raw and "seen" value."""
+    """Represents an input value, keeping track of raw and "seen" value.
+
+    A new instance is created for every event, thus the class is kept as
+    lightweight as possible. Code that needs to hold on to a value beyond
+    the processing of the event, or modify it independently, has to use
+    fork to obtain its own copy.
+    """
+
+    __slots__ = ("_raw", "_current")
 
     def __init__(self, raw):
         """Creates a new value and initializes it.
@@ -65,6 +92,16 @@ class Value:
         self._raw = raw
         self._current = raw
 
+    def fork(self):
+        """Returns an independent copy of this value.
+
+        :return new Value instance with the same raw and current value
+        """
+        value = Value.__new__(Value)
+        value._raw = self._raw
+        value._current = self._current
+        return value
+
     @property
     def raw(self):
         """Returns the raw unmodified value.
@@ -99,14 +136,22 @@ class ActivationCondition:
     True or False.
     """
 
-    rule_function = {
-        base_classes.ActivationRule.All: smart_all,
-        base_classes.ActivationRule.Any: smart_any
-    }
-
     def __init__(self, conditions, rule):
         self._conditions = conditions
         self._rule = rule
+        self._predicate = self._compile()
+
+    @property
+    def is_unconditional(self):
+        """Returns whether or not the condition is always satisfied.
+
+        :return True if the condition is satisfied irrespective of event
+            and value, False otherwise
+        """
+        return len(self._conditions) > 0 and all([
+            isinstance(c, InputActionCondition) and c.comparison == "always"
+            for c in self._conditions
+        ])
 
     def process_event(self, event, value):
         """Returns whether or not a condition is satisfied, i.e. true.
@@ -115,10 +160,41 @@ class ActivationCondition:
         :param value process event value
         :return True if all conditions are satisfied, False otherwise
         """
-        return ActivationCondition.rule_function[self._rule](
-            [partial(c, event, value) for c in self._conditions]
+        return self._predicate(event, value)
+
+    def _compile(self):
+        """Combines all conditions into a single predicate.
+
+        Cheap conditions are evaluated before expensive ones, which combined
+        with short circuiting avoids reading device state whenever possible.
+
+        :return function taking event and value which evaluates the rule
+        """
+        predicates = tuple(
+            c.compile() for c in
+            sorted(self._conditions, key=lambda c: c.cost)
         )
 
+        if len(predicates) == 0:
+            return _always if self._rule == base_classes.ActivationRule.All \
+                else _never
+        if len(predicates) == 1:
+            return predicates[0]
+
+        if self._rule == base_classes.ActivationRule.All:
+            def predicate(event, value):
+                for fn in predicates:
+                    if not fn(event, value):
+                        return False
+                return True
+        else:
+            def predicate(event, value):
+                for fn in predicates:
+                    if fn(event, value):
+                        return True
+                return False
+        return predicate
+
 
 class AbstractCondition(metaclass=ABCMeta):
 
@@ -128,6 +204,10 @@ class AbstractCondition(metaclass=ABCMeta):
     as possibly processed Value when being evaluated.
     """
 
+    # Relative cost of evaluating the condition, cheaper conditions are
+    # evaluated first
+    cost = 0
+
     def __init__(self, comparison):
         """Creates a new condition with a specific comparision operation.
 
@@ -145,6 +225,16 @@ class AbstractCondition(metaclass=ABCMeta):
         """
         pass
 
+    def compile(self):
+        """Returns a function evaluating this condition.
+
+        Subclasses return functions specialised to their configuration,
+        which avoids deciding what to check on every evaluation.
+
+        :return function taking event and value which evaluates the condition
+        """
+        return self.__call__
+
 
 class KeyboardCondition(AbstractCondition):
 
@@ -154,6 +244,8 @@ class KeyboardCondition(AbstractCondition):
     particular key is pressed or released.
     """
 
+    cost = 1
+
     def __init__(self, scan_code, is_extended, comparison):
         """Creates a new instance.
 
@@ -177,6 +269,18 @@ class KeyboardCondition(AbstractCondition):
         else:
             return not key_pressed
 
+    def compile(self):
+        """Returns a function evaluating this condition.
+
+        :return function taking event and value which evaluates the condition
+        """
+        is_pressed = input_devices.Keyboard().is_pressed
+        key = self.key
+        if self.comparison == "pressed":
+            return lambda event, value: is_pressed(key)
+        else:
+            return lambda event, value: not is_pressed(key)
+
 
 class JoystickCondition(AbstractCondition):
 
@@ -188,6 +292,8 @@ class JoystickCondition(AbstractCondition):
     one of eight possible directions.
     """
 
+    cost = 2
+
     def __init__(self, condition):
         """Creates a new instance.
 
@@ -206,30 +312,136 @@ class JoystickCondition(AbstractCondition):
         :param value the possibly modified value
         :return True if the condition is satisfied, False otherwise
         """
-        joy = input_devices.JoystickProxy()[self.device_guid]
+        return self.compile()(event, value)
 
-        if self.input_type == common.InputType.JoystickAxis:
-            in_range = self.condition.range[0] <= \
-                       joy.axis(self.input_id).value <= \
-                       self.condition.range[1]
+    def compile(self):
+        """Returns a function evaluating this condition.
 
-            if self.comparison in ["inside", "outside"]:
-                return in_range if self.comparison == "inside" else not in_range
-            else:
-                return False
+        The input is resolved once and its state read directly from the
+        arrays of the device's DeviceState. The device is only queried for
+        the live state while no event of the input has been received yet.
+
+        :return function taking event and value which evaluates the condition
+        """
+        try:
+            return self._compile_input()
+        except error.GremlinError:
+            # Report the missing device or input whenever the condition is
+            # evaluated and use the input once it becomes available
+            return lambda event, value: self._compile_input()(event, value)
+
+    def _compile_input(self):
+        """Returns a function evaluating the condition of the input.
+
+        :return function taking event and value which evaluates the condition
+        """
+        joy = input_devices.JoystickProxy()[self.device_guid]
+        if self.input_type == common.InputType.JoystickAxis:
+            return self._compile_axis(joy.axis(self.input_id))
         elif self.input_type == common.InputType.JoystickButton:
-            if self.comparison == "pressed":
-                return joy.button(self.input_id).is_pressed
-            else:
-                return not joy.button(self.input_id).is_pressed
+            return self._compile_button(joy.button(self.input_id))
         elif self.input_type == common.InputType.JoystickHat:
-            return joy.hat(self.input_id).direction == \
-                   util.hat_direction_to_tuple(self.comparison)
+            return self._compile_hat(joy.hat(self.input_id))
         else:
             logging.getLogger("system").warning(
                 "Invalid input_type {} received".format(self.input_type)
             )
-            return False
+            return _never
+
+    def _compile_axis(self, axis):
+        """Returns a function checking the range of an axis.
+
+        :param axis the JoystickWrapper.Axis instance to check
+        :return function taking event and value which evaluates the condition
+        """
+        if self.comparison not in ["inside", "outside"]:
+            return _never
+
+        low, high = self.condition.range
+        index = self.input_id
+        if index > event_handler.DeviceState.max_axis:
+            if self.comparison == "inside":
+                return lambda event, value: low <= axis.value <= high
+            else:
+                return lambda event, value: not low <= axis.value <= high
+
+        # Compare the raw values in order to not scale them on every check
+        state = event_handler.EventListener().input_state.device(
+            self.device_guid
+        )
+        axes = state.axes
+        known = state.axis_known
+        raw_low = low * 32768.0
+        raw_high = high * 32768.0
+        if self.comparison == "inside":
+            def evaluate(event, value):
+                if known[index]:
+                    return raw_low <= axes[index] <= raw_high
+                return low <= axis.live_value <= high
+        else:
+            def evaluate(event, value):
+                if known[index]:
+                    return not raw_low <= axes[index] <= raw_high
+                return not low <= axis.live_value <= high
+        return evaluate
+
+    def _compile_button(self, button):
+        """Returns a function checking the state of a button.
+
+        :param button the JoystickWrapper.Button instance to check
+        :return function taking event and value which evaluates the condition
+        """
+        index = self.input_id
+        if index > event_handler.DeviceState.max_button:
+            if self.comparison == "pressed":
+                return lambda event, value: button.is_pressed
+            else:
+                return lambda event, value: not button.is_pressed
+
+        state = event_handler.EventListener().input_state.device(
+            self.device_guid
+        )
+        buttons = state.buttons
+        known = state.button_known
+        if self.comparison == "pressed":
+            def evaluate(event, value):
+                if known[index]:
+                    return buttons[index] == 1
+                return button.live_is_pressed
+        else:
+            def evaluate(event, value):
+                if known[index]:
+                    return buttons[index] != 1
+                return not button.live_is_pressed
+        return evaluate
+
+    def _compile_hat(self, hat):
+        """Returns a function checking the direction of a hat.
+
+        :param hat the JoystickWrapper.Hat instance to check
+        :return function taking event and value which evaluates the condition
+        """
+        direction = util.hat_direction_to_tuple(self.comparison)
+        index = self.input_id
+        if index > event_handler.DeviceState.max_hat:
+            return lambda event, value: hat.direction == direction
+
+        state = event_handler.EventListener().input_state.device(
+            self.device_guid
+        )
+        hats = state.hats
+        known = state.hat_known
+        # Raw DILL values corresponding to the direction
+        raw_values = frozenset(
+            raw for raw, entry in util.dill_hat_lookup.items()
+            if entry == direction
+        )
+
+        def evaluate(event, value):
+            if known[index]:
+                return hats[index] in raw_values
+            return hat.live_direction == direction
+        return evaluate
 
 
 class InputActionCondition(AbstractCondition):
@@ -263,6 +475,20 @@ class InputActionCondition(AbstractCondition):
         else:
             return False
 
+    def compile(self):
+        """Returns a function evaluating this condition.
+
+        :return function taking event and value which evaluates the condition
+        """
+        if self.comparison == "pressed":
+            return lambda event, value: value.current
+        elif self.comparison == "released":
+            return lambda event, value: not value.current
+        elif self.comparison == "always":
+            return _always
+        else:
+            return _never
+
 
 class VirtualButton(metaclass=ABCMeta):
 
@@ -430,6 +656,19 @@ class AxisButton(VirtualButton):
         else:
             return self._fsm.perform("press")
 
+    def release_forced_activation(self):
+        """Releases the button after it was pressed by a forced activation.
+
+        The release is skipped if the axis has since moved into the
+        activation region, as the button is then legitimately pressed.
+
+        :return True if a state transition occurred, False otherwise
+        """
+        if self._last_value is not None and \
+                self._lower_limit <= self._last_value <= self._upper_limit:
+            return False
+        return self._fsm.perform("release")
+
 
 class HatButton(VirtualButton):
 
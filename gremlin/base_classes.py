@@ -406,6 +406,37 @@ class AbstractFunctor(metaclass=ABCMeta):
         """
         pass
 
+    def axis_transform(self):
+        """Returns the function applied to axis values by this functor.
+
+        Functors which do nothing but transform an axis value, without
+        side effects or internal state, return the function performing
+        the transformation, which allows it to be fused with others.
+
+        :return function mapping an axis value to a new one, None if the
+            functor is not a pure axis transformation
+        """
+        return None
+
+    def axis_transform_key(self):
+        """Returns a key identifying the axis transformation of this functor.
+
+        Functors returning equal keys perform the same transformation,
+        which allows sharing the results computed for one of them.
+
+        :return hashable key describing the transformation, None if the
+            transformation cannot be identified
+        """
+        return None
+
+    def axis_output(self):
+        """Returns the vJoy axis this functor writes axis values to.
+
+        :return (vjoy device id, axis id) tuple of the axis written to,
+            None if the functor does not only write to a vJoy axis
+        """
+        return None
+
 
 class AbstractAction(profile.ProfileData):
 
@@ -17,11 +17,13 @@
 
 import logging
 
+from PyQt5 import QtCore
+
 import dill
 
 import gremlin
-from gremlin import event_handler, input_devices, \
-    joystick_handling, macro, sendinput, util
+from gremlin import config, event_handler, input_devices, \
+    joystick_handling, macro, scheduler, sendinput, util
 import vjoy as vjoy_module
 
 
@@ -39,6 +41,7 @@ class CodeRunner:
         self._inheritance_tree = None
         self._vjoy_curves = VJoyCurves()
         self._merge_axes = []
+        self._dispatcher = None
         self._running = False
 
     def is_running(self):
@@ -67,6 +70,14 @@ class CodeRunner:
             if settings.startup_mode in gremlin.profile.mode_list(profile):
                 start_mode = settings.startup_mode
 
+        scheduler.Scheduler().reset_statistics()
+
+        # Configure how changes are sent to vJoy before any device is used
+        joystick_handling.VJoyProxy.set_output_frames(
+            config.Configuration().vjoy_output_frames,
+            config.Configuration().vjoy_frame_rate
+        )
+
         # Load the generated code
         try:
             # Load generated python code
@@ -196,26 +207,42 @@ class CodeRunner:
 
             # Connect signals
             evt_listener = event_handler.EventListener()
-            kb = input_devices.Keyboard()
-            evt_listener.keyboard_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.joystick_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.virtual_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.keyboard_event.connect(kb.keyboard_event)
+            if settings.axis_coalescing:
+                evt_listener.enable_axis_coalescing(
+                    settings.axis_coalescing_interval()
+                )
+            if config.Configuration().dispatch_thread:
+                # Events are queued by the threads emitting them and
+                # processed on the dispatcher's own thread
+                self._dispatcher = event_handler.EventDispatcher(
+                    self.event_handler
+                )
+                self._dispatcher.start()
+                evt_listener.set_dispatcher(self._dispatcher)
+                for signal in self._event_signals(evt_listener):
+                    signal.connect(
+                        self._dispatcher.enqueue,
+                        QtCore.Qt.DirectConnection
+                    )
+            else:
+                for signal in self._event_signals(evt_listener):
+                    signal.connect(self.event_handler.process_event)
             evt_listener.gremlin_active = True
 
             input_devices.periodic_registry.start()
+            macro.MacroManager().spin_budget = \
+                config.Configuration().macro_spin_budget
+            macro.MacroManager().record_timing = \
+                config.Configuration().macro_timing_report
             macro.MacroManager().start()
 
             self.event_handler.change_mode(start_mode)
             self.event_handler.resume()
             self._running = True
 
+            sendinput.MouseController().rate = \
+                config.Configuration().mouse_motion_rate
+            sendinput.MouseController().reset_statistics()
             sendinput.MouseController().start()
         except ImportError as e:
             util.display_error(
@@ -228,12 +255,36 @@ class CodeRunner:
         # Disconnect all signals
         if self._running:
             evt_lst = event_handler.EventListener()
-            kb = input_devices.Keyboard()
-            evt_lst.keyboard_event.disconnect(self.event_handler.process_event)
-            evt_lst.joystick_event.disconnect(self.event_handler.process_event)
-            evt_lst.virtual_event.disconnect(self.event_handler.process_event)
-            evt_lst.keyboard_event.disconnect(kb.keyboard_event)
+            if self._dispatcher is not None:
+                for signal in self._event_signals(evt_lst):
+                    signal.disconnect(self._dispatcher.enqueue)
+                evt_lst.set_dispatcher(None)
+                self._dispatcher.stop()
+                logging.getLogger("system").info(
+                    "Dispatched {:d} events, dropped {:d}, max queue depth "
+                    "{:d}, mean wait {:.3f} ms, max wait {:.3f} ms".format(
+                        self._dispatcher.dispatched,
+                        self._dispatcher.dropped,
+                        self._dispatcher.max_queue_depth,
+                        self._dispatcher.mean_wait_time * 1000,
+                        self._dispatcher.max_wait_time * 1000
+                    )
+                )
+                self._dispatcher = None
+            else:
+                for signal in self._event_signals(evt_lst):
+                    signal.disconnect(self.event_handler.process_event)
             evt_lst.gremlin_active = False
+
+            coalescer = evt_lst.axis_coalescer
+            if coalescer is not None:
+                logging.getLogger("system").info(
+                    "Axis coalescing merged {:d} of {:d} samples".format(
+                        coalescer.merged,
+                        coalescer.received
+                    )
+                )
+                evt_lst.disable_axis_coalescing()
             self.event_handler.mode_changed.disconnect(
                 self._vjoy_curves.mode_changed
             )
@@ -245,14 +296,74 @@ class CodeRunner:
 
         # Stop periodic events and clear registry
         input_devices.periodic_registry.stop()
+        for entry in input_devices.periodic_registry.callbacks:
+            if entry.runs > 0:
+                logging.getLogger("system").info(
+                    "Periodic function {} ran {:d} times, missed {:d}, mean "
+                    "runtime {:.3f} ms, max runtime {:.3f} ms".format(
+                        entry.callback.__name__,
+                        entry.runs,
+                        entry.missed,
+                        entry.mean_runtime * 1000,
+                        entry.max_runtime * 1000
+                    )
+                )
         input_devices.periodic_registry.clear()
 
         macro.MacroManager().stop()
         sendinput.MouseController().stop()
+        mouse = sendinput.MouseController()
+        if mouse.updates > 0:
+            logging.getLogger("system").info(
+                "Mouse motion: {:d} updates, {:d} moves, max interval "
+                "{:.3f} ms, requested ({:.1f}, {:.1f}) px, sent ({:d}, {:d}) "
+                "px".format(
+                    mouse.updates,
+                    mouse.moves,
+                    mouse.max_interval * 1000,
+                    mouse.requested_distance[0],
+                    mouse.requested_distance[1],
+                    mouse.sent_distance[0],
+                    mouse.sent_distance[1]
+                )
+            )
+
+        timer = scheduler.Scheduler()
+        if timer.executed > 0:
+            logging.getLogger("system").info(
+                "Scheduler ran {:d} functions, skipped {:d} cancelled, "
+                "mean lateness {:.3f} ms, max lateness {:.3f} ms".format(
+                    timer.executed,
+                    timer.cancelled,
+                    timer.mean_lateness * 1000,
+                    timer.max_lateness * 1000
+                )
+            )
 
         # Remove all claims on VJoy devices
         joystick_handling.VJoyProxy.reset()
 
+    @property
+    def dispatcher(self):
+        """Returns the event dispatcher if events are processed on it.
+
+        :return EventDispatcher instance in use, None if events are
+            processed on the UI thread
+        """
+        return self._dispatcher
+
+    def _event_signals(self, evt_listener):
+        """Returns the event listener signals which are processed.
+
+        :param evt_listener the event listener instance
+        :return list of signals whose events are processed
+        """
+        return [
+            evt_listener.keyboard_event,
+            evt_listener.joystick_event,
+            evt_listener.virtual_event
+        ]
+
     def _reset_state(self):
         """Resets all states to their default values."""
         self.event_handler._active_mode =\
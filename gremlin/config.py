@@ -15,8 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import collections
 import json
 import logging
+import threading
 import time
 import os
 import re
@@ -26,40 +28,170 @@ from PyQt5 import QtCore
 from . import common, util
 
 
+class ProfileIndex:
+
+    """Maps executables to their profiles.
+
+    Exact entries are looked up directly, all entries which are not an
+    existing file are treated as regular expressions, which are compiled
+    once. Lookup results of the most recently used executables are cached.
+
+    Whether an entry is an existing file is only checked when the index is
+    created, the index therefore expires after a while in order to pick up
+    executables that have been created or deleted since.
+    """
+
+    # Number of executables whose lookup result is cached
+    cache_size = 64
+
+    # Time in seconds after which the index has to be rebuilt
+    lifetime = 60.0
+
+    def __init__(self, profiles):
+        """Creates a new index.
+
+        :param profiles dictionary mapping executable paths and regular
+            expressions to profile paths
+        """
+        self._exact = dict(profiles)
+        self._normalized = {}
+        self._patterns = []
+        self._cache = collections.OrderedDict()
+        self._created_at = time.monotonic()
+
+        for key, value in sorted(profiles.items(), key=lambda x: x[0].lower()):
+            self._normalized.setdefault(os.path.normcase(key), value)
+            if os.path.exists(key):
+                continue
+            try:
+                self._patterns.append((key, re.compile(key), value))
+            except re.error as e:
+                logging.getLogger("system").warning(
+                    "Invalid executable regular expression {}: {}".format(
+                        key,
+                        e
+                    )
+                )
+
+    def lookup(self, exec_path):
+        """Returns the profile associated with the given executable.
+
+        :param exec_path the path to the executable for which to return
+            the profile
+        :return profile associated with the given executable, None if there
+            is none
+        """
+        if exec_path in self._cache:
+            self._cache.move_to_end(exec_path)
+            return self._cache[exec_path]
+
+        profile_path = self._match(exec_path)
+        self._cache[exec_path] = profile_path
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return profile_path
+
+    @property
+    def is_expired(self):
+        """Returns whether or not the index has to be rebuilt.
+
+        :return True if the index is older than its lifetime, False
+            otherwise
+        """
+        return time.monotonic() - self._created_at > self.lifetime
+
+    def _match(self, exec_path):
+        """Finds the profile associated with the given executable.
+
+        :param exec_path the path to the executable for which to return
+            the profile
+        :return profile associated with the given executable, None if there
+            is none
+        """
+        # Handle the normal case where the path matches directly
+        profile_path = self._exact.get(exec_path)
+        if profile_path is None:
+            profile_path = self._normalized.get(os.path.normcase(exec_path))
+        if profile_path is not None:
+            logging.getLogger("system").info(
+                "Found exact match for {}, returning {}".format(
+                    exec_path,
+                    profile_path
+                )
+            )
+            return profile_path
+
+        # Handle non files by treating them as regular expressions, returning
+        # the first successful match.
+        for key, pattern, value in self._patterns:
+            if pattern.search(exec_path) is not None:
+                logging.getLogger("system").info(
+                    "Found regex match in {} for {}, returning {}".format(
+                        key,
+                        exec_path,
+                        value
+                    )
+                )
+                return value
+        return None
+
+
 @common.SingletonDecorator
 class Configuration:
 
-    """Responsible for loading and saving configuration data."""
+    """Responsible for loading and saving configuration data.
+
+    Changes are written to disk by a background thread. Changes made in
+    quick succession are combined into a single write, which happens
+    after save_delay seconds.
+    """
+
+    # Time in seconds to wait for further changes before writing them
+    save_delay = 0.5
 
     def __init__(self):
         """Creates a new instance, loading the current configuration."""
         self._data = {}
+        self._profile_index = None
+        self.watcher = None
         self._last_reload = None
+        self._last_written = None
+        self._dirty = False
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer = None
         self.reload()
 
-        self.watcher = QtCore.QFileSystemWatcher([
-            os.path.join(util.userprofile_path(), "config.json")
-        ])
+        self.watcher = QtCore.QFileSystemWatcher([self._file_path()])
         self.watcher.fileChanged.connect(self.reload)
 
     def reload(self):
         """Loads the configuration file's content."""
+        fname = self._file_path()
+        # Replacing the file removes it from the watched files
+        if self.watcher is not None and os.path.isfile(fname) and \
+                fname not in self.watcher.files():
+            self.watcher.addPath(fname)
+
         if self._last_reload is not None and \
                 time.time() - self._last_reload < 1:
             return
 
-        fname = os.path.join(util.userprofile_path(), "config.json")
         # Attempt to load the configuration file if this fails set
         # default empty values.
         load_successful = False
         if os.path.isfile(fname):
             with open(fname) as hdl:
-                try:
-                    decoder = json.JSONDecoder()
-                    self._data = decoder.decode(hdl.read())
-                    load_successful = True
-                except ValueError:
-                    pass
+                content = hdl.read()
+            # Ignore changes caused by writing the configuration
+            if content == self._last_written:
+                return
+            try:
+                decoder = json.JSONDecoder()
+                self._data = decoder.decode(content)
+                load_successful = True
+            except ValueError:
+                pass
         if not load_successful:
             self._data = {
                 "calibration": {},
@@ -69,23 +201,93 @@ class Configuration:
 
         # Ensure required fields are present and if they are missing
         # add empty ones.
+        needs_saving = not load_successful
         for field in ["calibration", "profiles", "last_mode"]:
             if field not in self._data:
                 self._data[field] = {}
+                needs_saving = True
 
-        # Save all data
+        self._profile_index = None
         self._last_reload = time.time()
-        self.save()
+        if needs_saving:
+            self.save()
 
     def save(self):
-        """Writes the configuration file to disk."""
-        fname = os.path.join(util.userprofile_path(), "config.json")
-        with open(fname, "w") as hdl:
-            encoder = json.JSONEncoder(
-                sort_keys=True,
-                indent=4
-            )
-            hdl.write(encoder.encode(self._data))
+        """Schedules writing the configuration file to disk.
+
+        This returns immediately, the file is written by a background
+        thread.
+        """
+        # Any change may affect the executable to profile mapping
+        self._profile_index = None
+        with self._condition:
+            self._dirty = True
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop)
+                self._writer.daemon = True
+                self._writer.start()
+            self._condition.notify()
+
+    def flush(self):
+        """Writes pending changes to disk immediately."""
+        with self._write_lock:
+            with self._condition:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                content = json.JSONEncoder(
+                    sort_keys=True,
+                    indent=4
+                ).encode(self._data)
+            except RuntimeError:
+                # The data was modified while being encoded, try again
+                # with the next write
+                self.save()
+                return
+
+            # Write to a temporary file first such that the configuration
+            # file is never left partially written
+            fname = self._file_path()
+            tmp_fname = fname + ".tmp"
+            last_written = self._last_written
+            try:
+                with open(tmp_fname, "w") as hdl:
+                    hdl.write(content)
+                    hdl.flush()
+                    os.fsync(hdl.fileno())
+                self._last_written = content
+                os.replace(tmp_fname, fname)
+            except OSError as e:
+                logging.getLogger("system").error(
+                    "Failed to write configuration: {}".format(e)
+                )
+                # Keep the changes pending such that the next write
+                # retries them and don't leave the partial file behind
+                self._last_written = last_written
+                with self._condition:
+                    self._dirty = True
+                try:
+                    os.remove(tmp_fname)
+                except OSError:
+                    pass
+
+    def _write_loop(self):
+        """Writes changes once no further changes have been made for a
+        short time."""
+        while True:
+            with self._condition:
+                while not self._dirty:
+                    self._condition.wait()
+            time.sleep(self.save_delay)
+            self.flush()
+
+    def _file_path(self):
+        """Returns the path of the configuration file.
+
+        :return path to the configuration file
+        """
+        return os.path.join(util.userprofile_path(), "config.json")
 
     def set_calibration(self, dev_id, limits):
         """Sets the calibration data for all axes of a device.
@@ -156,44 +358,18 @@ class Configuration:
 
         This considers all path entries that do not resolve to an actual file
         in the system as a regular expression. Regular expressions will be
-        searched in order after true files have been checked.
+        searched in order after true files have been checked. The result is
+        cached until the configuration changes or the cache expires.
 
         :param exec_path the path to the executable for which to
             return the profile
         :return profile associated with the given executable
         """
-        # Handle the normal case where the path matches directly
-        profile_path = self.get_profile(exec_path)
-        if profile_path is not None:
-            logging.getLogger("system").info(
-                "Found exact match for {}, returning {}".format(
-                    exec_path,
-                    profile_path
-                )
-            )
-            return profile_path
-
-        # Handle non files by treating them as regular expressions, returning
-        # the first successful match.
-        for key, value in sorted(
-                self._data["profiles"].items(),
-                key=lambda x: x[0].lower()
-        ):
-            # Ignore valid files
-            if os.path.exists(key):
-                continue
-
-            # Treat key as regular expression and attempt to match it to the
-            # provided executable path
-            if re.search(key, exec_path) is not None:
-                logging.getLogger("system").info(
-                    "Found regex match in {} for {}, returning {}".format(
-                        key,
-                        exec_path,
-                        value
-                    )
-                )
-                return value
+        index = self._profile_index
+        if index is None or index.is_expired:
+            index = ProfileIndex(self._data["profiles"])
+            self._profile_index = index
+        return index.lookup(exec_path)
 
     def set_profile(self, exec_path, profile_path):
         """Stores the executable and profile combination.
@@ -288,6 +464,31 @@ class Configuration:
             self._data["autoload_profiles"] = value
             self.save()
 
+    @property
+    def autoload_event_hook(self):
+        """Returns whether or not foreground changes are detected using an
+        event hook.
+
+        With the event hook profiles are loaded as soon as the active
+        application changes, otherwise the active application is checked
+        once per second. Polling remains the default, the event hook has
+        to be enabled in the options.
+
+        :return True if an event hook is used, False if polling is used
+        """
+        return self._data.get("autoload_event_hook", False)
+
+    @autoload_event_hook.setter
+    def autoload_event_hook(self, value):
+        """Sets whether or not foreground changes are detected using an
+        event hook.
+
+        :param value Flag indicating whether to use an event hook or polling
+        """
+        if type(value) == bool:
+            self._data["autoload_event_hook"] = value
+            self.save()
+
     @property
     def highlight_input(self):
         """Returns whether or not to highlight inputs.
@@ -449,6 +650,45 @@ class Configuration:
         self._data["macro_axis_minimum_change_rate"] = value
         self.save()
 
+    @property
+    def macro_spin_budget(self):
+        """Returns the time spent yielding before a macro action.
+
+        :return time in seconds at the end of a wait which is spent
+            yielding to other threads instead of sleeping
+        """
+        return min(self._data.get("macro_spin_budget", 0.0001), 0.0001)
+
+    @macro_spin_budget.setter
+    def macro_spin_budget(self, value):
+        """Sets the time spent yielding before a macro action.
+
+        :param value time in seconds at the end of a wait which is spent
+            yielding to other threads instead of sleeping, at most 100 us
+        """
+        self._data["macro_spin_budget"] = \
+            min(max(0.0, float(value)), 0.0001)
+        self.save()
+
+    @property
+    def macro_timing_report(self):
+        """Returns whether or not the timing of macro actions is recorded.
+
+        :return True if scheduled and actual execution times of macro
+            actions are recorded, False otherwise
+        """
+        return self._data.get("macro_timing_report", False)
+
+    @macro_timing_report.setter
+    def macro_timing_report(self, value):
+        """Sets whether or not the timing of macro actions is recorded.
+
+        :param value True to record scheduled and actual execution times of
+            macro actions, False otherwise
+        """
+        self._data["macro_timing_report"] = bool(value)
+        self.save()
+
     @property
     def macro_record_axis(self):
         return self._data.get("macro_record_axis", False)
@@ -494,6 +734,80 @@ class Configuration:
         self._data["macro_record_mouse"] = bool(value)
         self.save()
 
+    @property
+    def dispatch_thread(self):
+        """Returns whether or not events are processed on their own thread.
+
+        :return True if events are processed on a dedicated thread, False
+            if they are processed on the UI thread
+        """
+        return self._data.get("dispatch_thread", False)
+
+    @dispatch_thread.setter
+    def dispatch_thread(self, value):
+        """Sets whether or not events are processed on their own thread.
+
+        :param value True to process events on a dedicated thread, False
+            to process them on the UI thread
+        """
+        self._data["dispatch_thread"] = bool(value)
+        self.save()
+
+    @property
+    def vjoy_output_frames(self):
+        """Returns whether or not vJoy changes are sent in batches.
+
+        :return True if all changes to a vJoy device are sent with a single
+            update, False if every change is sent individually
+        """
+        return self._data.get("vjoy_output_frames", False)
+
+    @vjoy_output_frames.setter
+    def vjoy_output_frames(self, value):
+        """Sets whether or not vJoy changes are sent in batches.
+
+        :param value True to send all changes to a vJoy device with a
+            single update, False to send every change individually
+        """
+        self._data["vjoy_output_frames"] = bool(value)
+        self.save()
+
+    @property
+    def vjoy_frame_rate(self):
+        """Returns the rate at which batched vJoy changes are sent.
+
+        :return number of updates per second, 0 if changes are sent at the
+            end of each event dispatch cycle
+        """
+        return self._data.get("vjoy_frame_rate", 0)
+
+    @vjoy_frame_rate.setter
+    def vjoy_frame_rate(self, value):
+        """Sets the rate at which batched vJoy changes are sent.
+
+        :param value number of updates per second, 0 to send changes at the
+            end of each event dispatch cycle
+        """
+        self._data["vjoy_frame_rate"] = max(0, int(value))
+        self.save()
+
+    @property
+    def mouse_motion_rate(self):
+        """Returns the rate at which mouse motion is updated.
+
+        :return number of mouse motion updates per second
+        """
+        return self._data.get("mouse_motion_rate", 500)
+
+    @mouse_motion_rate.setter
+    def mouse_motion_rate(self, value):
+        """Sets the rate at which mouse motion is updated.
+
+        :param value number of mouse motion updates per second
+        """
+        self._data["mouse_motion_rate"] = min(1000, max(10, int(value)))
+        self.save()
+
     @property
     def window_size(self):
         """Returns the size of the main Gremlin window.
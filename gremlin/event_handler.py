@@ -15,17 +15,20 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import array
+import collections
 import functools
 import inspect
 import logging
 import time
-from threading import Thread
+from threading import Event as ThreadEvent, Lock, Thread
 
 from PyQt5 import QtCore
 
 import dill
 from . import common, config, error, joystick_handling, windows_event_hook, \
     macro, util
+from vjoy import vjoy
 
 
 class Event:
@@ -45,8 +48,29 @@ class Event:
 
     The extended field is used for Keyboard events only to indicate
     whether or not the key's scan code is extended one.
+
+    The hash identifying the input is computed once on creation and doubles
+    as the key under which callbacks are looked up, as such the event_type, identifier, and device_guid fields
+    must not be modified after an event has been created.
+
+    Events are not recycled. They reach their consumers through queued Qt
+    signals and the dispatcher thread, hence no stage knows when the last
+    consumer is done with an event, and callbacks may keep the events they
+    receive without cloning them. The number of axis events allocated
+    under sustained input is instead reduced by axis coalescing, see
+    AxisCoalescer.
     """
 
+    __slots__ = (
+        "event_type",
+        "identifier",
+        "device_guid",
+        "is_pressed",
+        "value",
+        "raw_value",
+        "dispatch_key"
+    )
+
     def __init__(
             self,
             event_type,
@@ -73,6 +97,9 @@ class Event:
         self.is_pressed = is_pressed
         self.value = value
         self.raw_value = raw_value
+        # Hash identifying the input, also used to look up callbacks
+        self.dispatch_key = \
+            Event._compute_hash(event_type, identifier, device_guid)
 
     def clone(self):
         """Returns a clone of the event.
@@ -89,13 +116,15 @@ class Event:
         )
 
     def __eq__(self, other):
-        return self.__hash__() == other.__hash__()
+        if self is other:
+            return True
+        return self.dispatch_key == hash(other)
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        """Computes the hash value of this event.
+        """Returns the hash value of this event.
 
         The hash is comprised of the events type, identifier of the
         event source and the id of the event device. Events from the same
@@ -104,18 +133,29 @@ class Event:
 
         :return integer hash value of this event
         """
-        if self.event_type == common.InputType.Keyboard:
+        return self.dispatch_key
+
+    @staticmethod
+    def _compute_hash(event_type, identifier, device_guid):
+        """Computes the hash value identifying the input of an event.
+
+        :param event_type the type of the event
+        :param identifier the identifier of the event source
+        :param device_guid the GUID of the device causing the event
+        :return integer hash value of the described input
+        """
+        if event_type == common.InputType.Keyboard:
             return hash((
-                self.device_guid,
-                self.event_type.value,
-                self.identifier,
-                1 if self.identifier[1] else 0
+                device_guid,
+                event_type.value,
+                identifier,
+                1 if identifier[1] else 0
             ))
         else:
             return hash((
-                self.device_guid,
-                self.event_type.value,
-                self.identifier,
+                device_guid,
+                event_type.value,
+                identifier,
                 0
             ))
 
@@ -134,6 +174,317 @@ class Event:
         )
 
 
+class AxisCoalescer:
+
+    """Merges axis samples which arrive faster than they are consumed.
+
+    Only the most recent sample of every axis is kept until the pending
+    samples are flushed. Flushing happens either at a fixed interval or,
+    if no interval is given, whenever the consumer is ready to process
+    more events.
+    """
+
+    def __init__(self, interval):
+        """Creates a new instance.
+
+        :param interval time in seconds between two flushes, 0 to flush
+            as fast as the consumer processes events
+        """
+        self.interval = interval
+        self._pending = {}
+        self._lock = Lock()
+        self._flush_lock = Lock()
+
+        # Statistics about the samples seen and merged
+        self.received = 0
+        self.merged = 0
+        self.flushed = 0
+
+    def add(self, device_guid, identifier, value, raw_value):
+        """Stores the newest sample of an axis.
+
+        :param device_guid the GUID of the device the axis belongs to
+        :param identifier the index of the axis
+        :param value the calibrated axis value
+        :param raw_value the raw axis value
+        :return True if this is the first sample pending since the last
+            flush, False otherwise
+        """
+        with self._lock:
+            was_empty = len(self._pending) == 0
+            key = (device_guid, identifier)
+            if key in self._pending:
+                self.merged += 1
+            self._pending[key] = (value, raw_value)
+            self.received += 1
+        return was_empty
+
+    def take(self):
+        """Removes and returns all pending samples.
+
+        :return dictionary of pending samples keyed by device and axis
+        """
+        with self._lock:
+            return self._take()
+
+    def flush(self, emit_fn):
+        """Passes all pending samples to the given function.
+
+        Samples are emitted without holding the lock protecting the pending
+        samples, as such adding samples never waits for their consumer.
+        Flushes themselves are serialized, which ensures that samples
+        flushed concurrently from multiple threads retain their order.
+
+        :param emit_fn function called with the device GUID, axis index,
+            value, and raw value of every pending sample
+        """
+        with self._flush_lock:
+            for key, sample in self.take().items():
+                emit_fn(key[0], key[1], sample[0], sample[1])
+
+    def _take(self):
+        """Removes and returns all pending samples, lock has to be held.
+
+        :return dictionary of pending samples keyed by device and axis
+        """
+        pending = self._pending
+        if len(pending) > 0:
+            self._pending = {}
+            self.flushed += len(pending)
+        return pending
+
+
+class DeviceCalibration:
+
+    """Calibration lookup tables of all axes of a single device.
+
+    Raw axis values are 16 bit integers, as such the calibrated value of
+    every possible raw value is stored in a table which is indexed by the
+    raw value. Tables are only created for axes that actually produce
+    events.
+    """
+
+    # Offset turning a raw axis value into a table index
+    raw_offset = 32768
+    # Number of entries in a single table
+    table_size = 65536
+
+    def __init__(self, device_guid):
+        """Creates a new instance.
+
+        :param device_guid the GUID of the device
+        """
+        self.device_guid = device_guid
+        self._limits = {}
+        self._tables = {}
+
+    def value(self, axis_index, raw_value):
+        """Returns the calibrated value of an axis.
+
+        :param axis_index the index of the axis
+        :param raw_value the raw value of the axis
+        :return calibrated value in [-1, 1]
+        """
+        table = self._tables.get(axis_index, None)
+        if table is None:
+            table = self._create_table(axis_index)
+        index = raw_value + DeviceCalibration.raw_offset
+        if 0 <= index < DeviceCalibration.table_size:
+            return table[index]
+        else:
+            return self._function(axis_index)(raw_value)
+
+    def table(self, axis_index):
+        """Returns the lookup table of an axis if it exists.
+
+        :param axis_index the index of the axis
+        :return lookup table of the axis, None if none has been created
+        """
+        return self._tables.get(axis_index, None)
+
+    def set_limits(self, axis_index, limits):
+        """Sets the calibration limits of an axis.
+
+        :param axis_index the index of the axis
+        :param limits the minimum, center, and maximum value of the axis
+        """
+        self._limits[axis_index] = tuple(limits)
+
+    def reload(self):
+        """Reloads all limits from the configuration and rebuilds tables."""
+        # Iterate over a copy, as the thread processing axis events adds the
+        # limits of axes once they produce their first event
+        cfg = config.Configuration()
+        for axis_index in list(self._limits):
+            self._limits[axis_index] = tuple(
+                cfg.get_calibration(self.device_guid, axis_index)
+            )
+        self.rebuild_tables()
+
+    def rebuild_tables(self):
+        """Rebuilds the lookup tables of all axes that have one."""
+        for axis_index in list(self._tables):
+            self._create_table(axis_index)
+
+    @property
+    def memory_usage(self):
+        """Returns the memory used by the lookup tables.
+
+        :return number of bytes used by the lookup tables
+        """
+        return sum(len(t) * t.itemsize for t in self._tables.values())
+
+    def _function(self, axis_index):
+        """Returns the calibration function of an axis.
+
+        :param axis_index the index of the axis
+        :return function computing the calibrated value of a raw value
+        """
+        if axis_index not in self._limits:
+            self._limits[axis_index] = tuple(config.Configuration()
+                .get_calibration(self.device_guid, axis_index))
+        return util.create_calibration_function(*self._limits[axis_index])
+
+    def _create_table(self, axis_index):
+        """Creates the lookup table of an axis.
+
+        :param axis_index the index of the axis
+        :return lookup table for the axis
+        """
+        # The table is only published once it is complete, as other threads
+        # may look up values while it is being built
+        fn = self._function(axis_index)
+        table = array.array("f", [
+            fn(raw) for raw in range(
+                -DeviceCalibration.raw_offset,
+                DeviceCalibration.table_size - DeviceCalibration.raw_offset
+            )
+        ])
+        self._tables[axis_index] = table
+        return table
+
+
+class DeviceState:
+
+    """Latest raw state of the inputs of a single joystick device.
+
+    The state of each input is stored in an array indexed by the input's
+    index, together with a flag indicating whether or not the input has
+    produced an event yet, i.e. whether the stored state is valid.
+    """
+
+    # Largest input index that can be stored for each type of input
+    max_axis = 8
+    max_button = 128
+    max_hat = 4
+
+    def __init__(self):
+        """Creates a new instance with no known state."""
+        self.axes = array.array("l", [0] * (DeviceState.max_axis + 1))
+        self.buttons = bytearray(DeviceState.max_button + 1)
+        self.hats = array.array("l", [-1] * (DeviceState.max_hat + 1))
+        self.axis_known = bytearray(DeviceState.max_axis + 1)
+        self.button_known = bytearray(DeviceState.max_button + 1)
+        self.hat_known = bytearray(DeviceState.max_hat + 1)
+
+    def update(self, event):
+        """Records the state reported by a DILL input event.
+
+        :param event the dill.InputEvent to record
+        """
+        index = event.input_index
+        if event.input_type == dill.InputType.Axis:
+            if index <= DeviceState.max_axis:
+                self.axes[index] = event.value
+                self.axis_known[index] = 1
+        elif event.input_type == dill.InputType.Button:
+            if index <= DeviceState.max_button:
+                self.buttons[index] = event.value == 1
+                self.button_known[index] = 1
+        elif event.input_type == dill.InputType.Hat:
+            if index <= DeviceState.max_hat:
+                self.hats[index] = event.value
+                self.hat_known[index] = 1
+
+    def invalidate(self):
+        """Marks the state of all inputs as unknown."""
+        for flags in [self.axis_known, self.button_known, self.hat_known]:
+            flags[:] = bytes(len(flags))
+
+
+class InputStateStore:
+
+    """Holds the latest state of all joystick inputs and keyboard keys.
+
+    The store is updated by the EventListener as events arrive, which allows
+    reading the state of an input from memory instead of querying DILL.
+    """
+
+    # Offset of extended keys in the key state array
+    extended_offset = 0x100
+
+    def __init__(self):
+        """Creates a new, empty, store."""
+        self._devices = {}
+        self._keys = bytearray(2 * InputStateStore.extended_offset)
+
+    def device(self, device_guid):
+        """Returns the state record of a joystick device.
+
+        :param device_guid GUID of the device
+        :return DeviceState instance of the device
+        """
+        state = self._devices.get(device_guid)
+        if state is None:
+            state = self._devices.setdefault(device_guid, DeviceState())
+        return state
+
+    def update(self, event):
+        """Records the state reported by a DILL input event.
+
+        :param event the dill.InputEvent to record
+        """
+        self.device(event.device_guid).update(event)
+
+    def invalidate(self):
+        """Marks the state of all joystick inputs as unknown."""
+        for state in list(self._devices.values()):
+            state.invalidate()
+
+    def set_key(self, scan_code, is_extended, is_pressed):
+        """Records the state of a keyboard key.
+
+        :param scan_code the scan code of the key
+        :param is_extended whether or not the key code is extended
+        :param is_pressed True if the key is pressed, False otherwise
+        """
+        index = self._key_index(scan_code, is_extended)
+        if index is not None:
+            self._keys[index] = is_pressed
+
+    def is_key_pressed(self, scan_code, is_extended):
+        """Returns whether or not a keyboard key is pressed.
+
+        :param scan_code the scan code of the key
+        :param is_extended whether or not the key code is extended
+        :return True if the key is pressed, False otherwise
+        """
+        index = self._key_index(scan_code, is_extended)
+        return index is not None and self._keys[index] == 1
+
+    def _key_index(self, scan_code, is_extended):
+        """Returns the index of a key in the key state array.
+
+        :param scan_code the scan code of the key
+        :param is_extended whether or not the key code is extended
+        :return index of the key, None for invalid scan codes
+        """
+        if not 0 <= scan_code < InputStateStore.extended_offset:
+            return None
+        return scan_code + InputStateStore.extended_offset \
+            if is_extended else scan_code
+
+
 @common.SingletonDecorator
 class EventListener(QtCore.QObject):
 
@@ -151,6 +502,10 @@ class EventListener(QtCore.QObject):
     virtual_event = QtCore.pyqtSignal(Event)
     # Signal emitted when a joystick is attached or removed
     device_change_event = QtCore.pyqtSignal()
+    # Signal emitted when coalesced axis samples are ready to be consumed
+    _axis_samples_pending = QtCore.pyqtSignal()
+    # Signal emitted to run a function on the thread processing events
+    _call_requested = QtCore.pyqtSignal(object)
 
     def __init__(self):
         """Creates a new instance."""
@@ -160,11 +515,20 @@ class EventListener(QtCore.QObject):
         self.mouse_hook = windows_event_hook.MouseHook()
         self.mouse_hook.register(self._mouse_handler)
 
-        # Calibration function for each axis of all devices
+        # Calibration lookup tables of all devices
         self._calibrations = {}
 
+        # Merging of axis samples, if enabled
+        self._coalescer = None
+        self._axis_samples_pending.connect(self._drain_axis_samples)
+        # Dispatcher processing the events, if not done by the UI thread
+        self._dispatcher = None
+        self._call_requested.connect(self._run_call)
+
+        # Latest state of all inputs
+        self._input_state = InputStateStore()
+
         self._running = True
-        self._keyboard_state = {}
         self.gremlin_active = False
 
         #self._init_joysticks()
@@ -177,17 +541,87 @@ class EventListener(QtCore.QObject):
         self._running = False
         self.keyboard_hook.stop()
 
+    @property
+    def input_state(self):
+        """Returns the store holding the latest state of all inputs.
+
+        :return InputStateStore instance updated by this listener
+        """
+        return self._input_state
+
+    @property
+    def axis_coalescer(self):
+        """Returns the axis sample coalescer if one is active.
+
+        :return AxisCoalescer instance in use, None if coalescing is off
+        """
+        return self._coalescer
+
+    def enable_axis_coalescing(self, interval):
+        """Enables merging of axis samples arriving in quick succession.
+
+        :param interval time in seconds between flushes of merged samples,
+            0 to flush as fast as the events are processed
+        """
+        self.disable_axis_coalescing()
+        coalescer = AxisCoalescer(interval)
+        self._coalescer = coalescer
+        if interval > 0:
+            Thread(target=self._flush_loop, args=(coalescer,)).start()
+
+    def set_dispatcher(self, dispatcher):
+        """Sets the dispatcher processing the events of this listener.
+
+        Coalesced axis samples are drained on the thread processing the
+        events, i.e. the dispatcher's thread if one is set and the UI
+        thread otherwise.
+
+        :param dispatcher the EventDispatcher processing events, None if
+            events are processed by the UI thread
+        """
+        self._dispatcher = dispatcher
+
+    def call_in_event_thread(self, fn):
+        """Runs a function on the thread processing the events.
+
+        Code running on other threads, such as the scheduler, uses this to
+        modify state which is otherwise only modified while processing
+        events.
+
+        :param fn the function to run
+        """
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            self._call_requested.emit(fn)
+        else:
+            dispatcher.call(fn)
+
+    def disable_axis_coalescing(self):
+        """Disables merging of axis samples, emitting pending ones."""
+        coalescer = self._coalescer
+        self._coalescer = None
+        if coalescer is not None:
+            coalescer.flush(self._emit_axis_event)
+
     def reload_calibrations(self):
         """Reloads the calibration data from the configuration file."""
-        cfg = config.Configuration()
-        for key in self._calibrations:
-            limits = cfg.get_calibration(key[0], key[1])
-            self._calibrations[key] = \
-                util.create_calibration_function(
-                    limits[0],
-                    limits[1],
-                    limits[2]
-                )
+        for calibration in list(self._calibrations.values()):
+            calibration.reload()
+        logging.getLogger("system").debug(
+            "Calibration tables use {:d} bytes".format(
+                self.calibration_memory_usage
+            )
+        )
+
+    @property
+    def calibration_memory_usage(self):
+        """Returns the memory used by all calibration lookup tables.
+
+        :return number of bytes used by calibration lookup tables
+        """
+        return sum(
+            c.memory_usage for c in list(self._calibrations.values())
+        )
 
     def _run(self):
         """Starts the event loop."""
@@ -208,16 +642,37 @@ class EventListener(QtCore.QObject):
         :param data the joystick event
         """
         event = dill.InputEvent(data)
+        self._input_state.update(event)
+        coalescer = self._coalescer
 
         if event.input_type == dill.InputType.Axis:
-            self.joystick_event.emit(Event(
-                event_type=common.InputType.JoystickAxis,
-                device_guid=event.device_guid,
-                identifier=event.input_index,
-                value=self._apply_calibration(event),
-                raw_value=event.value
-            ))
-        elif event.input_type == dill.InputType.Button:
+            if coalescer is None:
+                self._emit_axis_event(
+                    event.device_guid,
+                    event.input_index,
+                    self._apply_calibration(event),
+                    event.value
+                )
+            else:
+                is_first = coalescer.add(
+                    event.device_guid,
+                    event.input_index,
+                    self._apply_calibration(event),
+                    event.value
+                )
+                if is_first and coalescer.interval == 0:
+                    dispatcher = self._dispatcher
+                    if dispatcher is None:
+                        self._axis_samples_pending.emit()
+                    else:
+                        dispatcher.call(self._drain_axis_samples)
+            return
+
+        # Emit pending axis samples first to retain the order of events
+        if coalescer is not None:
+            coalescer.flush(self._emit_axis_event)
+
+        if event.input_type == dill.InputType.Button:
             self.joystick_event.emit(Event(
                 event_type=common.InputType.JoystickButton,
                 device_guid=event.device_guid,
@@ -232,6 +687,58 @@ class EventListener(QtCore.QObject):
                 value=util.dill_hat_lookup[event.value]
             ))
 
+    def _emit_axis_event(self, device_guid, identifier, value, raw_value):
+        """Emits the event corresponding to an axis sample.
+
+        A new event is created for every sample, see Event for why axis
+        events are not recycled.
+
+        :param device_guid the GUID of the device the axis belongs to
+        :param identifier the index of the axis
+        :param value the calibrated axis value
+        :param raw_value the raw axis value
+        """
+        self.joystick_event.emit(Event(
+            event_type=common.InputType.JoystickAxis,
+            device_guid=device_guid,
+            identifier=identifier,
+            value=value,
+            raw_value=raw_value
+        ))
+
+    def _drain_axis_samples(self):
+        """Emits all pending axis samples once the consumer is ready.
+
+        This runs in the thread processing the events.
+        """
+        coalescer = self._coalescer
+        if coalescer is None:
+            return
+        coalescer.flush(self._emit_axis_event)
+
+    def _run_call(self, fn):
+        """Runs a function requested via call_in_event_thread.
+
+        :param fn the function to run
+        """
+        try:
+            fn()
+        except Exception as e:
+            logging.getLogger("system").exception(
+                "Error while running queued function: {}".format(e)
+            )
+
+    def _flush_loop(self, coalescer):
+        """Periodically emits the pending axis samples.
+
+        :param coalescer the coalescer whose samples to flush
+        """
+        util.run_paced(
+            coalescer.interval,
+            lambda: self._running and self._coalescer is coalescer,
+            lambda: coalescer.flush(self._emit_axis_event)
+        )
+
     def _joystick_device_handler(self, data, action):
         """Callback for device change events.
 
@@ -241,6 +748,8 @@ class EventListener(QtCore.QObject):
         """
         joystick_handling.joystick_devices_initialization()
         self._init_joysticks()
+        # Stored states may be stale for devices that were re-attached
+        self._input_state.invalidate()
         self.device_change_event.emit()
 
     def _keyboard_handler(self, event):
@@ -257,11 +766,11 @@ class EventListener(QtCore.QObject):
 
         key_id = (event.scan_code, event.is_extended)
         is_pressed = event.is_pressed
-        is_repeat = self._keyboard_state.get(key_id, False) and is_pressed
+        is_repeat = is_pressed and self._input_state.is_key_pressed(*key_id)
         # Only emit an event if they key is pressed for the first
         # time or released but not when it's being held down
         if not is_repeat:
-            self._keyboard_state[key_id] = is_pressed
+            self._input_state.set_key(*key_id, is_pressed)
             self.keyboard_event.emit(Event(
                 event_type=common.InputType.Keyboard,
                 device_guid=dill.GUID_Keyboard,
@@ -292,11 +801,24 @@ class EventListener(QtCore.QObject):
         return True
 
     def _apply_calibration(self, event):
-        key = (event.device_guid, event.input_index)
-        if key in self._calibrations:
-            return self._calibrations[key](event.value)
-        else:
-            return util.axis_calibration(event.value, -32768, 0, 32767)
+        calibration = self._calibrations.get(event.device_guid, None)
+        if calibration is None:
+            calibration = self.device_calibration(event.device_guid)
+        return calibration.value(event.input_index, event.value)
+
+    def device_calibration(self, device_guid):
+        """Returns the calibration record of a device, creating it if needed.
+
+        :param device_guid the GUID of the device
+        :return DeviceCalibration instance of the device
+        """
+        calibration = self._calibrations.get(device_guid, None)
+        if calibration is None:
+            calibration = self._calibrations.setdefault(
+                device_guid,
+                DeviceCalibration(device_guid)
+            )
+        return calibration
 
     def _init_joysticks(self):
         """Initializes joystick devices."""
@@ -309,17 +831,24 @@ class EventListener(QtCore.QObject):
         :param device_info information about the device
         """
         cfg = config.Configuration()
+        calibration = self.device_calibration(device_info.device_guid)
         for entry in device_info.axis_map:
-            limits = cfg.get_calibration(
-                device_info.device_guid,
-                entry.axis_index
+            calibration.set_limits(
+                entry.axis_index,
+                cfg.get_calibration(device_info.device_guid, entry.axis_index)
             )
-            self._calibrations[(device_info.device_guid, entry.axis_index)] = \
-                util.create_calibration_function(
-                    limits[0],
-                    limits[1],
-                    limits[2]
-                )
+        calibration.rebuild_tables()
+
+
+def call_in_event_thread(fn):
+    """Runs a function on the thread processing events.
+
+    Functions run by the scheduler use this to ensure that execution graphs,
+    containers and virtual buttons are only ever run by a single thread.
+
+    :param fn the function to run
+    """
+    EventListener().call_in_event_thread(fn)
 
 
 @common.SingletonDecorator
@@ -331,10 +860,15 @@ class EventHandler(QtCore.QObject):
     mode_changed = QtCore.pyqtSignal(str)
     # Signal emitted when the application is pause / resumed
     is_active = QtCore.pyqtSignal(bool)
+    # Signal emitted when a vJoy error occurred while processing an event
+    vjoy_error = QtCore.pyqtSignal(str)
 
     def __init__(self):
         """Initializes the EventHandler instance."""
         QtCore.QObject.__init__(self)
+        # Errors may occur outside the UI thread, the connection ensures
+        # the message is always displayed by the UI thread
+        self.vjoy_error.connect(util.display_error)
         self.process_callbacks = True
         self.plugins = {}
         self.callbacks = {}
@@ -342,6 +876,12 @@ class EventHandler(QtCore.QObject):
         self._active_mode = None
         self._previous_mode = None
 
+        # Flattened dispatch tables of the active mode, one holding the
+        # callbacks to run while active and one those to run while paused
+        self._dispatch_running = {}
+        self._dispatch_paused = {}
+        self._dispatch_table = {}
+
     @property
     def active_mode(self):
         """Returns the currently active mode.
@@ -395,6 +935,15 @@ class EventHandler(QtCore.QObject):
 
         This takes mode inheritance into account.
 
+        :param inheritance_tree the tree of parent and children in the
+            inheritance structure
+        """
+        self._propagate_callbacks(inheritance_tree)
+        self._compile_dispatch_table()
+
+    def _propagate_callbacks(self, inheritance_tree):
+        """Copies the callbacks of parent modes into their child modes.
+
         :param inheritance_tree the tree of parent and children in the
             inheritance structure
         """
@@ -418,7 +967,7 @@ class EventHandler(QtCore.QObject):
                                 device_cb[child][event] = callbacks
 
             # Recurse until we've dealt with all modes
-            self.build_event_lookup(children)
+            self._propagate_callbacks(children)
 
     def change_mode(self, new_mode):
         """Changes the currently active mode.
@@ -443,26 +992,31 @@ class EventHandler(QtCore.QObject):
             cfg.set_last_mode(cfg.last_profile, new_mode)
 
             self._active_mode = new_mode
+            self._compile_dispatch_table()
             self.mode_changed.emit(self._active_mode)
 
     def resume(self):
         """Resumes the processing of callbacks."""
         self.process_callbacks = True
+        self._select_dispatch_table()
         self.is_active.emit(self.process_callbacks)
 
     def pause(self):
         """Stops the processing of callbacks."""
         self.process_callbacks = False
+        self._select_dispatch_table()
         self.is_active.emit(self.process_callbacks)
 
     def toggle_active(self):
         """Toggles the processing of callbacks on or off."""
         self.process_callbacks = not self.process_callbacks
+        self._select_dispatch_table()
         self.is_active.emit(self.process_callbacks)
 
     def clear(self):
         """Removes all attached callbacks."""
         self.callbacks = {}
+        self._compile_dispatch_table()
 
     @QtCore.pyqtSlot(Event)
     def process_event(self, event):
@@ -471,15 +1025,31 @@ class EventHandler(QtCore.QObject):
 
         :param event the event to process
         """
-        for cb in self._matching_callbacks(event):
+        # Changes to vJoy devices made by the callbacks are sent once all
+        # of them have run, if output frames are in use
+        vjoy.begin_output_frame()
+        try:
+            for cb in self._matching_callbacks(event):
+                try:
+                    cb(event)
+                except error.VJoyError as e:
+                    self._handle_vjoy_error(e)
+        finally:
             try:
-                cb(event)
+                vjoy.end_output_frame()
             except error.VJoyError as e:
-                util.display_error(str(e))
-                logging.getLogger("system").exception(
-                    "VJoy related error: {}".format(e)
-                )
-                self.pause()
+                self._handle_vjoy_error(e)
+
+    def _handle_vjoy_error(self, e):
+        """Reports a vJoy error and stops processing callbacks.
+
+        :param e the VJoyError that occurred
+        """
+        self.vjoy_error.emit(str(e))
+        logging.getLogger("system").exception(
+            "VJoy related error: {}".format(e)
+        )
+        self.pause()
 
     def _matching_callbacks(self, event):
         """Returns the list of callbacks to execute in response to
@@ -487,21 +1057,46 @@ class EventHandler(QtCore.QObject):
 
         :param event the event for which to search the matching
             callbacks
-        :return a list of all callbacks registered and valid for the
+        :return a tuple of all callbacks registered and valid for the
             given event
         """
-        # Obtain callbacks matching the event
-        callback_list = []
-        if event.device_guid in self.callbacks:
-            callback_list = self.callbacks[event.device_guid].get(
-                self._active_mode, {}
-            ).get(event, [])
-
-        # Filter events when the system is paused
-        if not self.process_callbacks:
-            return [c[0] for c in callback_list if c[1]]
+        return self._dispatch_table.get(event.dispatch_key, ())
+
+    def _compile_dispatch_table(self):
+        """Builds the flat dispatch tables for the currently active mode.
+
+        The nested device, mode, and event dictionary is flattened into
+        a single dictionary keyed by the event's dispatch key, the integer
+        hash precomputed on creation. As events compare equal exactly when
+        their hashes do, this matches the lookup in the nested dictionaries
+        while avoiding hashing the event type and device GUID again. The
+        callbacks of each entry are stored as ready-made tuples for both
+        the running and the paused state, such that dispatching an event
+        requires a single lookup.
+        """
+        running = {}
+        paused = {}
+        for device_guid, modes in self.callbacks.items():
+            for event, callback_list in modes.get(self._active_mode, {}).items():
+                # Skip placeholder entries which can never match an event
+                if event is None or event.device_guid != device_guid:
+                    continue
+                key = event.dispatch_key
+                running[key] = tuple(c[0] for c in callback_list)
+                permanent = tuple(c[0] for c in callback_list if c[1])
+                if len(permanent) > 0:
+                    paused[key] = permanent
+
+        self._dispatch_running = running
+        self._dispatch_paused = paused
+        self._select_dispatch_table()
+
+    def _select_dispatch_table(self):
+        """Selects the dispatch table matching the current activity state."""
+        if self.process_callbacks:
+            self._dispatch_table = self._dispatch_running
         else:
-            return [c[0] for c in callback_list]
+            self._dispatch_table = self._dispatch_paused
 
     def _install_plugins(self, callback):
         """Installs the current plugins into the given callback.
@@ -518,3 +1113,187 @@ class EventHandler(QtCore.QObject):
             if keyword in signature:
                 callback = plugin.install(callback, partial_fn)
         return callback
+
+
+class EventDispatcher:
+
+    """Processes events on a dedicated thread instead of the UI thread.
+
+    Events are appended to a bounded queue by the threads producing them,
+    i.e. the input listener and hook threads, and are handed to the
+    EventHandler by the dispatch thread. Signals emitted by the EventHandler
+    are delivered to the UI thread by Qt's queued connections.
+
+    Only axis events are subject to the queue bound, as newer samples of
+    an axis supersede older ones, while button, hat, and key events are
+    always queued. Once the queue is full a new axis sample replaces the
+    queued sample of the same axis or, if there is none, the oldest
+    queued axis sample. This ensures the latest position of every axis
+    is always processed.
+    """
+
+    def __init__(self, handler, capacity=1024):
+        """Creates a new instance.
+
+        :param handler the EventHandler instance processing the events
+        :param capacity maximum number of queued events beyond which axis
+            events supersede queued ones
+        """
+        self._handler = handler
+        self._capacity = capacity
+        self._queue = collections.deque()
+        # Queued entry of every axis with a queued sample
+        self._axis_entries = {}
+        self._lock = Lock()
+        self._wakeup = ThreadEvent()
+        self._running = False
+        self._thread = None
+        self.reset_statistics()
+
+    def start(self):
+        """Starts the dispatch thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = Thread(target=self._dispatch_loop)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the dispatch thread, discarding queued events."""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+        with self._lock:
+            self._queue.clear()
+            self._axis_entries.clear()
+
+    def enqueue(self, event):
+        """Queues an event for processing by the dispatch thread.
+
+        This is meant to be connected directly to the signals emitting
+        events, i.e. it runs in the thread producing the event.
+
+        :param event the event to queue
+        """
+        entry = [time.perf_counter(), event, None]
+        with self._lock:
+            depth = len(self._queue)
+            if event.event_type == common.InputType.JoystickAxis:
+                key = (event.device_guid, event.identifier)
+                if depth >= self._capacity:
+                    self.dropped += 1
+                    self._supersede_axis_sample(key, entry)
+                    return
+                self._axis_entries[key] = entry
+            self._queue.append(entry)
+            if depth >= self.max_queue_depth:
+                self.max_queue_depth = depth + 1
+        self._wakeup.set()
+
+    def call(self, fn):
+        """Runs a function on the dispatch thread.
+
+        The function runs once all events queued before it have been
+        processed.
+
+        :param fn the function to run
+        """
+        with self._lock:
+            self._queue.append([time.perf_counter(), None, fn])
+        self._wakeup.set()
+
+    def _supersede_axis_sample(self, key, entry):
+        """Queues an axis sample in place of an older one, lock has to be held.
+
+        :param key the device GUID and axis index of the sample
+        :param entry the queue entry holding the new axis sample
+        """
+        # Update the queued sample of the same axis in place
+        queued = self._axis_entries.get(key, None)
+        if queued is not None:
+            queued[0] = entry[0]
+            queued[1] = entry[1]
+            return
+
+        # Otherwise drop the oldest queued axis sample
+        for i, queued in enumerate(self._queue):
+            if queued[1] is not None and \
+                    queued[1].event_type == common.InputType.JoystickAxis:
+                del self._queue[i]
+                self._forget_axis_entry(queued)
+                break
+        self._axis_entries[key] = entry
+        self._queue.append(entry)
+        self._wakeup.set()
+
+    def _forget_axis_entry(self, entry):
+        """Removes an axis sample entry leaving the queue, lock has to be held.
+
+        :param entry the queue entry leaving the queue
+        """
+        key = (entry[1].device_guid, entry[1].identifier)
+        if self._axis_entries.get(key, None) is entry:
+            del self._axis_entries[key]
+
+    def reset_statistics(self):
+        """Resets the queue statistics."""
+        self.dispatched = 0
+        self.dropped = 0
+        self.max_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @property
+    def queue_depth(self):
+        """Returns the number of events waiting to be processed.
+
+        :return number of queued events
+        """
+        return len(self._queue)
+
+    @property
+    def mean_wait_time(self):
+        """Returns the mean time events spent in the queue.
+
+        :return mean queue wait time in seconds
+        """
+        if self.dispatched == 0:
+            return 0.0
+        return self.total_wait_time / self.dispatched
+
+    def _dispatch_loop(self):
+        """Processes queued events until the dispatcher is stopped."""
+        queue = self._queue
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._running and len(queue) > 0:
+                with self._lock:
+                    entry = queue.popleft()
+                    timestamp, event, fn = entry
+                    if event is not None and \
+                            event.event_type == common.InputType.JoystickAxis:
+                        self._forget_axis_entry(entry)
+                if fn is not None:
+                    try:
+                        fn()
+                    except Exception as e:
+                        logging.getLogger("system").exception(
+                            "Error while running queued function: {}".format(e)
+                        )
+                    continue
+
+                wait_time = time.perf_counter() - timestamp
+                self.total_wait_time += wait_time
+                if wait_time > self.max_wait_time:
+                    self.max_wait_time = wait_time
+                self.dispatched += 1
+
+                try:
+                    self._handler.process_event(event)
+                except Exception as e:
+                    logging.getLogger("system").exception(
+                        "Error while dispatching event: {}".format(e)
+                    )
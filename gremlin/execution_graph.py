@@ -17,11 +17,11 @@
 
 from abc import abstractmethod, ABCMeta
 from collections import namedtuple
-import copy
-import logging
-import time
+import functools
+import operator
 
-from gremlin import actions, base_classes, common, error
+from gremlin import actions, base_classes, common, error, event_handler, \
+    scheduler
 
 
 CallbackData = namedtuple("ContainerCallback", ["callback", "event"])
@@ -35,6 +35,15 @@ class ContainerCallback:
     and chained actions.
     """
 
+    # Event attribute holding the value for each input type
+    value_attribute = {
+        common.InputType.JoystickAxis: "value",
+        common.InputType.JoystickHat: "value",
+        common.InputType.JoystickButton: "is_pressed",
+        common.InputType.Keyboard: "is_pressed",
+        common.InputType.VirtualButton: "is_pressed"
+    }
+
     def __init__(self, container):
         """Creates a new instance based according to the given input item.
 
@@ -43,37 +52,32 @@ class ContainerCallback:
         """
         self.execution_graph = ContainerExecutionGraph(container)
 
+        # The type of input the callback is attached to does not change,
+        # thus the event attribute holding the value is determined once
+        self._value_of = None
+        input_type = getattr(container.parent, "input_type", None)
+        if input_type in ContainerCallback.value_attribute:
+            self._value_of = operator.attrgetter(
+                ContainerCallback.value_attribute[input_type]
+            )
+
     def __call__(self, event):
         """Executes the callback based on the event's content.
 
         Creates a Value object from the event and passes the two through the
         execution graph until every entry has run or it is aborted.
         """
-        if event.event_type in [
-            common.InputType.JoystickAxis,
-            common.InputType.JoystickHat
-        ]:
-            value = actions.Value(event.value)
-        elif event.event_type in [
-            common.InputType.JoystickButton,
-            common.InputType.Keyboard,
-            common.InputType.VirtualButton
-        ]:
-            value = actions.Value(event.is_pressed)
-        else:
-            raise error.GremlinError("Invalid event type")
-
-        # Containers representing a virtual button get their individual
-        # value instance, all others share one to propagate changes across
-        shared_value = copy.deepcopy(value)
-
-        if event == common.InputType.VirtualButton:
-            # TODO: remove this at a future stage
-            logging.getLogger("system").error(
-                "Virtual button code path being used"
-            )
-        else:
-            self.execution_graph.process_event(event, shared_value)
+        value_of = self._value_of
+        if value_of is None:
+            attribute = ContainerCallback.value_attribute.get(event.event_type)
+            if attribute is None:
+                raise error.GremlinError("Invalid event type")
+            value_of = operator.attrgetter(attribute)
+
+        self.execution_graph.process_event(
+            event,
+            actions.Value(value_of(event))
+        )
 
 
 class VirtualButtonCallback:
@@ -109,6 +113,10 @@ class VirtualButtonProcess:
         :param container the container using a virtual button configuration
         """
         self.virtual_button = None
+        # Pending release of a forced axis button activation and the
+        # number of forced activations, used to ignore outdated releases
+        self._forced_release = None
+        self._forced_activations = 0
 
         if isinstance(data, base_classes.VirtualAxisButton):
             self.virtual_button = actions.AxisButton(
@@ -130,6 +138,33 @@ class VirtualButtonProcess:
         """
         self.virtual_button.process_event(event)
 
+        # An axis button whose activation region was skipped over has been
+        # pressed, release it again shortly after without blocking the
+        # thread dispatching events. The release itself runs on that thread
+        if isinstance(self.virtual_button, actions.AxisButton) and \
+                self.virtual_button.forced_activation:
+            if self._forced_release is not None:
+                self._forced_release.cancel()
+            self._forced_activations += 1
+            self._forced_release = scheduler.Scheduler().schedule(
+                AbstractExecutionGraph.forced_activation_delay,
+                event_handler.call_in_event_thread,
+                functools.partial(
+                    self._release_forced_activation,
+                    self._forced_activations
+                )
+            )
+
+    def _release_forced_activation(self, activation):
+        """Releases the button pressed by a forced activation.
+
+        :param activation the number of the forced activation to release,
+            the release is skipped if another one happened since
+        """
+        if activation == self._forced_activations:
+            self._forced_release = None
+            self.virtual_button.release_forced_activation()
+
 
 class AbstractExecutionGraph(metaclass=ABCMeta):
 
@@ -144,6 +179,10 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
     graph terminates.
     """
 
+    # Time in seconds after which the press of a virtual axis button that
+    # jumped over its activation region is released again
+    forced_activation_delay = 0.05
+
     def __init__(self, instance):
         """Creates a new execution graph based on the provided data.
 
@@ -151,7 +190,6 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         """
         self.functors = []
         self.transitions = {}
-        self.current_index = 0
 
         self._build_graph(instance)
 
@@ -161,28 +199,13 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         :param event the raw event that caused the execution of this graph
         :param value the possibly modified value extracted from the event
         """
-        # Processing an event twice is needed when a virtual axis button has
-        # "jumped" over it's activation region without triggering it. Once
-        # this is detected the "press" event is sent and the second run ensures
-        # a "release" event is sent.
-        process_again = False
-
-        while self.current_index is not None and len(self.functors) > 0:
-            functor = self.functors[self.current_index]
+        # The position in the graph is kept local as the graph may be
+        # processed by several threads at the same time
+        index = 0
+        while index is not None and len(self.functors) > 0:
+            functor = self.functors[index]
             result = functor.process_event(event, value)
-
-            if isinstance(functor, actions.AxisButton):
-                process_again = functor.forced_activation
-
-            self.current_index = self.transitions.get(
-                (self.current_index, result),
-                None
-            )
-        self.current_index = 0
-
-        if process_again:
-            time.sleep(0.05)
-            self.process_event(event, value)
+            index = self.transitions.get((index, result), None)
 
     @abstractmethod
     def _build_graph(self, instance):
@@ -390,4 +413,64 @@ class ActionSetExecutionGraph(AbstractExecutionGraph):
             self.functors.append(action.functor(action))
             sequence.append("Action")
 
+        # Replace pure axis transformation chains with a single functor
+        fused_functor = self._fuse_axis_chain(action_set)
+        if fused_functor is not None:
+            self.functors = [fused_functor]
+            sequence = ["Action"]
+
         self._create_transitions(sequence)
+
+    def _fuse_axis_chain(self, action_set):
+        """Returns a single functor replacing a pure axis transform chain.
+
+        A chain can be fused if it is executed unconditionally, consists of
+        functors transforming the axis value only, and ends in writing to a
+        vJoy axis.
+
+        :param action_set the set of actions the functors were created from
+        :return FusedAxisFunctor replacing the current functors, None if
+            the functors cannot be fused
+        """
+        input_item = action_set[0].parent.parent
+        if getattr(input_item, "input_type", None) != \
+                common.InputType.JoystickAxis:
+            return None
+        try:
+            device_guid = input_item.parent.parent.device_guid
+        except AttributeError:
+            return None
+
+        action_functors = []
+        for functor in self.functors:
+            if isinstance(functor, actions.ActivationCondition):
+                if not functor.is_unconditional:
+                    return None
+            else:
+                action_functors.append(functor)
+
+        if len(action_functors) == 0:
+            return None
+        output = action_functors[-1].axis_output()
+        if output is None:
+            return None
+        transforms = [f.axis_transform() for f in action_functors[:-1]]
+        if None in transforms:
+            return None
+        transform_key = tuple(
+            f.axis_transform_key() for f in action_functors[:-1]
+        )
+        if None in transform_key:
+            transform_key = None
+
+        # Imported here as the functor derives from a class defined in
+        # base_classes, which imports this module
+        from gremlin import fused_axis
+        return fused_axis.FusedAxisFunctor(
+            transforms,
+            output[0],
+            output[1],
+            device_guid,
+            input_item.input_id,
+            transform_key
+        )
@@ -0,0 +1,178 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import array
+import weakref
+
+from gremlin import base_classes, event_handler, joystick_handling
+
+
+class FusedAxisTables:
+
+    """Results of a fused axis chain for every possible raw input value.
+
+    The calibration table and vJoy axis the results are based on are kept
+    alive by the instance, which keeps their ids valid for use in keys.
+    """
+
+    def __init__(self, calibration_table, axis):
+        """Creates a new instance.
+
+        :param calibration_table the calibration table the results are
+            based on
+        :param axis the vJoy axis the results are based on
+        """
+        size = event_handler.DeviceCalibration.table_size
+        self.calibration_table = calibration_table
+        self.axis = axis
+        self.curve_version = axis.curve_version
+
+        # Value after the chain, value after the vJoy axis' curve, and
+        # the resulting integer axis position
+        self.current = array.array("d", [0.0]) * size
+        self.final = array.array("d", [0.0]) * size
+        self.position = array.array("l", [-1]) * size
+
+
+class FusedAxisFunctor(base_classes.AbstractFunctor):
+
+    """Executes a chain of axis transformations ending in a vJoy axis.
+
+    The result of the entire chain, including the vJoy axis' own deadzone
+    and response curve, is stored in tables indexed by the raw input value
+    once it has been computed. Events whose value does not correspond to
+    the calibrated raw value, such as modified or synthesized events, are
+    evaluated exactly instead.
+
+    Functors performing identical transformations of the same input, such
+    as the ones created for different modes, share their tables.
+    """
+
+    # Tables in use, keyed by the calibration table, transformations, and
+    # vJoy axis they are based on
+    shared_tables = weakref.WeakValueDictionary()
+
+    def __init__(
+            self,
+            transforms,
+            vjoy_id,
+            axis_id,
+            device_guid,
+            input_id,
+            transform_key=None
+    ):
+        """Creates a new instance.
+
+        :param transforms the functions transforming axis values in the
+            order in which they are applied
+        :param vjoy_id the id of the vJoy device written to
+        :param axis_id the id of the vJoy axis written to
+        :param device_guid the GUID of the device providing the input
+        :param input_id the id of the axis providing the input
+        :param transform_key key identifying the transformations, None if
+            the tables cannot be shared
+        """
+        super().__init__(None)
+        self._transforms = transforms
+        self._vjoy_id = vjoy_id
+        self._axis_id = axis_id
+        self._device_guid = device_guid
+        self._input_id = input_id
+        self._transform_key = transform_key
+
+        # Calibration record and vJoy axis, resolved on first use
+        self._calibration = None
+        self._axis = None
+
+        self._tables = None
+
+    def process_event(self, event, value):
+        axis = self._axis
+        if axis is None:
+            axis = joystick_handling.VJoyProxy()[self._vjoy_id].axis(
+                self._axis_id
+            )
+            self._axis = axis
+        calibration = self._calibration
+        if calibration is None:
+            calibration = event_handler.EventListener().device_calibration(
+                self._device_guid
+            )
+            self._calibration = calibration
+        raw = event.raw_value
+
+        # Only use the tables if the value stems from the calibrated raw value
+        table = calibration.table(self._input_id)
+        index = -1
+        if raw is not None and table is not None:
+            index = raw + event_handler.DeviceCalibration.raw_offset
+            if not (0 <= index < event_handler.DeviceCalibration.table_size) \
+                    or table[index] != value.current:
+                index = -1
+
+        if index < 0:
+            current = value.current
+            for fn in self._transforms:
+                current = fn(current)
+            value.current = current
+            axis.value = current
+            return True
+
+        tables = self._tables
+        if tables is None or table is not tables.calibration_table \
+                or axis.curve_version != tables.curve_version:
+            tables = self._acquire_tables(table, axis)
+
+        position = tables.position[index]
+        if position < 0:
+            current = value.current
+            for fn in self._transforms:
+                current = fn(current)
+            final = axis.transform(current)
+            position = axis.position(final)
+            tables.current[index] = current
+            tables.final[index] = final
+            tables.position[index] = position
+
+        value.current = tables.current[index]
+        axis.write_position(position, tables.final[index])
+        return True
+
+    def _acquire_tables(self, table, axis):
+        """Returns the tables matching the current calibration and curve.
+
+        :param table the calibration table the results are based on
+        :param axis the vJoy axis the results are based on
+        :return FusedAxisTables instance to use
+        """
+        key = None
+        tables = None
+        if self._transform_key is not None:
+            key = (
+                id(table),
+                self._transform_key,
+                id(axis),
+                axis.curve_version
+            )
+            tables = FusedAxisFunctor.shared_tables.get(key, None)
+        if tables is None:
+            tables = FusedAxisTables(table, axis)
+            if key is not None:
+                FusedAxisFunctor.shared_tables[key] = tables
+        self._tables = tables
+        return tables
@@ -15,9 +15,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import concurrent.futures
+import enum
 import functools
 import heapq
 import inspect
+import itertools
 import logging
 import time
 import threading
@@ -74,48 +77,212 @@ class CallbackRegistry:
         self._registry = {}
 
 
+class PeriodicPolicy(enum.Enum):
+
+    """Determines when a periodic function runs next."""
+
+    # Runs at fixed points in time, runs that were missed are performed
+    # immediately one after the other
+    CatchUp = 1
+    # Runs at fixed points in time, runs that were missed are dropped
+    Skip = 2
+    # Runs once the interval has passed since the previous run completed
+    FixedDelay = 3
+
+
+class PeriodicCallback:
+
+    """A function registered for periodic execution and its statistics."""
+
+    def __init__(self, callback, interval, policy, offload):
+        """Creates a new instance.
+
+        :param callback the function to execute
+        :param interval the time in seconds between executions
+        :param policy PeriodicPolicy determining when to run next
+        :param offload if True the function is executed by a worker thread
+        """
+        self.callback = callback
+        self.interval = interval
+        self.policy = policy
+        self.offload = offload
+        self.removed = False
+        self.due = 0.0
+        self.reset_statistics()
+
+        # Function with plugins installed, available while the registry
+        # is running
+        self._function = None
+        self._in_progress = False
+
+    def reset_statistics(self):
+        """Resets the recorded execution statistics."""
+        self.runs = 0
+        # Number of deadlines that passed without the function running
+        self.missed = 0
+        self.total_runtime = 0.0
+        self.max_runtime = 0.0
+
+    @property
+    def mean_runtime(self):
+        """Returns the average time the function took to execute.
+
+        :return mean runtime in seconds
+        """
+        if self.runs == 0:
+            return 0.0
+        return self.total_runtime / self.runs
+
+    def run(self):
+        """Executes the function and records its runtime."""
+        start = time.perf_counter()
+        try:
+            self._function()
+        except Exception as e:
+            logging.getLogger("system").exception(
+                "Periodic function {} failed: {}".format(
+                    self.callback.__name__,
+                    e
+                )
+            )
+        finally:
+            runtime = time.perf_counter() - start
+            self.runs += 1
+            self.total_runtime += runtime
+            self.max_runtime = max(self.max_runtime, runtime)
+            self._in_progress = False
+
+
 class PeriodicRegistry:
 
-    """Registry for periodically executed functions."""
+    """Registry for periodically executed functions.
 
-    def __init__(self):
-        """Creates a new instance."""
+    Functions are scheduled using a monotonic clock and can be added and
+    removed while the registry is running. Slow functions can be executed
+    by a pool of worker threads in order to not delay other functions.
+    """
+
+    # Maximum number of missed runs that are performed late by functions
+    # using the catch up policy
+    max_catch_up = 10
+
+    def __init__(self, worker_count=4):
+        """Creates a new instance.
+
+        :param worker_count number of threads executing offloaded functions
+        """
         self._registry = {}
         self._running = False
-        self._thread = threading.Thread(target=self._thread_loop)
+        self._thread = None
         self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
         self._plugins = []
+        self._worker_count = worker_count
+        self._workers = None
 
     def start(self):
         """Starts the event loop."""
-        # Only proceed if we have functions to call
-        if len(self._registry) == 0:
-            return
-
-        # Only create a new thread and start it if the thread is not
-        # currently running
-        self._running = True
-        if not self._thread.is_alive():
-            self._thread = threading.Thread(target=self._thread_loop)
-            self._thread.start()
+        with self._condition:
+            self._plugins = [
+                JoystickPlugin(),
+                VJoyPlugin(),
+                KeyboardPlugin()
+            ]
+            self._running = True
+            now = time.monotonic()
+            for entry in self._registry.values():
+                self._schedule(entry, now)
+            self._ensure_thread()
 
     def stop(self):
         """Stops the event loop."""
-        self._running = False
-        if self._thread.is_alive():
-            self._thread.join()
-
-    def add(self, callback, interval):
+        with self._condition:
+            self._running = False
+            self._queue = []
+            thread = self._thread
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+            self._thread = None
+        if self._workers is not None:
+            self._workers.shutdown(wait=True)
+            self._workers = None
+
+    def add(self, callback, interval, policy=PeriodicPolicy.Skip,
+            offload=False):
         """Adds a function to execute periodically.
 
+        Functions added while the registry is running are executed right
+        away without requiring a restart.
+
         :param callback the function to execute
         :param interval the time between executions
+        :param policy PeriodicPolicy determining when to run next
+        :param offload if True the function is executed by a worker thread
+        :return PeriodicCallback instance representing the function
+        """
+        entry = PeriodicCallback(callback, interval, policy, offload)
+        with self._condition:
+            if callback in self._registry:
+                self._registry[callback].removed = True
+            self._registry[callback] = entry
+            if self._running:
+                self._schedule(entry, time.monotonic())
+                self._ensure_thread()
+                self._condition.notify()
+        return entry
+
+    def remove(self, callback):
+        """Removes a function from the periodic execution.
+
+        :param callback the function to remove
         """
-        self._registry[callback] = (interval, callback)
+        with self._condition:
+            entry = self._registry.pop(callback, None)
+            if entry is not None:
+                entry.removed = True
 
     def clear(self):
         """Clears the registry."""
-        self._registry = {}
+        with self._condition:
+            for entry in self._registry.values():
+                entry.removed = True
+            self._registry = {}
+
+    @property
+    def callbacks(self):
+        """Returns all registered functions.
+
+        :return list of PeriodicCallback instances
+        """
+        return list(self._registry.values())
+
+    def _schedule(self, entry, now):
+        """Prepares a function for execution and queues its first run.
+
+        Has to be called with the condition lock held.
+
+        :param entry the PeriodicCallback to schedule
+        :param now the current time
+        """
+        entry._function = self._install_plugins(entry.callback)
+        entry.due = now + entry.interval
+        heapq.heappush(self._queue, (entry.due, next(self._sequence), entry))
+        if entry.offload and self._workers is None:
+            self._workers = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._worker_count
+            )
+
+    def _ensure_thread(self):
+        """Starts the scheduling thread if functions need to run.
+
+        Has to be called with the condition lock held.
+        """
+        if self._thread is None and len(self._queue) > 0:
+            self._thread = threading.Thread(target=self._thread_loop)
+            self._thread.daemon = True
+            self._thread.start()
 
     def _install_plugins(self, callback):
         """Installs the current plugins into the given callback.
@@ -135,39 +302,74 @@ class PeriodicRegistry:
 
     def _thread_loop(self):
         """Main execution loop run in a separate thread."""
-        # Setup plugins to use
-        self._plugins = [
-            JoystickPlugin(),
-            VJoyPlugin(),
-            KeyboardPlugin()
-        ]
-        callback_map = {}
-
-        # Populate the queue
-        self._queue = []
-        for item in self._registry.values():
-            plugin_cb = self._install_plugins(item[1])
-            callback_map[plugin_cb] = item[0]
-            heapq.heappush(
-                self._queue,
-                (time.time() + callback_map[plugin_cb], plugin_cb)
-            )
-
-        # Main thread loop
-        while self._running:
-            # Process all events that require running
-            while self._queue[0][0] < time.time():
-                item = heapq.heappop(self._queue)
-                item[1]()
-
-                heapq.heappush(
-                    self._queue,
-                    (time.time() + callback_map[item[1]], item[1])
-                )
+        while True:
+            with self._condition:
+                while self._running and (len(self._queue) == 0 or
+                                         self._queue[0][0] > time.monotonic()):
+                    timeout = None if len(self._queue) == 0 \
+                        else self._queue[0][0] - time.monotonic()
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                entry = heapq.heappop(self._queue)[2]
+                if entry.removed:
+                    continue
+
+            if entry.offload:
+                # Don't pile up runs of a function that is still executing,
+                # which misses the current deadline
+                if entry._in_progress:
+                    entry.missed += 1
+                else:
+                    entry._in_progress = True
+                    future = self._workers.submit(entry.run)
+                    # A fixed delay starts once the run completes, hence the
+                    # next run is only scheduled by the worker
+                    if entry.policy == PeriodicPolicy.FixedDelay:
+                        future.add_done_callback(
+                            functools.partial(self._reschedule, entry)
+                        )
+                        continue
+            else:
+                entry.run()
 
-            # Sleep until either the next function needs to be run or
-            # our timeout expires
-            time.sleep(min(self._queue[0][0] - time.time(), 1.0))
+            # Determine when the function runs next, deadlines that are
+            # skipped in the process count as missed
+            if entry.policy == PeriodicPolicy.FixedDelay:
+                entry.due = time.monotonic() + entry.interval
+            else:
+                entry.due += entry.interval
+                # Catching up is limited to a few runs in order to not
+                # starve all other functions
+                backlog = 0 if entry.policy == PeriodicPolicy.Skip \
+                    else PeriodicRegistry.max_catch_up
+                now = time.monotonic()
+                if entry.due + backlog * entry.interval <= now:
+                    skipped = int(
+                        (now - entry.due) / entry.interval
+                    ) + 1 - backlog
+                    entry.missed += skipped
+                    entry.due += skipped * entry.interval
+
+            with self._condition:
+                if not entry.removed:
+                    heapq.heappush(
+                        self._queue,
+                        (entry.due, next(self._sequence), entry)
+                    )
+
+    def _reschedule(self, entry, future):
+        """Queues the next run of an offloaded fixed delay function.
+
+        :param entry the PeriodicCallback whose run completed
+        :param future the future of the completed run
+        """
+        with self._condition:
+            if not self._running or entry.removed:
+                return
+            entry.due = time.monotonic() + entry.interval
+            heapq.heappush(self._queue, (entry.due, next(self._sequence), entry))
+            self._condition.notify()
 
 
 # Global registry of all registered callbacks
@@ -193,6 +395,9 @@ class JoystickWrapper:
             """
             self._joystick_guid = joystick_guid
             self._index = index
+            self._state = event_handler.EventListener().input_state.device(
+                joystick_guid
+            )
 
     class Axis(Input):
 
@@ -203,6 +408,17 @@ class JoystickWrapper:
 
         @property
         def value(self):
+            if self._index <= event_handler.DeviceState.max_axis and \
+                    self._state.axis_known[self._index]:
+                return self._state.axes[self._index] / float(32768)
+            return self.live_value
+
+        @property
+        def live_value(self):
+            """Returns the value of the axis as reported by DILL.
+
+            :return current value of the axis queried from the device
+            """
             return DILL.get_axis(self._joystick_guid, self._index) / float(32768)
 
     class Button(Input):
@@ -214,8 +430,18 @@ class JoystickWrapper:
 
         @property
         def is_pressed(self):
-            val = DILL.get_button(self._joystick_guid, self._index)
-            return val #DILL.get_button(self._joystick_guid, self._index)
+            if self._index <= event_handler.DeviceState.max_button and \
+                    self._state.button_known[self._index]:
+                return self._state.buttons[self._index] == 1
+            return self.live_is_pressed
+
+        @property
+        def live_is_pressed(self):
+            """Returns the state of the button as reported by DILL.
+
+            :return current state of the button queried from the device
+            """
+            return DILL.get_button(self._joystick_guid, self._index)
 
     class Hat(Input):
 
@@ -226,6 +452,17 @@ class JoystickWrapper:
 
         @property
         def direction(self):
+            if self._index <= event_handler.DeviceState.max_hat and \
+                    self._state.hat_known[self._index]:
+                return util.dill_hat_lookup[self._state.hats[self._index]]
+            return self.live_direction
+
+        @property
+        def live_direction(self):
+            """Returns the direction of the hat as reported by DILL.
+
+            :return current direction of the hat queried from the device
+            """
             return util.dill_hat_lookup[
                 DILL.get_hat(self._joystick_guid, self._index)
             ]
@@ -448,24 +685,15 @@ class JoystickPlugin:
 @common.SingletonDecorator
 class Keyboard(QtCore.QObject):
 
-    """Provides access to the keyboard state."""
+    """Provides access to the keyboard state.
+
+    The state is maintained by the EventListener's input state store.
+    """
 
     def __init__(self):
         """Initialises a new object."""
         QtCore.QObject.__init__(self)
-        self._keyboard_state = {}
-
-    @QtCore.pyqtSlot(event_handler.Event)
-    def keyboard_event(self, event):
-        """Handles keyboard events and updates state.
-
-        :param event the keyboard event to use to update state
-        """
-        key = macro.key_from_code(
-            event.identifier[0],
-            event.identifier[1]
-        )
-        self._keyboard_state[key] = event.is_pressed
+        self._state = event_handler.EventListener().input_state
 
     def is_pressed(self, key):
         """Returns whether or not the key is pressed.
@@ -475,9 +703,7 @@ class Keyboard(QtCore.QObject):
         """
         if isinstance(key, str):
             key = macro.key_from_name(key)
-        elif isinstance(key, macro.Key):
-            pass
-        return self._keyboard_state.get(key, False)
+        return self._state.is_key_pressed(key.scan_code, key.is_extended)
 
 
 class KeyboardPlugin:
@@ -814,10 +1040,12 @@ def keyboard(key_name, mode, always_execute=False):
     return wrap
 
 
-def periodic(interval):
+def periodic(interval, policy=PeriodicPolicy.Skip, offload=False):
     """Decorator for periodic function callbacks.
 
     :param interval the duration between executions of the function
+    :param policy PeriodicPolicy determining when the function runs next
+    :param offload if True the function is executed by a worker thread
     """
 
     def wrap(callback):
@@ -826,7 +1054,7 @@ def periodic(interval):
         def wrapper_fn(*args, **kwargs):
             callback(*args, **kwargs)
 
-        periodic_registry.add(wrapper_fn, interval)
+        periodic_registry.add(wrapper_fn, interval, policy, offload)
 
         return wrapper_fn
 
@@ -21,7 +21,7 @@ import threading
 
 import dill
 
-from . import common, error
+from . import common, error, util
 from vjoy import vjoy
 
 
@@ -38,6 +38,12 @@ class VJoyProxy:
 
     vjoy_devices = {}
 
+    # Output frame settings applied to all devices
+    output_frames = False
+    frame_rate = 0
+    _flush_thread = None
+    _flush_running = False
+
     def __getitem__(self, key):
         """Returns the requested vJoy instance.
 
@@ -54,6 +60,8 @@ class VJoyProxy:
 
             try:
                 device = vjoy.VJoy(key)
+                if VJoyProxy.output_frames:
+                    device.enable_output_frame(VJoyProxy.frame_rate > 0)
                 VJoyProxy.vjoy_devices[key] = device
                 return device
             except error.VJoyError as e:
@@ -68,10 +76,89 @@ class VJoyProxy:
     @classmethod
     def reset(cls):
         """Relinquishes control over all held VJoy devices."""
+        cls.set_output_frames(False)
         for device in VJoyProxy.vjoy_devices.values():
+            logging.getLogger("system").info(
+                "vJoy id={} skipped {:d} unchanged writes".format(
+                    device.vjoy_id,
+                    device.suppressed_writes
+                )
+            )
+            if device.reacquisitions > 0:
+                logging.getLogger("system").info(
+                    "vJoy id={} was re-acquired {:d} times".format(
+                        device.vjoy_id,
+                        device.reacquisitions
+                    )
+                )
             device.invalidate()
         VJoyProxy.vjoy_devices = {}
 
+    @classmethod
+    def set_output_frames(cls, enabled, rate=0):
+        """Configures how changes are sent to the vJoy devices.
+
+        With output frames enabled all changes to a device are sent with a
+        single update, either at the end of each event dispatch cycle or,
+        if a rate is given, periodically at that rate. The periodic updates
+        sleep between frames with a 1 ms timer resolution, which limits the
+        rate to 1000 updates per second.
+
+        :param enabled whether or not to use output frames
+        :param rate number of updates per second, 0 to send the changes at
+            the end of each dispatch cycle
+        """
+        # Stop the flush thread before changing the frame setup
+        if cls._flush_thread is not None:
+            cls._flush_running = False
+            cls._flush_thread.join()
+            cls._flush_thread = None
+
+        cls.output_frames = bool(enabled)
+        cls.frame_rate = min(rate, 1000) if enabled else 0
+        for device in cls.vjoy_devices.values():
+            device.disable_output_frame()
+            if cls.output_frames:
+                device.enable_output_frame(cls.frame_rate > 0)
+
+        if cls.frame_rate > 0:
+            cls._flush_running = True
+            cls._flush_thread = threading.Thread(
+                target=cls._flush_loop,
+                args=(1.0 / cls.frame_rate,)
+            )
+            cls._flush_thread.daemon = True
+            cls._flush_thread.start()
+
+    @classmethod
+    def _flush_loop(cls, interval):
+        """Periodically sends the changes of all devices to vJoy.
+
+        The thread sleeps between updates instead of busy waiting, such
+        that the event and macro threads are not starved of the GIL.
+
+        :param interval time in seconds between two updates
+        """
+        util.run_paced(
+            interval,
+            lambda: cls._flush_running,
+            cls._flush_devices
+        )
+
+    @classmethod
+    def _flush_devices(cls):
+        """Sends the changes of all devices to vJoy."""
+        for device in list(cls.vjoy_devices.values()):
+            try:
+                device.flush_output_frame()
+            except error.VJoyError as e:
+                logging.getLogger("system").error(
+                    "Failed updating vJoy id={}, error is: {}".format(
+                        device.vjoy_id,
+                        e
+                    )
+                )
+
 
 def joystick_devices():
     """Returns the list of joystick like devices.
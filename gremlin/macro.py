@@ -18,14 +18,14 @@
 import collections
 import ctypes
 from ctypes import wintypes
-import functools
+import heapq
+import itertools
 import logging
 import time
-from threading import Event, Lock, Thread
+from threading import Condition, Thread
 from xml.etree import ElementTree
 
 import win32con
-import win32api
 
 import gremlin
 
@@ -36,12 +36,6 @@ import gremlin
 default_delay = 0.05
 
 
-MacroEntry = collections.namedtuple(
-    "MacroEntry",
-    ["macro", "state"]
-)
-
-
 def _create_function(lib_name, fn_name, param_types, return_type):
     """Creates a handle to a windows dll library function.
 
@@ -199,8 +193,11 @@ def _send_key_down(key):
 
     :param key the key for which to send the KEYDOWN event
     """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
+    gremlin.sendinput.key_press(
+        key.virtual_code,
+        key.scan_code,
+        key.is_extended
+    )
 
 
 def _send_key_up(key):
@@ -208,55 +205,251 @@ def _send_key_up(key):
 
     :param key the key for which to send the KEYUP event
     """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    flags |= win32con.KEYEVENTF_KEYUP
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
+    gremlin.sendinput.key_release(
+        key.virtual_code,
+        key.scan_code,
+        key.is_extended
+    )
+
+
+class MacroRun:
+
+    """State of a single execution of a macro."""
+
+    __slots__ = (
+        "macro", "steps", "duration", "index", "iteration", "start", "due",
+        "terminated"
+    )
+
+    def __init__(self, macro):
+        """Creates a new instance.
+
+        :param macro the macro to execute
+        """
+        compiled = macro.compile()
+        self.macro = macro
+        self.steps = compiled.steps
+        self.duration = compiled.duration
+        self.index = 0
+        self.iteration = 0
+        self.start = 0.0
+        self.due = 0.0
+        self.terminated = False
+
+    def advance(self, report=None):
+        """Executes all actions that are due.
+
+        Step offsets are relative to the start of the current repetition,
+        which itself starts once the previous repetition and the delay
+        between repetitions have passed.
+
+        :param report MacroTimingReport in which to record when actions were
+            executed, None to not record anything
+        :return time, as given by time.perf_counter, at which to advance
+            the macro again, None if the macro is finished
+        """
+        # Keyboard and mouse inputs of steps that are due at the same time
+        # are sent together
+        gremlin.sendinput.begin_batch()
+        try:
+            return self._advance(report)
+        finally:
+            gremlin.sendinput.end_batch()
+
+    def _advance(self, report):
+        """Executes all actions that are due.
+
+        :param report MacroTimingReport in which to record when actions were
+            executed, None to not record anything
+        :return time at which to advance the macro again, None if the macro
+            is finished
+        """
+        repeat = self.macro.repeat
+        steps = self.steps
+        while True:
+            if self.index < len(steps):
+                step = steps[self.index]
+                due = self.start + step.offset
+                if due > self.due:
+                    return due
+                self.index += 1
+                if not step.action.is_input:
+                    gremlin.sendinput.flush_batch()
+                if report is not None:
+                    report.add(step.action, due, time.perf_counter())
+                step.action()
+
+            # Wait for trailing pauses and the delay between repetitions
+            elif self.index == len(steps):
+                self.index += 1
+                end = self.start + self.duration
+                if repeat is not None:
+                    end += repeat.delay
+                if end > self.due:
+                    return end
+
+            # Start another repetition if required
+            else:
+                if repeat is None:
+                    return None
+                self.iteration += 1
+                if self.terminated or (isinstance(repeat, CountRepeat) and
+                                       self.iteration >= repeat.count):
+                    return None
+                self.start = self.due
+                self.index = 0
+
+
+class MacroTimingReport:
+
+    """Records when the actions of a macro were scheduled and executed.
+
+    Besides the delay with which actions were executed, the time the
+    scheduler spent yielding before the actions were due is recorded, as
+    that time delays every other thread waiting for the GIL.
+    """
+
+    def __init__(self, macro, size=1000):
+        """Creates a new instance.
+
+        :param macro the macro whose actions are recorded
+        :param size maximum number of most recent actions to keep
+        """
+        self.macro = macro
+        self.entries = collections.deque(maxlen=size)
+        self.count = 0
+        self.total_error = 0.0
+        self.max_error = 0.0
+        self.wait_count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, action, scheduled, actual):
+        """Records the execution of an action.
+
+        :param action the action that was executed
+        :param scheduled time, as given by time.perf_counter, at which the
+            action was supposed to be executed
+        :param actual time at which the action was executed
+        """
+        error = actual - scheduled
+        self.entries.append((action, scheduled, actual))
+        self.count += 1
+        self.total_error += error
+        self.max_error = max(self.max_error, error)
+
+    def add_wait(self, duration):
+        """Records the time spent yielding before actions were due.
+
+        :param duration time in seconds spent yielding instead of sleeping
+        """
+        self.wait_count += 1
+        self.total_wait += duration
+        self.max_wait = max(self.max_wait, duration)
+
+    @property
+    def mean_error(self):
+        """Returns the average delay with which actions were executed.
+
+        :return mean delay in seconds
+        """
+        if self.count == 0:
+            return 0.0
+        return self.total_error / self.count
+
+    @property
+    def mean_wait(self):
+        """Returns the average time spent yielding before actions were due.
+
+        :return mean yielding time in seconds
+        """
+        if self.wait_count == 0:
+            return 0.0
+        return self.total_wait / self.wait_count
 
 
 @gremlin.common.SingletonDecorator
 class MacroManager:
 
-    """Manages the proper dispatching and scheduling of macros."""
+    """Manages the proper dispatching and scheduling of macros.
+
+    All macros are executed by a single thread which interleaves the steps
+    of all running macros based on when each one is due next. Queued runs
+    of a macro wait until the previous run of the same macro finished while
+    exclusive macros run on their own and block every macro queued after
+    them.
+    """
 
     def __init__(self):
         """Initializes the instance."""
+        # Runs of each macro waiting to be started, indexed by macro id
+        self._pending = {}
+        # Ids of macros in the order in which they can be started
+        self._ready = collections.deque()
+        # Currently executing runs, indexed by macro id
         self._active = {}
-        self._queue = []
-        self._flags = {}
-        self._flags_lock = Lock()
-        self._queue_lock = Lock()
+        # Heap of (due time, sequence number, run) entries
+        self._timeline = []
+        self._sequence = itertools.count()
+        self._condition = Condition()
 
         self._is_executing_exclusive = False
         self._is_running = False
-        self._schedule_event = Event()
+        self._thread = None
 
-        self._run_scheduler_thread = None
+        # Time in seconds before an action is due from which on the
+        # scheduler yields to other threads instead of sleeping
+        self.spin_budget = 0.0001
+        # Whether or not to record timing reports for executed macros
+        self.record_timing = False
+        self._reports = {}
 
     def start(self):
         """Starts the scheduler."""
-        self._active = {}
-        self._flags = {}
-        self._is_running = True
-        if self._run_scheduler_thread is None:
-            self._run_scheduler_thread = Thread(target=self._run_scheduler)
-        if not self._run_scheduler_thread.is_alive():
-            self._run_scheduler_thread.start()
+        with self._condition:
+            self._reports = {}
+            self._is_running = True
+            if self._thread is None:
+                self._thread = Thread(target=self._run_scheduler)
+                self._thread.daemon = True
+                self._thread.start()
 
     def stop(self):
-        """Stops the scheduler."""
-        self._is_running = False
-        if self._run_scheduler_thread is not None and \
-                self._run_scheduler_thread.is_alive():
+        """Stops the scheduler.
+
+        Macros which are still executing finish their current repetition,
+        queued macros are discarded.
+        """
+        with self._condition:
+            self._is_running = False
+            self._pending = {}
+            self._ready.clear()
+            for run in self._active.values():
+                run.terminated = True
+            self._condition.notify()
+
+        for report in self._reports.values():
+            logging.getLogger("system").info(
+                "Macro {:d} executed {:d} actions, mean delay {:.3f} ms, "
+                "max delay {:.3f} ms, mean wait {:.3f} ms, "
+                "max wait {:.3f} ms".format(
+                    report.macro.id,
+                    report.count,
+                    report.mean_error * 1000,
+                    report.max_error * 1000,
+                    report.mean_wait * 1000,
+                    report.max_wait * 1000
+                )
+            )
 
-            # Terminate the scheduler
-            self._schedule_event.set()
-            self._run_scheduler_thread.join()
-            self._run_scheduler_thread = None
+    def timing_report(self, macro):
+        """Returns the timing report of the given macro.
 
-            # Terminate any macro that is still active
-            with self._flags_lock:
-                for key, value in self._flags.items():
-                    self._flags[key] = False
+        :param macro the macro for which to return the report
+        :return MacroTimingReport instance, None if no actions of the macro
+            have been recorded
+        """
+        return self._reports.get(macro.id)
 
     def queue_macro(self, macro):
         """Queues a macro in the schedule taking the repeat type into account.
@@ -265,143 +458,168 @@ class MacroManager:
         """
         if isinstance(macro.repeat, ToggleRepeat) and macro.id in self._active:
             self.terminate_macro(macro)
-        else:
-            # Preprocess macro to contain pauses as necessary
-            self._preprocess_macro(macro)
-            with self._queue_lock:
-                self._queue.append(MacroEntry(macro, True))
-            self._schedule_event.set()
+            return
+
+        run = MacroRun(macro)
+        with self._condition:
+            pending = self._pending.setdefault(macro.id, collections.deque())
+            pending.append(run)
+            if len(pending) == 1 and macro.id not in self._active:
+                self._ready.append(macro.id)
+            self._condition.notify()
 
     def terminate_macro(self, macro):
-        """Adds a termination request for a macro to the execution queue.
+        """Terminates the repetition of a running or queued macro.
 
         :param macro the macro to terminate
         """
-        self._queue.append(MacroEntry(macro, False))
-        self._schedule_event.set()
+        with self._condition:
+            pending = self._pending.get(macro.id)
+            run = self._active.get(macro.id)
+            if run is not None and run.macro.repeat is not None:
+                # Terminate the running macro and discard all queued runs
+                # as they should have been impossible to queue in the first
+                # place
+                run.terminated = True
+                if pending:
+                    pending.clear()
+            elif pending:
+                # Only the first queued run executes once started
+                head = pending.popleft()
+                head.terminated = True
+                pending.clear()
+                pending.append(head)
+
+    def _start_ready_macros(self):
+        """Starts queued macros which are allowed to run.
+
+        Has to be called with the condition lock held.
+        """
+        while len(self._ready) > 0:
+            macro_id = self._ready[0]
+            pending = self._pending.get(macro_id)
+            # Skip stale entries of macros which were terminated or are
+            # already running
+            if not pending or macro_id in self._active:
+                self._ready.popleft()
+                continue
+
+            if self._is_executing_exclusive:
+                break
+            run = pending[0]
+            if run.macro.exclusive:
+                if len(self._active) > 0:
+                    break
+                self._is_executing_exclusive = True
+
+            self._ready.popleft()
+            pending.popleft()
+            if len(pending) == 0:
+                del self._pending[macro_id]
+            self._active[macro_id] = run
+            if self.record_timing and macro_id not in self._reports:
+                self._reports[macro_id] = MacroTimingReport(run.macro)
+            run.start = run.due = time.perf_counter()
+            heapq.heappush(self._timeline, (run.due, next(self._sequence), run))
+
+    def _finish_macro(self, run):
+        """Removes a finished macro from the set of running macros.
+
+        Has to be called with the condition lock held.
+
+        :param run the run which finished
+        """
+        macro_id = run.macro.id
+        del self._active[macro_id]
+        if run.macro.exclusive:
+            self._is_executing_exclusive = False
+        if self._pending.get(macro_id):
+            self._ready.append(macro_id)
 
     def _run_scheduler(self):
-        """Dispatches macros as required."""
-        while self._is_running:
-            # Wake up when the event triggers and reset it
-            self._schedule_event.wait()
-            self._schedule_event.clear()
-
-            # Run scheduled macros and ensure exclusive ones run separately
-            # from all other macros
-            with self._queue_lock:
-                entries_to_remove = []
-                has_exclusive = False
-                for i, entry in enumerate(self._queue):
-                    # Terminate macro if needed
-                    if entry.state is False:
-                        if entry.macro.id in self._flags \
-                                and self._flags[entry.macro.id]:
-                            # Terminate currently running macro
-                            with self._flags_lock:
-                                self._flags[entry.macro.id] = False
-                            # del self._queue[i]
-
-                            # Remove all queued up macros with the same id as
-                            # they should have been impossible to queue up
-                            # in the first place
-                            removal_list = []
-                            for queue_entry in self._queue:
-                                if queue_entry.macro.id == entry.macro.id:
-                                    removal_list.append(queue_entry)
-                            for queue_entry in removal_list:
-                                self._queue.remove(queue_entry)
-                    # Don't run a queued macro if the same instance is already
-                    # running
-                    elif entry.macro.id in self._active:
-                        continue
-                    # Handle exclusive macros
-                    elif entry.macro.exclusive:
-                        has_exclusive = True
-                        if len(self._active) == 0:
-                            self._dispatch_macro(entry.macro)
-                            self._is_executing_exclusive = True
-                            entries_to_remove.append(entry)
-                    # Start a queued up macro
-                    elif not has_exclusive and not self._is_executing_exclusive:
-                        self._dispatch_macro(entry.macro)
-                        entries_to_remove.append(entry)
-
-                # Remove all entries we've processed
-                for entry in entries_to_remove:
-                    if entry in self._queue:
-                        self._queue.remove(entry)
-
-    def _dispatch_macro(self, macro):
-        """Dispatches a single macro to be run.
-
-        :param macro the macro to dispatch
-        """
-        if macro.id not in self._active:
-            self._active[macro.id] = macro
-            Thread(target=functools.partial(self._execute_macro, macro)).start()
-        else:
-            logging.getLogger("system").warning(
-                "Attempting to dispatch an already running macro"
-            )
-
-    def _execute_macro(self, macro):
-        """Executes a given macro in a separate thread.
-
-        This method will run all provided actions and once they all have been
-        executed will remove the macro from the set of active macros and
-        inform the scheduler of the completion.
-
-        :param macro the macro object to be executed
-        """
-        # Handle macros with a repeat mode
-        if macro.repeat is not None:
-            delay = macro.repeat.delay
+        """Executes the steps of all running macros once they are due."""
+        # As the thread idles while no macro is running, the higher timer
+        # resolution is only requested while steps are scheduled
+        resolution = gremlin.util.TimerResolutionRequest()
+        try:
+            while True:
+                with self._condition:
+                    while True:
+                        if self._is_running:
+                            self._start_ready_macros()
+                        elif len(self._active) == 0:
+                            self._thread = None
+                            return
+
+                        if len(self._timeline) > 0:
+                            timeout = self._timeline[0][0] - \
+                                time.perf_counter() - self.spin_budget
+                            if timeout <= 0:
+                                break
+                        else:
+                            timeout = None
+                        resolution.set_active(timeout is not None)
+                        self._condition.wait(timeout)
+                    run = heapq.heappop(self._timeline)[2]
+                    report = self._reports.get(run.macro.id)
+
+                waited = gremlin.util.precise_wait(run.due, self.spin_budget)
+                if report is not None:
+                    report.add_wait(waited)
+                try:
+                    due = run.advance(report)
+                except Exception as e:
+                    logging.getLogger("system").exception(
+                        "Macro execution failed: {}".format(e)
+                    )
+                    due = None
+
+                with self._condition:
+                    if due is None:
+                        self._finish_macro(run)
+                    else:
+                        run.due = due
+                        heapq.heappush(
+                            self._timeline,
+                            (run.due, next(self._sequence), run)
+                        )
+        finally:
+            resolution.set_active(False)
+
+
+MacroStep = collections.namedtuple("MacroStep", ["offset", "action"])
+
+
+CompiledMacro = collections.namedtuple(
+    "CompiledMacro",
+    ["steps", "duration"]
+)
 
-            with self._flags_lock:
-                self._flags[macro.id] = True
 
-            # Handle count repeat mode
-            if isinstance(macro.repeat, CountRepeat):
-                count = 0
-                while count < macro.repeat.count and self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    count += 1
-                    time.sleep(delay)
+def compile_sequence(sequence):
+    """Compiles a sequence of macro actions into timed steps.
 
-            # Handle continuous repeat modes
-            elif type(macro.repeat) in [HoldRepeat, ToggleRepeat]:
-                while self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    time.sleep(delay)
+    Pauses are turned into the offsets at which the following actions run,
+    consecutive actions without a pause in between are separated by
+    the default delay.
 
-        # Handle simple one shot macros
+    :param sequence list of macro actions
+    :return CompiledMacro holding the steps, i.e. actions with their offset
+        in seconds from the start of the macro, and the macro's duration
+    """
+    steps = []
+    offset = 0.0
+    follows_action = False
+    for action in sequence:
+        if isinstance(action, PauseAction):
+            offset += action.duration
+            follows_action = False
         else:
-            for action in macro.sequence:
-                action()
-
-        # Remove macro from active set, notify manager, and remove any
-        # potential callbacks
-        del self._active[macro.id]
-        if macro.exclusive:
-            self._is_executing_exclusive = False
-        with self._flags_lock:
-            if macro.id in self._flags:
-                self._flags[macro.id] = False
-        self._schedule_event.set()
-
-    def _preprocess_macro(self, macro):
-        """Inserts pauses as necessary into the macro."""
-        new_sequence = [macro.sequence[0]]
-        for a1, a2 in zip(macro.sequence[:-1], macro.sequence[1:]):
-            if isinstance(a1, PauseAction) or isinstance(a2, PauseAction):
-                new_sequence.append(a2)
-            else:
-                new_sequence.append(PauseAction(default_delay))
-                new_sequence.append(a2)
-        macro._sequence = new_sequence
+            if follows_action:
+                offset += default_delay
+            steps.append(MacroStep(offset, action))
+            follows_action = True
+    return CompiledMacro(tuple(steps), offset)
 
 
 class Macro:
@@ -414,6 +632,7 @@ class Macro:
     def __init__(self):
         """Creates a new macro instance."""
         self._sequence = []
+        self._compiled = None
         self._id = Macro._next_macro_id
         Macro._next_macro_id += 1
         self.repeat = None
@@ -433,7 +652,19 @@ class Macro:
 
         :return action sequence
         """
-        return self._sequence
+        return tuple(self._sequence)
+
+    def compile(self):
+        """Returns the representation of the macro used for execution.
+
+        The macro is compiled the first time this is called after its
+        actions changed.
+
+        :return CompiledMacro instance
+        """
+        if self._compiled is None:
+            self._compiled = compile_sequence(self._sequence)
+        return self._compiled
 
     def add_action(self, action):
         """Adds an action to the list of actions to perform.
@@ -441,13 +672,14 @@ class Macro:
         :param action the action to add
         """
         self._sequence.append(action)
+        self._compiled = None
 
     def pause(self, duration):
         """Adds a pause of the given duration to the macro.
 
         :param duration the duration of the pause in seconds
         """
-        self._sequence.append(PauseAction(duration))
+        self.add_action(PauseAction(duration))
 
     def press(self, key):
         """Presses the specified key down.
@@ -485,13 +717,16 @@ class Macro:
         else:
             raise gremlin.error.KeyboardError("Invalid key specified")
 
-        self._sequence.append(KeyAction(key, is_pressed))
+        self.add_action(KeyAction(key, is_pressed))
 
 
 class AbstractAction:
 
     """Base class for all macro action."""
 
+    # Whether or not the action only generates keyboard or mouse inputs
+    is_input = False
+
     def __call__(self):
         raise gremlin.error.MissingImplementationError(
             "AbstractAction.__call__ not implemented in derived class."
@@ -539,6 +774,8 @@ class KeyAction(AbstractAction):
 
     """Key to press or release by a macro."""
 
+    is_input = True
+
     def __init__(self, key, is_pressed):
         """Creates a new KeyAction object for use in a macro.
 
@@ -561,6 +798,8 @@ class MouseButtonAction(AbstractAction):
 
     """Mouse button action."""
 
+    is_input = True
+
     def __init__(self, button, is_pressed):
         """Creates a new MouseButtonAction object for use in a macro.
 
@@ -589,6 +828,8 @@ class MouseMotionAction(AbstractAction):
 
     """Mouse motion action."""
 
+    is_input = True
+
     def __init__(self, dx, dy):
         """Creates a new MouseMotionAction object for use in a macro.
 
@@ -614,7 +855,10 @@ class PauseAction(AbstractAction):
         self.duration = duration
 
     def __call__(self):
-        time.sleep(self.duration)
+        gremlin.util.precise_wait(
+            time.perf_counter() + self.duration,
+            MacroManager().spin_budget
+        )
 
 
 class VJoyAction(AbstractAction):
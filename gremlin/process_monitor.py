@@ -15,91 +15,421 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+
+import collections
 import ctypes
 import ctypes.wintypes
+import logging
 import os
-import time
 import threading
+import time
 
 from PyQt5 import QtCore
 
-import win32gui
-import win32process
+from . import error, scheduler
+
+
+# Definition of the flags for limited information queries
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+# Definitions used to be notified about foreground window changes
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+PM_NOREMOVE = 0x0000
+
+
+def foreground_process_id():
+    """Returns the id of the process owning the foreground window.
+
+    :return id of the foreground window's process
+    """
+    return window_process_id(ctypes.windll.user32.GetForegroundWindow())
+
+
+def window_process_id(hwnd):
+    """Returns the id of the process owning the given window.
+
+    :param hwnd handle of the window
+    :return id of the window's process
+    """
+    pid = ctypes.wintypes.DWORD()
+    ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    return pid.value
+
+
+def query_process_path(pid):
+    """Returns the path to the executable of the given process.
+
+    :param pid id of the process
+    :return path to the process' executable, None if it cannot be queried
+    """
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(
+        PROCESS_QUERY_LIMITED_INFORMATION,
+        False,
+        pid
+    )
+    if not handle:
+        return None
+
+    buffer = ctypes.create_unicode_buffer(1024)
+    buffer_size = ctypes.wintypes.DWORD(1024)
+    success = kernel32.QueryFullProcessImageNameW(
+        handle,
+        0,
+        buffer,
+        ctypes.byref(buffer_size)
+    )
+    kernel32.CloseHandle(handle)
+    if not success:
+        return None
+    return os.path.normpath(buffer.value).replace("\\", "/")
+
+
+class ForegroundProcessProvider:
+
+    """Base class of all providers reporting the foreground process.
+
+    A provider reports the id of the process owning the foreground window
+    whenever it may have changed, reporting the same process repeatedly
+    is allowed.
+    """
+
+    def start(self, callback):
+        """Starts reporting the foreground process.
+
+        :param callback function called with the id of the foreground
+            process whenever it may have changed
+        """
+        raise error.MissingImplementationError(
+            "ForegroundProcessProvider.start not implemented in subclass"
+        )
+
+    def stop(self):
+        """Stops reporting the foreground process."""
+        raise error.MissingImplementationError(
+            "ForegroundProcessProvider.stop not implemented in subclass"
+        )
+
+    def process_path(self, pid):
+        """Returns the path to the executable of the given process.
+
+        :param pid id of the process
+        :return path to the process' executable, None if it is unknown
+        """
+        return query_process_path(pid)
+
+
+class PollingProvider(ForegroundProcessProvider):
+
+    """Reports the foreground process by checking it periodically."""
+
+    def __init__(self, interval=1.0):
+        """Creates a new instance.
+
+        :param interval time in seconds between checks
+        """
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, callback):
+        """Starts reporting the foreground process.
+
+        :param callback function called with the id of the foreground
+            process whenever it may have changed
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, args=(callback,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops reporting the foreground process."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self, callback):
+        """Reports the foreground process until stopped.
+
+        :param callback function to call with the foreground process' id
+        """
+        while not self._stop_event.is_set():
+            callback(foreground_process_id())
+            self._stop_event.wait(self.interval)
+
+
+class EventHookProvider(ForegroundProcessProvider):
+
+    """Reports the foreground process as soon as the foreground window
+    changes, using a Windows event hook."""
+
+    # Time in seconds to wait for the hook thread when stopping
+    stop_timeout = 1.0
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._thread = None
+        self._ready = None
+
+    def start(self, callback):
+        """Starts reporting the foreground process.
+
+        :param callback function called with the id of the foreground
+            process whenever it may have changed
+        """
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._listen,
+            args=(callback, self._ready)
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops reporting the foreground process."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._thread = None
+
+        # Posting the message fails until the thread has a message queue
+        self._ready.wait(EventHookProvider.stop_timeout)
+        posted = ctypes.windll.user32.PostThreadMessageW(
+            thread.ident,
+            WM_QUIT,
+            0,
+            0
+        )
+        if not posted and thread.is_alive():
+            logging.getLogger("system").warning(
+                "Unable to stop the foreground window event hook thread"
+            )
+        thread.join(EventHookProvider.stop_timeout)
+        if thread.is_alive():
+            logging.getLogger("system").warning(
+                "Foreground window event hook thread did not terminate"
+            )
+
+    def _listen(self, callback, ready):
+        """Installs the event hook and processes its messages.
+
+        :param callback function to call with the foreground process' id
+        :param ready event set once messages can be posted to the thread
+        """
+        user32 = ctypes.windll.user32
+        msg = ctypes.wintypes.MSG()
+        try:
+            # Peeking creates the message queue of the thread
+            user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_NOREMOVE)
+            hook, hook_fn = self._install_hook(callback)
+        finally:
+            ready.set()
+        if not hook:
+            logging.getLogger("system").error(
+                "Unable to install the foreground window event hook"
+            )
+            return
+
+        # Report the process which is in the foreground right now
+        callback(foreground_process_id())
+
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def _install_hook(self, callback):
+        """Installs the event hook reporting foreground window changes.
+
+        :param callback function to call with the foreground process' id
+        :return handle of the hook and the function object it calls, which
+            has to be kept alive while the hook exists
+        """
+        user32 = ctypes.windll.user32
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None,
+            ctypes.wintypes.HANDLE,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.HWND,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = ctypes.wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = (
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.HMODULE,
+            win_event_proc,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD
+        )
+
+        hook_fn = win_event_proc(
+            lambda hook, event, hwnd, obj, child, thread, ms:
+                callback(window_process_id(hwnd))
+        )
+        hook = user32.SetWinEventHook(
+            EVENT_SYSTEM_FOREGROUND,
+            EVENT_SYSTEM_FOREGROUND,
+            None,
+            hook_fn,
+            0,
+            0,
+            WINEVENT_OUTOFCONTEXT
+        )
+        return hook, hook_fn
+
+
+class ScriptedProvider(ForegroundProcessProvider):
+
+    """Reports a scripted sequence of foreground processes.
+
+    This allows exercising the process monitor without Windows.
+    """
+
+    def __init__(self, script, paths):
+        """Creates a new instance.
+
+        :param script list of (delay, pid) tuples, each process is reported
+            delay seconds after the previous one was due
+        :param paths dictionary mapping process ids to executable paths
+        """
+        self.script = script
+        self.paths = paths
+        self.path_queries = 0
+        # Time, as given by time.perf_counter, at which the replay started
+        self.started_at = None
+        # Set once every scripted process has been reported
+        self.finished = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, callback):
+        """Starts reporting the foreground process.
+
+        :param callback function called with the id of the foreground
+            process whenever it may have changed
+        """
+        self._stop_event.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._replay, args=(callback,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops reporting the foreground process."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def process_path(self, pid):
+        """Returns the path to the executable of the given process.
+
+        :param pid id of the process
+        :return path to the process' executable, None if it is unknown
+        """
+        self.path_queries += 1
+        return self.paths.get(pid)
+
+    def _replay(self, callback):
+        """Reports the scripted processes.
+
+        :param callback function to call with the foreground process' id
+        """
+        # Waiting for absolute due times prevents the replay from falling
+        # behind the script by the oversleep of every single wait
+        self.started_at = time.perf_counter()
+        due = self.started_at
+        for delay, pid in self.script:
+            due += delay
+            if self._stop_event.wait(max(0.0, due - time.perf_counter())):
+                return
+            callback(pid)
+        self.finished.set()
 
 
 class ProcessMonitor(QtCore.QObject):
 
     """Monitors the currently active window process.
 
-    This class continuously monitors the active window and whenever
-    it changes the path to the executable is retrieved and signaled
-    to the rest of the system using Qt's signal / slot mechanism.
+    Whenever the process owning the foreground window changes the path to
+    its executable is retrieved and signaled to the rest of the system
+    using Qt's signal / slot mechanism. The signal is only emitted once
+    the foreground process remained the same for a short time, which
+    avoids loading profiles while quickly switching between windows.
     """
 
     # Signal emitted when the active window changes
     process_changed = QtCore.pyqtSignal(str)
 
-    # Definition of the flags for limited information queries
-    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    # Time in seconds the foreground process has to remain the same before
+    # a change is signaled
+    debounce_delay = 0.1
 
-    # kernel32.dll library handle
-    kernel32 = ctypes.windll.kernel32
+    # Number of process paths to keep in the cache
+    cache_size = 64
 
-    def __init__(self):
-        """Creates a new instance."""
+    # Time in seconds after which a cached process path is queried again,
+    # as process ids are reused by the operating system
+    cache_lifetime = 60.0
+
+    def __init__(self, provider=None):
+        """Creates a new instance.
+
+        :param provider ForegroundProcessProvider to use, if None changes
+            are detected using an event hook
+        """
         QtCore.QObject.__init__(self)
-        self._buffer = ctypes.create_string_buffer(1024)
-        self._buffer_size = ctypes.wintypes.DWORD(1024)
+        self.provider = provider if provider is not None \
+            else EventHookProvider()
+        self._path_cache = collections.OrderedDict()
         self._current_path = ""
         self._current_pid = -1
+        self._pending = None
+        self._lock = threading.Lock()
         self.running = False
-        self._update_thread = None
+
+        # Time, as given by time.perf_counter, at which the foreground
+        # process changed to the one last signaled
+        self.changed_at = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def set_provider(self, provider):
+        """Changes the provider used to detect foreground process changes.
+
+        :param provider the new ForegroundProcessProvider to use
+        """
+        was_running = self.running
+        self.stop()
+        self.provider = provider
+        if was_running:
+            self.start()
 
     def start(self):
         """Starts monitoring the current process."""
         if not self.running:
             self.running = True
-            self._update_thread = threading.Thread(
-                target=self._update
-            )
-            self._update_thread.start()
+            self._current_pid = -1
+            self.provider.start(self._foreground_changed)
 
     def stop(self):
         """Stops monitoring the current process."""
-        self.running = False
-        if self._update_thread is not None:
-            self._update_thread.join()
-
-    def _update(self):
-        """Monitors the active process for changes."""
-        while self.running:
-            _, pid = win32process.GetWindowThreadProcessId(
-                win32gui.GetForegroundWindow()
-            )
-
-            if pid != self._current_pid:
-                self._current_pid = pid
-                handle = ProcessMonitor.kernel32.OpenProcess(
-                    ProcessMonitor.PROCESS_QUERY_LIMITED_INFORMATION,
-                    False,
-                    pid
-                )
-
-                self._buffer_size = ctypes.wintypes.DWORD(1024)
-                ProcessMonitor.kernel32.QueryFullProcessImageNameA(
-                    handle,
-                    0,
-                    self._buffer,
-                    ctypes.byref(self._buffer_size)
-                )
-                ProcessMonitor.kernel32.CloseHandle(handle)
-
-                self._current_path = os.path.normpath(
-                    str(self._buffer.value)[2:-1]
-                ).replace("\\", "/")
-                self.process_changed.emit(self.current_path)
-
-            time.sleep(1.0)
+        if self.running:
+            self.running = False
+            self.provider.stop()
+            with self._lock:
+                if self._pending is not None:
+                    self._pending.cancel()
+                    self._pending = None
 
     @property
     def current_path(self):
@@ -109,6 +439,70 @@ class ProcessMonitor(QtCore.QObject):
         """
         return self._current_path
 
+    def process_path(self, pid):
+        """Returns the path to the executable of the given process.
+
+        :param pid id of the process
+        :return path to the process' executable, None if it is unknown
+        """
+        now = time.monotonic()
+        entry = self._path_cache.get(pid)
+        if entry is not None and now - entry[1] < self.cache_lifetime:
+            self._path_cache.move_to_end(pid)
+            self.cache_hits += 1
+            return entry[0]
+
+        self.cache_misses += 1
+        path = self.provider.process_path(pid)
+        if path is not None:
+            self._path_cache[pid] = (path, now)
+            self._path_cache.move_to_end(pid)
+            if len(self._path_cache) > self.cache_size:
+                self._path_cache.popitem(last=False)
+        return path
+
+    def _foreground_changed(self, pid):
+        """Handles a potential change of the foreground process.
+
+        :param pid id of the process owning the foreground window
+        """
+        changed_at = time.perf_counter()
+        if pid == self._current_pid or not self.running:
+            return
+
+        # The process is only considered handled once its path is known,
+        # which causes failed queries to be retried
+        path = self.process_path(pid)
+        if path is None:
+            return
+        self._current_pid = pid
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+            # Switching back before the change was signaled
+            if path == self._current_path:
+                return
+            self._pending = scheduler.Scheduler().schedule(
+                self.debounce_delay,
+                self._signal_change,
+                path,
+                changed_at
+            )
+
+    def _signal_change(self, path, changed_at):
+        """Signals a change of the foreground process.
+
+        :param path path to the new foreground process' executable
+        :param changed_at time at which the foreground process changed
+        """
+        with self._lock:
+            self._pending = None
+            self._current_path = path
+            self.changed_at = changed_at
+        self.process_changed.emit(path)
+
 
 def list_current_processes():
     """Returns a list of executable paths to currently active processes.
@@ -1171,6 +1171,8 @@ class Settings:
         self.vjoy_as_input = {}
         self.vjoy_initial_values = {}
         self.startup_mode = None
+        self.axis_coalescing = False
+        self.axis_coalescing_rate = 0
 
     def to_xml(self):
         """Returns an XML node containing the settings.
@@ -1203,6 +1205,15 @@ class Settings:
                 vjoy_node.append(axis_node)
             node.append(vjoy_node)
 
+        # Axis sample coalescing
+        if self.axis_coalescing:
+            coalescing_node = ElementTree.Element("axis-coalescing")
+            coalescing_node.set(
+                "rate",
+                safe_format(self.axis_coalescing_rate, int)
+            )
+            node.append(coalescing_node)
+
         return node
 
     def from_xml(self, node):
@@ -1234,6 +1245,15 @@ class Settings:
                 value = safe_read(axis_node, "value", float, 0.0)
                 self.vjoy_initial_values[vid][aid] = value
 
+        # Axis sample coalescing
+        self.axis_coalescing = False
+        self.axis_coalescing_rate = 0
+        coalescing_node = node.find("axis-coalescing")
+        if coalescing_node is not None:
+            self.axis_coalescing = True
+            self.axis_coalescing_rate = \
+                safe_read(coalescing_node, "rate", int, 0)
+
     def get_initial_vjoy_axis_value(self, vid, aid):
         """Returns the initial value a vJoy axis should use.
 
@@ -1258,6 +1278,16 @@ class Settings:
             self.vjoy_initial_values[vid] = {}
         self.vjoy_initial_values[vid][aid] = value
 
+    def axis_coalescing_interval(self):
+        """Returns the time between flushes of coalesced axis samples.
+
+        :return interval in seconds, 0 if samples are flushed as fast as
+            they are processed
+        """
+        if self.axis_coalescing_rate <= 0:
+            return 0
+        return 1.0 / self.axis_coalescing_rate
+
 
 class Profile:
 
@@ -0,0 +1,149 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from . import common, util
+
+
+class ScheduledCall:
+
+    """Handle of a function scheduled for execution by the Scheduler."""
+
+    __slots__ = ("due", "callback", "args", "cancelled")
+
+    def __init__(self, due, callback, args):
+        """Creates a new instance.
+
+        :param due time, as given by time.perf_counter, at which to run
+        :param callback the function to run
+        :param args the arguments to pass to the function
+        """
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Prevents the function from running if it hasn't run yet."""
+        self.cancelled = True
+
+
+@common.SingletonDecorator
+class Scheduler:
+
+    """Runs functions after a delay on a single shared thread.
+
+    This replaces creating a thread, or blocking the calling thread, every
+    time something has to happen after a short delay. Scheduled functions
+    run one after the other and should therefore return quickly.
+
+    Functions run with millisecond resolution. Due times are therefore
+    based on time.perf_counter, as time.monotonic only advances in steps
+    of ~15 ms on Windows. How late each function runs compared to its due
+    time is recorded to allow spotting an overloaded scheduler.
+    """
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """Resets the recorded timing statistics."""
+        self.executed = 0
+        self.cancelled = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def mean_lateness(self):
+        """Returns the average time functions ran after their due time.
+
+        :return mean lateness in seconds
+        """
+        if self.executed == 0:
+            return 0.0
+        return self.total_lateness / self.executed
+
+    @property
+    def pending(self):
+        """Returns the number of scheduled functions that haven't run yet.
+
+        :return number of pending functions, including cancelled ones
+        """
+        return len(self._queue)
+
+    def schedule(self, delay, callback, *args):
+        """Schedules a function to run after the given delay.
+
+        :param delay time in seconds after which to run the function
+        :param callback the function to run
+        :param args the arguments to pass to the function
+        :return ScheduledCall handle which can be used to cancel the call
+        """
+        call = ScheduledCall(time.perf_counter() + delay, callback, args)
+        with self._condition:
+            heapq.heappush(self._queue, (call.due, next(self._sequence), call))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._thread_loop)
+                self._thread.daemon = True
+                self._thread.start()
+            # Wake the thread if the new call is the next one due
+            if self._queue[0][2] is call:
+                self._condition.notify()
+        return call
+
+    def _thread_loop(self):
+        """Runs scheduled functions once they are due."""
+        # As the thread never exits, the higher timer resolution is only
+        # requested while calls are pending
+        resolution = util.TimerResolutionRequest()
+        while True:
+            with self._condition:
+                while len(self._queue) == 0 or \
+                        self._queue[0][0] > time.perf_counter():
+                    if len(self._queue) == 0:
+                        timeout = None
+                    else:
+                        timeout = self._queue[0][0] - time.perf_counter()
+                    resolution.set_active(timeout is not None)
+                    self._condition.wait(timeout)
+                call = heapq.heappop(self._queue)[2]
+
+            if call.cancelled:
+                self.cancelled += 1
+                continue
+
+            lateness = time.perf_counter() - call.due
+            self.executed += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            try:
+                call.callback(*call.args)
+            except Exception as e:
+                logging.getLogger("system").exception(
+                    "Scheduled function failed: {}".format(e)
+                )
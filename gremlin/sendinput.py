@@ -24,7 +24,7 @@ import threading
 import time
 
 from gremlin.common import MouseButton, SingletonDecorator
-from gremlin.util import deg2rad
+from gremlin.util import deg2rad, TimerResolutionRequest
 
 
 """Defines flags used when specifying MOUSEINPUT structures.
@@ -58,6 +58,14 @@ INPUT_MOUSE = 0
 INPUT_KEYBOARD = 1
 
 
+"""Defines flags used when specifying KEYBDINPUT structures.
+
+https://msdn.microsoft.com/en-us/library/ms646271(v=vs.85).aspx
+"""
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+
+
 class MotionType(enum.Enum):
 
     """Mouse motion types available."""
@@ -70,9 +78,6 @@ class MouseMotion:
 
     """Base class of all mouse motion behaviours."""
 
-    # Time step between calls
-    delta_t = 0.01
-
     def __init__(self, dx=0, dy=0):
         """Creates a new instance.
 
@@ -82,49 +87,21 @@ class MouseMotion:
         self.dx = dx
         self.dy = dy
 
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
-
-        self._dx_timestamp = 0
-        self._dy_timestamp = 0
+    @property
+    def is_moving(self):
+        """Returns whether or not this behaviour generates any motion.
 
-    def __call__(self):
-        """Returns the change in x and y for this point in time.
-
-        :return dx, dy for this time point
+        :return True if motion is generated, False otherwise
         """
-        if self._tick_dx_value == 0 and self._tick_dy_value == 0:
-            return 0, 0
-
-        delta_x = 0
-        delta_y = 0
-
-        cur_time = time.time()
-        if self._dx_timestamp < cur_time:
-            delta_x = self._tick_dx_value
-            self._dx_timestamp = cur_time + self._tick_dx_time
-        if self._dy_timestamp < cur_time:
-            delta_y = self._tick_dy_value
-            self._dy_timestamp = cur_time + self._tick_dy_time
+        return self.dx != 0 or self.dy != 0
 
-        return delta_x, delta_y
+    def __call__(self, dt):
+        """Returns the change in x and y over the given time span.
 
-    def _compute_values(self, delta):
-        """Computes discretization values to send integer motions.
-
-        :param delta the amount of change in pixels per second to discretize for
+        :param dt time in seconds since the previous call
+        :return dx, dy in pixels, usually fractional
         """
-        delta = 0.0 if abs(delta) < 1e-6 else delta
-        tick_value = math.ceil(abs(delta) / 100.0)
-        if tick_value == 0:
-            tick_time = MouseMotion.delta_t
-        else:
-            tick_time = 1.0 / (abs(delta) / tick_value)
-            tick_value = int(math.copysign(tick_value, delta))
-
-        assert tick_time < 1
-
-        return tick_value, tick_time
+        return self.dx * dt, self.dy * dt
 
 
 class FixedMouseMotion(MouseMotion):
@@ -145,7 +122,6 @@ class FixedMouseMotion(MouseMotion):
         :param value speed in pixels per second along the x axis
         """
         self.dx = value
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
 
     def set_dy(self, value):
         """Updates the y velocity.
@@ -153,7 +129,6 @@ class FixedMouseMotion(MouseMotion):
         :param value speed in pixels per second along the y axis
         """
         self.dy = value
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
 
 class AcceleratedMouseMotion(MouseMotion):
@@ -182,8 +157,14 @@ class AcceleratedMouseMotion(MouseMotion):
         self.current_velocity = self.min_velocity
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
+
+    @property
+    def is_moving(self):
+        """Returns whether or not this behaviour generates any motion.
+
+        :return True if motion is generated, False otherwise
+        """
+        return self.max_velocity != 0
 
     def set_direction(self, direction):
         """Sets the direction for which to emit position changes.
@@ -193,8 +174,6 @@ class AcceleratedMouseMotion(MouseMotion):
         self.direction = direction - 90.0
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
     def _decompose_xy(self, direction, value):
         """Returns x and y values corresponding to a direction and value.
@@ -206,22 +185,21 @@ class AcceleratedMouseMotion(MouseMotion):
         return value * math.cos(deg2rad(direction)),\
             value * math.sin(deg2rad(direction))
 
-    def __call__(self):
-        """Returns the change in x and y for this point in time.
+    def __call__(self, dt):
+        """Returns the change in x and y over the given time span.
 
-        :return dx, dy for this time point
+        :param dt time in seconds since the previous call
+        :return dx, dy in pixels, usually fractional
         """
-        dx, dy = super().__call__()
+        dx, dy = super().__call__(dt)
 
         # Apply acceleration
         self.current_velocity = min(
             self.max_velocity,
-            self.current_velocity + self.acceleration * MouseMotion.delta_t
+            self.current_velocity + self.acceleration * dt
         )
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
         return dx, dy
 
@@ -229,15 +207,36 @@ class AcceleratedMouseMotion(MouseMotion):
 @SingletonDecorator
 class MouseController:
 
-    """Centralizes sending mouse events in a organized manner."""
+    """Centralizes sending mouse events in a organized manner.
+
+    Motion events are sent at a fixed rate while a motion is configured,
+    otherwise the controller's thread sleeps. Fractions of a pixel are
+    carried over to subsequent updates, which reproduces the configured
+    speed exactly over time.
+    """
 
     def __init__(self):
         """Creates a new instance."""
         self._motion_type = MotionType.Fixed
         self._delta_generator = FixedMouseMotion(0, 0)
 
+        # Number of motion updates per second
+        self.rate = 500
+        self._remainder_x = 0.0
+        self._remainder_y = 0.0
+
         self._is_running = False
-        self._thread = threading.Thread(target=self._control_loop)
+        self._condition = threading.Condition()
+        self._thread = None
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """Resets the recorded motion statistics."""
+        self.updates = 0
+        self.moves = 0
+        self.max_interval = 0.0
+        self.requested_distance = [0.0, 0.0]
+        self.sent_distance = [0, 0]
 
     def set_absolute_motion(self, dx=None, dy=None):
         """Configures a motion using absolute velocities.
@@ -247,17 +246,19 @@ class MouseController:
         :param dx velocity along the x axis in pixels per second
         :param dy velocity along the y axis in pixels per second
         """
-        if self._motion_type == MotionType.Fixed:
-            if dx is not None:
-                self._delta_generator.set_dx(dx)
-            if dy is not None:
-                self._delta_generator.set_dy(dy)
-        else:
-            self._motion_type = MotionType.Fixed
-            self._delta_generator = FixedMouseMotion(
-                dx if dx is not None else 0,
-                dy if dy is not None else 0
-            )
+        with self._condition:
+            if self._motion_type == MotionType.Fixed:
+                if dx is not None:
+                    self._delta_generator.set_dx(dx)
+                if dy is not None:
+                    self._delta_generator.set_dy(dy)
+            else:
+                self._motion_type = MotionType.Fixed
+                self._delta_generator = FixedMouseMotion(
+                    dx if dx is not None else 0,
+                    dy if dy is not None else 0
+                )
+            self._condition.notify()
 
     def set_accelerated_motion(
             self,
@@ -273,38 +274,97 @@ class MouseController:
         :param max_speed maximum speed in pixels per second
         :param time_to_max_speed time to reach max_speed
         """
-        if self._motion_type == MotionType.Accelerated:
-            self._delta_generator.set_direction(direction)
-        else:
-            self._delta_generator = AcceleratedMouseMotion(
-                direction,
-                min_speed,
-                max_speed,
-                time_to_max_speed
-            )
-            self._motion_type = MotionType.Accelerated
+        with self._condition:
+            if self._motion_type == MotionType.Accelerated:
+                self._delta_generator.set_direction(direction)
+            else:
+                self._delta_generator = AcceleratedMouseMotion(
+                    direction,
+                    min_speed,
+                    max_speed,
+                    time_to_max_speed
+                )
+                self._motion_type = MotionType.Accelerated
+            self._condition.notify()
 
     def start(self):
         """Starts the thread that will send motions when required."""
-        if not self._is_running:
-            self._thread = threading.Thread(target=self._control_loop)
-            self._thread.start()
+        with self._condition:
+            if self._thread is None:
+                self._is_running = True
+                self._thread = threading.Thread(target=self._control_loop)
+                self._thread.daemon = True
+                self._thread.start()
 
     def stop(self):
         """Stops the thread that sends motion events."""
-        if self._thread.is_alive():
+        with self._condition:
+            thread = self._thread
             self._is_running = False
-            self._thread.join()
+            self._motion_type = MotionType.Fixed
+            self._delta_generator = FixedMouseMotion(0, 0)
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+            self._thread = None
 
     def _control_loop(self):
         """Loop responsible for creating and sending mouse motion events."""
-        self._is_running = True
-
-        while self._is_running:
-            dx, dy = self._delta_generator()
-            if dx != 0 or dy != 0:
-                mouse_relative_motion(int(dx), int(dy))
-            time.sleep(0.01)
+        # The higher timer resolution is only requested while the mouse is
+        # moving in order to not raise the resolution while idle
+        resolution = TimerResolutionRequest()
+        try:
+            last_update = None
+            next_update = 0.0
+            while True:
+                with self._condition:
+                    # Sleep until a motion is configured
+                    while self._is_running and \
+                            not self._delta_generator.is_moving:
+                        last_update = None
+                        resolution.set_active(False)
+                        self._condition.wait()
+                    if not self._is_running:
+                        return
+                    resolution.set_active(True)
+
+                    now = time.perf_counter()
+                    if last_update is None:
+                        # A new motion starts without any leftover fractions
+                        self._remainder_x = 0.0
+                        self._remainder_y = 0.0
+                        next_update = now
+                        dx, dy = 0.0, 0.0
+                    else:
+                        interval = now - last_update
+                        self.max_interval = max(self.max_interval, interval)
+                        dx, dy = self._delta_generator(interval)
+                    last_update = now
+
+                self.updates += 1
+                self.requested_distance[0] += dx
+                self.requested_distance[1] += dy
+                self._remainder_x += dx
+                self._remainder_y += dy
+                move_x = int(self._remainder_x)
+                move_y = int(self._remainder_y)
+                if move_x != 0 or move_y != 0:
+                    self._remainder_x -= move_x
+                    self._remainder_y -= move_y
+                    self.sent_distance[0] += move_x
+                    self.sent_distance[1] += move_y
+                    self.moves += 1
+                    mouse_relative_motion(move_x, move_y)
+
+                # Wait for the next update, skipping updates that were missed
+                next_update += 1.0 / self.rate
+                delay = next_update - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_update = time.perf_counter()
+        finally:
+            resolution.set_active(False)
 
 
 class _MOUSEINPUT(ctypes.Structure):
@@ -366,53 +426,260 @@ class _INPUT(ctypes.Structure):
     )
 
 
+class SendInputSink:
+
+    """Output sink passing inputs to the SendInput Windows function."""
+
+    def __call__(self, inputs, count):
+        """Sends the given inputs.
+
+        :param inputs array of _INPUT structures
+        :param count number of inputs at the start of the array to send
+        :return number of inputs that were sent
+        """
+        return ctypes.windll.user32.SendInput(
+            count,
+            inputs,
+            ctypes.sizeof(_INPUT)
+        )
+
+
+class RecordingSink:
+
+    """Output sink which records inputs instead of sending them."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.batches = []
+
+    def __call__(self, inputs, count):
+        """Records a copy of the given inputs as one batch.
+
+        :param inputs array of _INPUT structures
+        :param count number of inputs at the start of the array to record
+        :return number of inputs that were recorded
+        """
+        self.batches.append(
+            [_INPUT.from_buffer_copy(inputs[i]) for i in range(count)]
+        )
+        return count
+
+
+# Sink receiving all generated inputs
+_output_sink = SendInputSink()
+
+
+def set_output_sink(sink):
+    """Sets the sink receiving all generated keyboard and mouse inputs.
+
+    :param sink callable receiving an array of _INPUT structures and the
+        number of inputs in it to send
+    :return the previously used sink
+    """
+    global _output_sink
+    previous = _output_sink
+    _output_sink = sink
+    return previous
+
+
+class InputBatch:
+
+    """Collects inputs in order to send them with a single call.
+
+    Inputs are written into a preallocated array, all inputs of a batch
+    are delivered atomically, i.e. without inputs from other sources in
+    between them.
+    """
+
+    def __init__(self, capacity=32):
+        """Creates a new instance.
+
+        :param capacity number of inputs after which the batch is sent
+            automatically
+        """
+        self.capacity = capacity
+        self.depth = 0
+        self._inputs = (_INPUT * capacity)()
+        self._count = 0
+
+    def add_keyboard(self, virtual_code, scan_code, flags):
+        """Adds a keyboard input.
+
+        :param virtual_code virtual code of the key
+        :param scan_code scan code of the key
+        :param flags KEYEVENTF flags of the input
+        """
+        entry = self._next_entry()
+        entry.type = INPUT_KEYBOARD
+        ki = entry.union.ki
+        ki.wVk = virtual_code
+        ki.wScan = scan_code
+        ki.dwFlags = flags
+        ki.time = 0
+        ki.wExtraInfo = None
+
+    def add_mouse(self, flags, dx=0, dy=0, data=0):
+        """Adds a mouse input.
+
+        :param flags MOUSEEVENTF flags of the input
+        :param dx motion along the x axis
+        :param dy motion along the y axis
+        :param data additional data such as wheel motion or button id
+        """
+        entry = self._next_entry()
+        entry.type = INPUT_MOUSE
+        mi = entry.union.mi
+        mi.dx = dx
+        mi.dy = dy
+        mi.mouseData = data
+        mi.dwFlags = flags
+        mi.time = 0
+        mi.dwExtraInfo = None
+
+    def flush(self):
+        """Sends all collected inputs."""
+        if self._count > 0:
+            count = self._count
+            self._count = 0
+            _output_sink(self._inputs, count)
+
+    def _next_entry(self):
+        """Returns the next unused entry of the array.
+
+        :return _INPUT structure to fill in
+        """
+        if self._count == self.capacity:
+            self.flush()
+        entry = self._inputs[self._count]
+        self._count += 1
+        return entry
+
+
+# Each thread collects its inputs in its own batch
+_thread_state = threading.local()
+
+
+def _current_batch():
+    """Returns the input batch of the calling thread.
+
+    :return InputBatch instance of the calling thread
+    """
+    batch = getattr(_thread_state, "batch", None)
+    if batch is None:
+        batch = InputBatch()
+        _thread_state.batch = batch
+    return batch
+
+
+def begin_batch():
+    """Starts collecting the inputs generated by the calling thread.
+
+    Inputs are sent together once the matching end_batch is called.
+    Batches can be nested in which case the inputs are sent when the
+    outermost batch ends.
+    """
+    _current_batch().depth += 1
+
+
+def end_batch():
+    """Ends collecting inputs and sends them if no outer batch is open."""
+    batch = _current_batch()
+    batch.depth -= 1
+    if batch.depth == 0:
+        batch.flush()
+
+
+def flush_batch():
+    """Sends the inputs collected by the calling thread so far."""
+    _current_batch().flush()
+
+
+def _send_keyboard(virtual_code, scan_code, flags):
+    """Sends a keyboard input or adds it to the open batch.
+
+    :param virtual_code virtual code of the key
+    :param scan_code scan code of the key
+    :param flags KEYEVENTF flags of the input
+    """
+    batch = _current_batch()
+    batch.add_keyboard(virtual_code, scan_code, flags)
+    if batch.depth == 0:
+        batch.flush()
+
+
+def _send_mouse(flags, dx=0, dy=0, data=0):
+    """Sends a mouse input or adds it to the open batch.
+
+    :param flags MOUSEEVENTF flags of the input
+    :param dx motion along the x axis
+    :param dy motion along the y axis
+    :param data additional data such as wheel motion or button id
+    """
+    batch = _current_batch()
+    batch.add_mouse(flags, dx, dy, data)
+    if batch.depth == 0:
+        batch.flush()
+
+
+def key_press(virtual_code, scan_code, is_extended):
+    """Presses a key.
+
+    :param virtual_code virtual code of the key
+    :param scan_code scan code of the key
+    :param is_extended whether or not the key is an extended key
+    """
+    flags = KEYEVENTF_EXTENDEDKEY if is_extended else 0
+    _send_keyboard(virtual_code, scan_code, flags)
+
+
+def key_release(virtual_code, scan_code, is_extended):
+    """Releases a key.
+
+    :param virtual_code virtual code of the key
+    :param scan_code scan code of the key
+    :param is_extended whether or not the key is an extended key
+    """
+    flags = KEYEVENTF_EXTENDEDKEY if is_extended else 0
+    _send_keyboard(virtual_code, scan_code, flags | KEYEVENTF_KEYUP)
+
+
 def mouse_relative_motion(dx, dy):
-    _send_input(
-        _mouse_input(MOUSEEVENTF_MOVE, dx, dy)
-    )
+    _send_mouse(MOUSEEVENTF_MOVE, dx, dy)
 
 
 def mouse_press(button):
     if button == MouseButton.Left:
-        _send_input(_mouse_input(MOUSEEVENTF_LEFTDOWN))
+        _send_mouse(MOUSEEVENTF_LEFTDOWN)
     elif button == MouseButton.Right:
-        _send_input(_mouse_input(MOUSEEVENTF_RIGHTDOWN))
+        _send_mouse(MOUSEEVENTF_RIGHTDOWN)
     elif button == MouseButton.Middle:
-        _send_input(_mouse_input(MOUSEEVENTF_MIDDLEDOWN))
+        _send_mouse(MOUSEEVENTF_MIDDLEDOWN)
     elif button == MouseButton.Back:
-        _send_input(_mouse_input(MOUSEEVENTF_XDOWN, data=XBUTTON1))
+        _send_mouse(MOUSEEVENTF_XDOWN, data=XBUTTON1)
     elif button == MouseButton.Forward:
-        _send_input(_mouse_input(MOUSEEVENTF_XDOWN, data=XBUTTON2))
+        _send_mouse(MOUSEEVENTF_XDOWN, data=XBUTTON2)
 
 
 def mouse_release(button):
     if button == MouseButton.Left:
-        _send_input(_mouse_input(MOUSEEVENTF_LEFTUP))
+        _send_mouse(MOUSEEVENTF_LEFTUP)
     elif button == MouseButton.Right:
-        _send_input(_mouse_input(MOUSEEVENTF_RIGHTUP))
+        _send_mouse(MOUSEEVENTF_RIGHTUP)
     elif button == MouseButton.Middle:
-        _send_input(_mouse_input(MOUSEEVENTF_MIDDLEUP))
+        _send_mouse(MOUSEEVENTF_MIDDLEUP)
     elif button == MouseButton.Back:
-        _send_input(_mouse_input(MOUSEEVENTF_XUP, data=XBUTTON1))
+        _send_mouse(MOUSEEVENTF_XUP, data=XBUTTON1)
     elif button == MouseButton.Forward:
-        _send_input(_mouse_input(MOUSEEVENTF_XUP, data=XBUTTON2))
+        _send_mouse(MOUSEEVENTF_XUP, data=XBUTTON2)
 
 
 def mouse_wheel(motion):
-    _send_input(_mouse_input(MOUSEEVENTF_WHEEL, data=-motion*WHEEL_DELTA))
-
-
-def _mouse_input(flags, dx=0, dy=0, data=0):
-    return _INPUT(
-        INPUT_MOUSE,
-        _INPUTunion(mi=_MOUSEINPUT(dx, dy, data, flags, 0, None))
-    )
+    _send_mouse(MOUSEEVENTF_WHEEL, data=-motion*WHEEL_DELTA)
 
 
 def _send_input(*inputs):
     nInputs = len(inputs)
     LPINPUT = _INPUT * nInputs
     pInputs = LPINPUT(*inputs)
-    cbSize = ctypes.c_int(ctypes.sizeof(_INPUT))
 
-    return ctypes.windll.user32.SendInput(nInputs, pInputs, cbSize)
+    return _output_sink(pInputs, nInputs)
@@ -16,7 +16,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import array
+import bisect
 import collections
+import gremlin.error
 import gremlin.util
 
 
@@ -24,18 +27,139 @@ import gremlin.util
 Point2D = collections.namedtuple("Point2D", ["x", "y"])
 
 
+class SampleTable:
+
+    """Uniformly sampled representation of a function on an interval.
+
+    Values between samples are obtained by either linear or cubic
+    (Catmull-Rom) interpolation, which makes evaluation independent of the
+    complexity of the sampled function.
+
+    With h being the distance between two samples, i.e. the width of the
+    interval divided by (resolution - 1), the interpolation error for a
+    function f is bounded as follows:
+
+    - linear: |error| <= h^2 / 8 * max |f''|
+    - cubic: |error| <= h^3 / 3 * max |f'''|, except for the first and
+      last sample interval where the linear bound applies
+
+    These bounds only hold where f is smooth, i.e. not across control
+    points at which higher order derivatives of a spline are discontinuous.
+    The actual error for a specific function can be measured with max_error.
+    """
+
+    def __init__(self, fn, low, high, resolution=1024, interpolation="linear"):
+        """Creates a new sample table.
+
+        :param fn the function to sample
+        :param low the lower end of the sampled interval
+        :param high the upper end of the sampled interval
+        :param resolution the number of samples to take
+        :param interpolation the interpolation to use, either "linear"
+            or "cubic"
+        """
+        if resolution < 2:
+            raise gremlin.error.GremlinError(
+                "Sample table resolution has to be at least 2"
+            )
+        if interpolation not in ["linear", "cubic"]:
+            raise gremlin.error.GremlinError(
+                "Invalid interpolation type {}".format(interpolation)
+            )
+
+        self.low = low
+        self.high = high
+        self.resolution = resolution
+        self.interpolation = interpolation
+        self._step = (high - low) / (resolution - 1)
+        self._scale = (resolution - 1) / (high - low)
+        self._samples = array.array(
+            "d",
+            [fn(low + i * self._step) for i in range(resolution)]
+        )
+        self._evaluate = self._linear if interpolation == "linear" \
+            else self._cubic
+
+    def __call__(self, x):
+        """Returns the interpolated function value at the given position.
+
+        :param x the location at which to evaluate the function, has to be
+            within the sampled interval
+        :return interpolated function value at the provided position
+        """
+        return self._evaluate(x)
+
+    def max_error(self, fn, count=10000):
+        """Returns the largest deviation from the given function.
+
+        :param fn the exact function the table was created from
+        :param count the number of evenly spaced locations to check
+        :return largest absolute difference between table and function
+        """
+        error = 0.0
+        for i in range(count):
+            x = self.low + (self.high - self.low) * i / (count - 1)
+            error = max(error, abs(self(x) - fn(x)))
+        return error
+
+    def _linear(self, x):
+        """Returns the linearly interpolated value.
+
+        :param x the location at which to evaluate the function
+        :return interpolated function value
+        """
+        position = (x - self.low) * self._scale
+        index = min(int(position), self.resolution - 2)
+        t = position - index
+        samples = self._samples
+        return samples[index] + t * (samples[index + 1] - samples[index])
+
+    def _cubic(self, x):
+        """Returns the Catmull-Rom interpolated value.
+
+        :param x the location at which to evaluate the function
+        :return interpolated function value
+        """
+        position = (x - self.low) * self._scale
+        index = min(int(position), self.resolution - 2)
+        t = position - index
+        samples = self._samples
+        p1 = samples[index]
+        p2 = samples[index + 1]
+        # Mirror the samples at the ends, which results in linear
+        # interpolation within the first and last interval
+        p0 = samples[index - 1] if index > 0 else 2.0 * p1 - p2
+        p3 = samples[index + 2] if index + 2 < self.resolution \
+            else 2.0 * p2 - p1
+        return p1 + 0.5 * t * (
+            p2 - p0 + t * (
+                2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3 + t * (
+                    3.0 * (p1 - p2) + p3 - p0
+                )
+            )
+        )
+
+
 class CubicSpline:
 
     """Creates a new cubic spline based interpolation.
-    
+
     The methods requires a set of control points which are used to
     create a C2 spline which passes through all of them.
     """
 
-    def __init__(self, points):
+    # Number of control points from which on a sample table is used by
+    # default
+    sample_table_threshold = 20
+
+    def __init__(self, points, resolution=None, interpolation="cubic"):
         """Creates a new CubicSpline object.
 
         :param points the set of (x, y) control points
+        :param resolution number of samples in the table used to evaluate
+            the spline, 0 to always evaluate exactly, None to only use a
+            table for splines with many control points
+        :param interpolation the interpolation used by the sample table
         """
         # Order the points by increasing x coordinate to guarantee proper
         # functioning of the spline code
@@ -44,9 +168,23 @@ class CubicSpline:
         self.x = [v[0] for v in ordered_points]
         self.y = [v[1] for v in ordered_points]
         self.z = [0] * len(points)
+        self._x = array.array("d", self.x)
 
         self._fit()
 
+        if resolution is None and \
+                len(points) >= CubicSpline.sample_table_threshold:
+            resolution = 4096
+        self._table = None
+        if resolution:
+            self._table = SampleTable(
+                self.evaluate,
+                self.x[0],
+                self.x[-1],
+                resolution,
+                interpolation
+            )
+
     def _fit(self):
         """Computes the second derivatives for the control points."""
         n = len(self.x)-1
@@ -74,18 +212,37 @@ class CubicSpline:
             self.z[i] = (v[i] - h[i] * self.z[i+1]) / u[i]
         self.z[0] = 0.0
 
+    @property
+    def sample_table(self):
+        """Returns the sample table used to evaluate the spline.
+
+        :return SampleTable instance, None if the spline is evaluated exactly
+        """
+        return self._table
+
     def __call__(self, x):
         """Returns the function value at the desired position.
 
         :param x the location at which to evaluate the function
         :return function value at the provided position
         """
-        n = len(self.x)
+        table = self._table
+        if table is not None and table.low <= x <= table.high:
+            return table(x)
+        return self.evaluate(x)
 
-        i = 0
-        for i in range(n-1):
-            if self.x[i] <= x <= self.x[i+1]:
-                break
+    def evaluate(self, x):
+        """Returns the exact function value at the desired position.
+
+        :param x the location at which to evaluate the function
+        :return function value at the provided position
+        """
+        # Find the segment containing x, locations outside the control
+        # points use the last segment
+        if self._x[0] <= x <= self._x[-1]:
+            i = max(bisect.bisect_left(self._x, x) - 1, 0)
+        else:
+            i = len(self._x) - 2
 
         h = self.x[i+1] - self.x[i]
         tmp = (self.z[i] / 2.0) + (x - self.x[i]) * \
@@ -100,19 +257,43 @@ class CubicBezierSpline:
 
     """Implementation of cubic Bezier splines."""
 
-    def __init__(self, points):
+    # Number of control points from which on a sample table is used by
+    # default
+    sample_table_threshold = 20
+
+    def __init__(self, points, resolution=None, interpolation="cubic"):
         """Creates a new CubicBezierSpline object.
 
         :param points the set of (x, y) knots and control points
+        :param resolution number of samples in the table used to evaluate
+            the spline, 0 to always evaluate exactly, None to only use a
+            table for splines with many control points
+        :param interpolation the interpolation used by the sample table
         """
         self.x = [v[0] for v in points]
         self.y = [v[1] for v in points]
 
         self.knots = [pt for pt in points[::3]]
+        self._knot_x = array.array("d", [pt[0] for pt in self.knots])
 
-        self._lookup = []
+        # x and y coordinates of the t -> coordinate lookup of each segment
+        self._lookup_x = []
+        self._lookup_y = []
         self._generate_lookup()
 
+        if resolution is None and \
+                len(points) >= CubicBezierSpline.sample_table_threshold:
+            resolution = 4096
+        self._table = None
+        if resolution:
+            self._table = SampleTable(
+                self.evaluate,
+                -1.0,
+                1.0,
+                resolution,
+                interpolation
+            )
+
     def _generate_lookup(self):
         """Generates the lookup table mapping x to t values."""
         assert len(self.x) == len(self.y)
@@ -130,10 +311,14 @@ class CubicBezierSpline:
 
             # Get t -> coordinate mappings
             step_size = 1.0 / 100
-            self._lookup.append([])
+            lookup_x = array.array("d")
+            lookup_y = array.array("d")
             for j in range(0, 101):
-                t = j * step_size
-                self._lookup[-1].append((t, self._value_at_t(points, t)))
+                point = self._value_at_t(points, j * step_size)
+                lookup_x.append(point.x)
+                lookup_y.append(point.y)
+            self._lookup_x.append(lookup_x)
+            self._lookup_y.append(lookup_y)
 
     def _value_at_t(self, points, t):
         """Returns the x and y coordinate for the spline at time t.
@@ -159,6 +344,14 @@ class CubicBezierSpline:
                 + points[3].y * t3
         )
 
+    @property
+    def sample_table(self):
+        """Returns the sample table used to evaluate the spline.
+
+        :return SampleTable instance, None if the spline is evaluated exactly
+        """
+        return self._table
+
     def __call__(self, x):
         """Returns the function value at the desired position.
 
@@ -168,36 +361,38 @@ class CubicBezierSpline:
         # Ensure we have a valid value for x
         x = gremlin.util.clamp(x, -1.0, 1.0)
 
-        # Determine spline group to use
-        index = 0
-        if self.knots[0][0] > x:
-            index = 0
-        elif self.knots[-1][0] <= x:
-            index = len(self._lookup)-1
-        else:
-            segment_count = int((len(self.x) - 4) / 3) + 1
-            for i in range(segment_count):
-                offset = i * 3
-                if self.x[offset] <= x <= self.x[offset+3]:
-                    index = i
-                    break
-
-        # Linearly interpolate the lookup table data
-        interval = [0, len(self._lookup[index])]
-        searching = True
-        while searching:
-            distance = interval[1] - interval[0]
-            if distance == 1:
-                searching = False
-                break
-
-            center_index = interval[0] + int(distance / 2.0)
-            if self._lookup[index][center_index][1][0] < x:
-                interval[0] = center_index
-            else:
-                interval[1] = center_index
-
-        low = self._lookup[index][interval[0]][1]
-        high = self._lookup[index][interval[1]][1]
-
-        return low.y + (x - low.x) * ((high.y - low.y) / (high.x - low.x))
+        if self._table is not None:
+            return self._table(x)
+        return self.evaluate(x)
+
+    def evaluate(self, x):
+        """Returns the function value at the desired position without
+        using the sample table.
+
+        :param x the location at which to evaluate the function
+        :return function value at the provided position
+        """
+        # Ensure we have a valid value for x
+        x = gremlin.util.clamp(x, -1.0, 1.0)
+
+        # Determine spline group to use, i.e. the last one starting before x
+        index = bisect.bisect_left(self._knot_x, x) - 1
+        index = min(max(index, 0), len(self._lookup_x) - 1)
+
+        # Linearly interpolate between the two lookup table entries
+        # enclosing x
+        lookup_x = self._lookup_x[index]
+        lookup_y = self._lookup_y[index]
+        high = bisect.bisect_left(lookup_x, x)
+        high = min(max(high, 1), len(lookup_x) - 1)
+        low = high - 1
+
+        # Vertical parts of the curve have entries sharing the same x
+        # coordinate, use the entry on the side of x
+        width = lookup_x[high] - lookup_x[low]
+        if width == 0:
+            return lookup_y[high] if x >= lookup_x[high] else lookup_y[low]
+
+        return lookup_y[low] + (x - lookup_x[low]) * (
+            (lookup_y[high] - lookup_y[low]) / width
+        )
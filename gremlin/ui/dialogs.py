@@ -111,6 +111,45 @@ class OptionsUi(common.BaseDialogUi):
             self.config.mode_change_message
         )
 
+        # Process events on a dedicated thread
+        self.dispatch_thread = QtWidgets.QCheckBox(
+            "Process inputs on a dedicated thread"
+        )
+        self.dispatch_thread.clicked.connect(self._dispatch_thread)
+        self.dispatch_thread.setChecked(self.config.dispatch_thread)
+
+        # Batched vJoy output
+        self.vjoy_frames_layout = QtWidgets.QHBoxLayout()
+        self.vjoy_output_frames = QtWidgets.QCheckBox(
+            "Send vJoy changes in batches"
+        )
+        self.vjoy_output_frames.clicked.connect(self._vjoy_output_frames)
+        self.vjoy_output_frames.setChecked(self.config.vjoy_output_frames)
+        self.vjoy_frame_rate_label = \
+            QtWidgets.QLabel("Update rate (0 = per input)")
+        self.vjoy_frame_rate = QtWidgets.QSpinBox()
+        self.vjoy_frame_rate.setRange(0, 1000)
+        self.vjoy_frame_rate.setSuffix(" Hz")
+        self.vjoy_frame_rate.setValue(self.config.vjoy_frame_rate)
+        self.vjoy_frame_rate.valueChanged.connect(self._vjoy_frame_rate)
+        self.vjoy_frames_layout.addWidget(self.vjoy_output_frames)
+        self.vjoy_frames_layout.addWidget(self.vjoy_frame_rate_label)
+        self.vjoy_frames_layout.addWidget(self.vjoy_frame_rate)
+        self.vjoy_frames_layout.addStretch()
+
+        # Mouse motion update rate
+        self.mouse_motion_layout = QtWidgets.QHBoxLayout()
+        self.mouse_motion_rate_label = \
+            QtWidgets.QLabel("Mouse motion update rate")
+        self.mouse_motion_rate = QtWidgets.QSpinBox()
+        self.mouse_motion_rate.setRange(10, 1000)
+        self.mouse_motion_rate.setSuffix(" Hz")
+        self.mouse_motion_rate.setValue(self.config.mouse_motion_rate)
+        self.mouse_motion_rate.valueChanged.connect(self._mouse_motion_rate)
+        self.mouse_motion_layout.addWidget(self.mouse_motion_rate_label)
+        self.mouse_motion_layout.addWidget(self.mouse_motion_rate)
+        self.mouse_motion_layout.addStretch()
+
         # Default action selection
         self.default_action_layout = QtWidgets.QHBoxLayout()
         self.default_action_label = QtWidgets.QLabel("Default action")
@@ -160,6 +199,28 @@ class OptionsUi(common.BaseDialogUi):
         )
         self.macro_axis_minimum_change_layout.addStretch()
 
+        # Macro timing precision
+        self.macro_timing_layout = QtWidgets.QHBoxLayout()
+        self.macro_spin_budget_label = \
+            QtWidgets.QLabel("Macro timing yield time")
+        self.macro_spin_budget_value = common.DynamicDoubleSpinBox()
+        self.macro_spin_budget_value.setRange(0.0, 0.0001)
+        self.macro_spin_budget_value.setSingleStep(0.00001)
+        self.macro_spin_budget_value.setDecimals(5)
+        self.macro_spin_budget_value.setValue(self.config.macro_spin_budget)
+        self.macro_spin_budget_value.valueChanged.connect(
+            self._macro_spin_budget
+        )
+        self.macro_timing_report = QtWidgets.QCheckBox(
+            "Log macro timing report"
+        )
+        self.macro_timing_report.clicked.connect(self._macro_timing_report)
+        self.macro_timing_report.setChecked(self.config.macro_timing_report)
+        self.macro_timing_layout.addWidget(self.macro_spin_budget_label)
+        self.macro_timing_layout.addWidget(self.macro_spin_budget_value)
+        self.macro_timing_layout.addWidget(self.macro_timing_report)
+        self.macro_timing_layout.addStretch()
+
         self.general_layout.addWidget(self.highlight_input)
         self.general_layout.addWidget(self.highlight_device)
         self.general_layout.addWidget(self.close_to_systray)
@@ -167,9 +228,13 @@ class OptionsUi(common.BaseDialogUi):
         self.general_layout.addWidget(self.start_minimized)
         self.general_layout.addWidget(self.start_with_windows)
         self.general_layout.addWidget(self.show_mode_change_message)
+        self.general_layout.addWidget(self.dispatch_thread)
+        self.general_layout.addLayout(self.vjoy_frames_layout)
+        self.general_layout.addLayout(self.mouse_motion_layout)
         self.general_layout.addLayout(self.default_action_layout)
         self.general_layout.addLayout(self.macro_axis_polling_layout)
         self.general_layout.addLayout(self.macro_axis_minimum_change_layout)
+        self.general_layout.addLayout(self.macro_timing_layout)
         self.general_layout.addStretch()
         self.tab_container.addTab(self.general_page, "General")
 
@@ -184,6 +249,16 @@ class OptionsUi(common.BaseDialogUi):
         )
         self.autoload_checkbox.clicked.connect(self._autoload_profiles)
         self.autoload_checkbox.setChecked(self.config.autoload_profiles)
+        self.autoload_event_hook_checkbox = QtWidgets.QCheckBox(
+            "Detect application changes immediately instead of checking "
+            "once per second"
+        )
+        self.autoload_event_hook_checkbox.clicked.connect(
+            self._autoload_event_hook
+        )
+        self.autoload_event_hook_checkbox.setChecked(
+            self.config.autoload_event_hook
+        )
 
         # Executable dropdown list
         self.executable_layout = QtWidgets.QHBoxLayout()
@@ -226,6 +301,7 @@ class OptionsUi(common.BaseDialogUi):
         self.profile_layout.addWidget(self.profile_select)
 
         self.profile_page_layout.addWidget(self.autoload_checkbox)
+        self.profile_page_layout.addWidget(self.autoload_event_hook_checkbox)
         self.profile_page_layout.addLayout(self.executable_layout)
         self.profile_page_layout.addLayout(self.profile_layout)
         self.profile_page_layout.addStretch()
@@ -340,6 +416,13 @@ class OptionsUi(common.BaseDialogUi):
         self.config.autoload_profiles = clicked
         self.config.save()
 
+    def _autoload_event_hook(self, clicked):
+        """Stores the foreground change detection preference.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.autoload_event_hook = clicked
+
     def _activate_on_launch(self, clicked):
         """Stores activation of profile on launch preference.
 
@@ -364,6 +447,36 @@ class OptionsUi(common.BaseDialogUi):
         self.config.start_minimized = clicked
         self.config.save()
 
+    def _dispatch_thread(self, clicked):
+        """Stores the dedicated event processing thread preference.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.dispatch_thread = clicked
+        self.config.save()
+
+    def _vjoy_output_frames(self, clicked):
+        """Stores the batched vJoy output preference.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.vjoy_output_frames = clicked
+        self.config.save()
+
+    def _vjoy_frame_rate(self, value):
+        """Stores the rate at which batched vJoy changes are sent.
+
+        :param value the new update rate in Hz
+        """
+        self.config.vjoy_frame_rate = value
+
+    def _mouse_motion_rate(self, value):
+        """Stores the rate at which mouse motion is updated.
+
+        :param value the new update rate in Hz
+        """
+        self.config.mouse_motion_rate = value
+
     def _start_windows(self, clicked):
         """Set registry entry to launch Joystick Gremlin on login.
 
@@ -547,6 +660,20 @@ class OptionsUi(common.BaseDialogUi):
         """
         self.config.macro_axis_minimum_change_rate = value
 
+    def _macro_spin_budget(self, value):
+        """Updates the config with the newly set macro yield time.
+
+        :param value the new yield time in seconds
+        """
+        self.config.macro_spin_budget = value
+
+    def _macro_timing_report(self, clicked):
+        """Stores the macro timing report preference.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.macro_timing_report = clicked
+
     def _create_hg_cb(self, *params):
         return lambda x: self._update_hg_device(x, *params)
 
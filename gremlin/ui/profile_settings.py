@@ -81,6 +81,9 @@ class ProfileSettingsWidget(QtWidgets.QWidget):
         self.scroll_layout.addWidget(vjoy_as_input_widget)
         vjoy_as_input_widget.changed.connect(lambda: self.refresh_ui(True))
 
+        # Axis sample coalescing
+        self.scroll_layout.addWidget(AxisCoalescingWidget(self.profile_settings))
+
         # vJoy axis initialization value setup
         for dev in sorted(
                 gremlin.joystick_handling.vjoy_devices(),
@@ -157,6 +160,60 @@ class DefaultModeSelector(QtWidgets.QGroupBox):
             self.profile_data.startup_mode = self.dropdown.currentText()
 
 
+class AxisCoalescingWidget(QtWidgets.QGroupBox):
+
+    """Configures the merging of axis samples arriving in quick succession."""
+
+    def __init__(self, profile_data, parent=None):
+        """Creates a new instance.
+
+        :param profile_data profile settings managed by the widget
+        :param parent the parent of this widget
+        """
+        super().__init__(parent)
+
+        self.profile_data = profile_data
+
+        self.main_layout = QtWidgets.QHBoxLayout(self)
+        self._create_ui()
+
+    def _create_ui(self):
+        """Creates the UI used to configure axis coalescing."""
+        self.setTitle("Axis Coalescing")
+
+        self.enabled = QtWidgets.QCheckBox("Merge axis samples")
+        self.enabled.setChecked(self.profile_data.axis_coalescing)
+        self.enabled.stateChanged.connect(self._update_enabled_cb)
+
+        self.rate = QtWidgets.QSpinBox()
+        self.rate.setRange(0, 10000)
+        self.rate.setSuffix(" Hz")
+        self.rate.setSpecialValueText("As fast as processed")
+        self.rate.setValue(self.profile_data.axis_coalescing_rate)
+        self.rate.setEnabled(self.profile_data.axis_coalescing)
+        self.rate.valueChanged.connect(self._update_rate_cb)
+
+        self.main_layout.addWidget(self.enabled)
+        self.main_layout.addWidget(QtWidgets.QLabel("Flush rate"))
+        self.main_layout.addWidget(self.rate)
+        self.main_layout.addStretch()
+
+    def _update_enabled_cb(self, state):
+        """Handles changes of the coalescing checkbox.
+
+        :param state the state of the checkbox
+        """
+        self.profile_data.axis_coalescing = state == QtCore.Qt.Checked
+        self.rate.setEnabled(self.profile_data.axis_coalescing)
+
+    def _update_rate_cb(self, value):
+        """Handles changes of the flush rate.
+
+        :param value the new flush rate in Hz
+        """
+        self.profile_data.axis_coalescing_rate = value
+
+
 class VJoyAxisDefaultsWidget(QtWidgets.QWidget):
 
     """UI widget allowing modification of axis initialization values."""
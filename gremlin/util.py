@@ -229,6 +229,102 @@ def clamp(value, min_val, max_val):
     return min(max_val, max(min_val, value))
 
 
+def precise_wait(deadline, spin_budget=0.0001):
+    """Waits until the given point in time.
+
+    The thread sleeps until shortly before the deadline, which wakes it
+    within about a millisecond while a TimerResolutionRequest is held. The
+    remaining time, at most spin_budget, is waited for by repeatedly
+    yielding to other threads rather than spinning while holding the GIL.
+
+    :param deadline point in time, as given by time.perf_counter, until
+        which to wait
+    :param spin_budget time in seconds before the deadline from which on
+        to yield instead of sleeping, capped at 100 us
+    :return time in seconds spent yielding after the sleep ended
+    """
+    spin_budget = min(spin_budget, 0.0001)
+    remaining = deadline - time.perf_counter()
+    if remaining > spin_budget:
+        time.sleep(remaining - spin_budget)
+    spin_start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        time.sleep(0)
+    return time.perf_counter() - spin_start
+
+
+class TimerResolutionRequest:
+
+    """Requests a 1 ms system timer resolution on behalf of a timing loop.
+
+    The default Windows timer resolution of ~15 ms is too coarse for the
+    delays of containers, macros, mouse motion, and periodic flushes. A
+    higher resolution increases the power consumption of the whole system
+    though, timing loops therefore only hold it while they have something
+    scheduled. Requests of all loops are counted, such that the resolution
+    is raised by the first request and only restored once the last one is
+    released.
+    """
+
+    # Number of requests currently holding the higher resolution
+    _active_count = 0
+    _lock = threading.Lock()
+
+    def __init__(self):
+        """Creates a new instance which does not hold the resolution."""
+        self.is_active = False
+
+    def set_active(self, is_active):
+        """Holds or releases the 1 ms timer resolution.
+
+        :param is_active if True the 1 ms resolution is held, otherwise a
+            previous request is released
+        """
+        if is_active == self.is_active:
+            return
+        self.is_active = is_active
+
+        cls = TimerResolutionRequest
+        with cls._lock:
+            cls._active_count += 1 if is_active else -1
+            if sys.platform != "win32":
+                return
+            if is_active and cls._active_count == 1:
+                ctypes.windll.winmm.timeBeginPeriod(1)
+            elif not is_active and cls._active_count == 0:
+                ctypes.windll.winmm.timeEndPeriod(1)
+
+
+def run_paced(interval, keep_running, callback):
+    """Calls a function periodically for as long as requested.
+
+    Sleeping for the interval after each call accumulates drift, hence
+    calls are paced by deadlines which are slept towards while the 1 ms
+    timer resolution is held. The thread never busy waits, as it would
+    starve every other thread of the GIL at high call rates. Calls that
+    were missed are skipped instead of being performed back to back.
+
+    :param interval time in seconds between two calls
+    :param keep_running function returning whether to keep calling
+    :param callback the function to call periodically
+    """
+    resolution = TimerResolutionRequest()
+    resolution.set_active(True)
+    try:
+        next_call = time.perf_counter() + interval
+        while keep_running():
+            remaining = next_call - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            next_call = max(
+                next_call + interval,
+                time.perf_counter() + interval / 2
+            )
+            callback()
+    finally:
+        resolution.set_active(False)
+
+
 def hat_tuple_to_direction(value):
     """Converts a hat event direction value to it's textual equivalent.
 
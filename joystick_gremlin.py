@@ -143,7 +143,7 @@ class GremlinUi(QtWidgets.QMainWindow):
             self.hide()
             evt.ignore()
         else:
-            self.process_monitor.running = False
+            self.process_monitor.stop()
             del self.ui.tray_icon
             QtCore.QCoreApplication.quit()
 
@@ -846,6 +846,14 @@ class GremlinUi(QtWidgets.QMainWindow):
             self.ui.actionActivate.setChecked(True)
             self.activate(True)
             self._profile_auto_activated = True
+            if self.process_monitor.changed_at is not None:
+                logging.getLogger("system").debug(
+                    "Profile activated {:.1f} ms after switching to {}".format(
+                        (time.perf_counter() -
+                         self.process_monitor.changed_at) * 1000,
+                        path
+                    )
+                )
         elif self._profile_auto_activated:
             self.ui.actionActivate.setChecked(False)
             self.activate(False)
@@ -902,6 +910,15 @@ class GremlinUi(QtWidgets.QMainWindow):
         )
         if not ignore_minimize:
             self.setHidden(self.config.start_minimized)
+        use_event_hook = self.config.autoload_event_hook
+        if use_event_hook != isinstance(
+                self.process_monitor.provider,
+                gremlin.process_monitor.EventHookProvider
+        ):
+            self.process_monitor.set_provider(
+                gremlin.process_monitor.EventHookProvider() if use_event_hook
+                else gremlin.process_monitor.PollingProvider()
+            )
         if self.config.autoload_profiles:
             self.process_monitor.start()
         else:
@@ -1351,5 +1368,8 @@ if __name__ == "__main__":
 
     hg.remove_process(os.getpid())
 
+    # Write any configuration changes that are still pending
+    gremlin.config.Configuration().flush()
+
     syslog.info("Terminating Gremlin")
     sys.exit(0)
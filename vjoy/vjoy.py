@@ -23,7 +23,7 @@ import threading
 import time
 import os
 
-from vjoy.vjoy_interface import VJoyState, VJoyInterface
+from vjoy.vjoy_interface import JoystickPosition, VJoyState, VJoyInterface
 from gremlin.error import VJoyError
 import gremlin.common
 import gremlin.spline
@@ -119,6 +119,202 @@ def hat_count(vjoy_id):
     return VJoyInterface.GetVJDContPovNumber(vjoy_id)
 
 
+class OutputFrame:
+
+    """Buffers the complete state of a vJoy device between updates.
+
+    Instead of sending every change of an input to the driver individually
+    all changes are recorded in a JOYSTICK_POSITION structure which is sent
+    to the driver with a single UpdateVJD call when the frame is flushed.
+    """
+
+    # Structure fields holding the value of each axis
+    axis_fields = {
+        AxisName.X.value: "wAxisX",
+        AxisName.Y.value: "wAxisY",
+        AxisName.Z.value: "wAxisZ",
+        AxisName.RX.value: "wAxisXRot",
+        AxisName.RY.value: "wAxisYRot",
+        AxisName.RZ.value: "wAxisZRot",
+        AxisName.SL0.value: "wSlider",
+        AxisName.SL1.value: "wDial"
+    }
+
+    # Structure fields holding the state of 32 buttons each
+    button_fields = ["lButtons", "lButtonsEx1", "lButtonsEx2", "lButtonsEx3"]
+
+    # Structure fields holding the state of each continuous hat, the state
+    # of all discrete hats is held by the first field using 4 bits per hat
+    hat_fields = ["bHats", "bHatsEx1", "bHatsEx2", "bHatsEx3"]
+
+    def __init__(self, vjoy_dev, timed=False):
+        """Creates a new frame for the given device.
+
+        :param vjoy_dev the vJoy device whose state is buffered
+        :param timed if True the frame is only flushed by a periodic
+            timer, otherwise it is flushed at the end of each dispatch
+            cycle
+        """
+        self.vjoy_dev = vjoy_dev
+        self.timed = timed
+        self.updates = 0
+        self.flushes = 0
+        self._lock = vjoy_dev.output_lock
+        self._dirty = False
+        self._buttons = [0] * len(OutputFrame.button_fields)
+        self._position = JoystickPosition()
+        self._position.bDevice = vjoy_dev.vjoy_id
+        # All bits set corresponds to centered hats of either type
+        for field in OutputFrame.hat_fields:
+            setattr(self._position, field, 0xFFFFFFFF)
+
+    @property
+    def is_dirty(self):
+        """Returns whether or not the frame holds unsent changes.
+
+        :return True if there are unsent changes, False otherwise
+        """
+        return self._dirty
+
+    def set_axis(self, axis_id, position):
+        """Records the position of an axis.
+
+        :param axis_id the id of the axis, i.e. an AxisName value
+        :param position the integer position of the axis
+        """
+        with self._lock:
+            setattr(self._position, OutputFrame.axis_fields[axis_id], position)
+            self._dirty = True
+            self.updates += 1
+
+    def set_button(self, button_id, is_pressed):
+        """Records the state of a button.
+
+        :param button_id the id of the button, starting at 1
+        :param is_pressed True if the button is pressed, False otherwise
+        """
+        index, bit = divmod(button_id - 1, 32)
+        with self._lock:
+            if is_pressed:
+                self._buttons[index] |= 1 << bit
+            else:
+                self._buttons[index] &= ~(1 << bit)
+            # Map the unsigned bit pattern onto the signed LONG field
+            value = self._buttons[index]
+            if value & 0x80000000:
+                value -= 0x100000000
+            setattr(self._position, OutputFrame.button_fields[index], value)
+            self._dirty = True
+            self.updates += 1
+
+    def set_hat(self, hat_id, value):
+        """Records the state of a continuous hat.
+
+        :param hat_id the id of the hat, starting at 1
+        :param value the vJoy value of the hat direction, -1 if centered
+        """
+        with self._lock:
+            setattr(
+                self._position,
+                OutputFrame.hat_fields[hat_id - 1],
+                value & 0xFFFFFFFF
+            )
+            self._dirty = True
+            self.updates += 1
+
+    def set_discrete_hat(self, hat_id, value):
+        """Records the state of a discrete hat.
+
+        :param hat_id the id of the hat, starting at 1
+        :param value the vJoy value of the hat direction, -1 if centered
+        """
+        shift = (hat_id - 1) * 4
+        with self._lock:
+            self._position.bHats = \
+                (self._position.bHats & ~(0xF << shift) & 0xFFFFFFFF) | \
+                ((value & 0xF) << shift)
+            self._dirty = True
+            self.updates += 1
+
+    def mark_dirty(self):
+        """Marks the buffered state as unsent, e.g. after a driver reset."""
+        with self._lock:
+            self._dirty = True
+
+    def flush(self):
+        """Sends the buffered state to the driver if it changed.
+
+        The state remains marked as unsent if the driver rejects it, such
+        that the next flush retries sending it.
+
+        :return True if the state was sent, False if there was nothing to send
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            if not self.vjoy_dev.write(
+                    VJoyInterface.UpdateVJD,
+                    self._position.bDevice,
+                    ctypes.byref(self._position)
+            ):
+                raise VJoyError(
+                    "Failed updating vJoy device - vid: {}".format(
+                        self._position.bDevice
+                    )
+                )
+            self._dirty = False
+            self.flushes += 1
+            return True
+
+
+# Per thread record of nested output frame scopes and the frames modified
+# within them
+_frame_scope = threading.local()
+
+
+def begin_output_frame():
+    """Starts an output frame scope on the calling thread.
+
+    Changes made to devices using output frames are held back until the
+    outermost scope is closed via end_output_frame.
+    """
+    depth = getattr(_frame_scope, "depth", 0)
+    if depth == 0:
+        _frame_scope.pending = []
+    _frame_scope.depth = depth + 1
+
+
+def end_output_frame():
+    """Ends an output frame scope on the calling thread.
+
+    Closing the outermost scope flushes all frames modified within it.
+    """
+    _frame_scope.depth -= 1
+    if _frame_scope.depth == 0:
+        pending = _frame_scope.pending
+        _frame_scope.pending = []
+        for frame in pending:
+            frame.flush()
+
+
+def _submit_frame(frame):
+    """Handles the sending of a frame after it has been modified.
+
+    Timed frames are left for the timer to flush, frames modified within an
+    output frame scope are flushed when the scope ends, and all others are
+    flushed right away.
+
+    :param frame the OutputFrame that was modified
+    """
+    if frame.timed:
+        return
+    if getattr(_frame_scope, "depth", 0) > 0:
+        if frame not in _frame_scope.pending:
+            _frame_scope.pending.append(frame)
+    else:
+        frame.flush()
+
+
 class Axis:
 
     """Represents an analog axis in vJoy, allows setting the value
@@ -134,6 +330,9 @@ class Axis:
         self.vjoy_id = vjoy_dev.vjoy_id
         self.axis_id = axis_id
         self._value = 0.0
+        # Last position sent to vJoy, used to skip redundant writes
+        self._sent_position = None
+        self.suppressed = 0
 
         # Retrieve axis minimum and maximum values
         tmp = ctypes.c_ulong()
@@ -153,6 +352,8 @@ class Axis:
 
         self._deadzone_fn = lambda x: deadzone(x, -1.0, -0.0, 0.0, 1.0)
         self._response_curve_fn = lambda x: x
+        # Incremented whenever the deadzone or response curve changes
+        self.curve_version = 0
 
         # If this is not the case our value setter needs to change
         if self._min_value != 0:
@@ -174,6 +375,7 @@ class Axis:
         else:
             logging.getLogger("system").error("Invalid spline type specified")
             self._response_curve_fn = lambda x: x
+        self.curve_version += 1
 
     def set_deadzone(self, low, center_low, center_high, high):
         """Sets the deadzone for the axis.
@@ -186,6 +388,7 @@ class Axis:
         self._deadzone_fn = lambda x: deadzone(
             x, low, center_low, center_high, high
         )
+        self.curve_version += 1
 
     @property
     def value(self):
@@ -202,8 +405,6 @@ class Axis:
 
         :param value the position of the axis in the range [-1, 1]
         """
-        self.vjoy_dev.ensure_ownership()
-
         # Log an error on invalid data but continue processing by clamping
         # the values in the next step
         if 1.0 - abs(value) < -0.001:
@@ -214,21 +415,66 @@ class Axis:
 
         # Normalize value to [-1, 1] and apply response curve and deadzone
         # settings
-        self._value = self._response_curve_fn(
+        value = self.transform(value)
+        self.write_position(self.position(value), value)
+
+    def transform(self, value):
+        """Returns the value after applying deadzone and response curve.
+
+        :param value the value in the range [-1, 1] to transform
+        :return value with deadzone and response curve applied
+        """
+        return self._response_curve_fn(
             self._deadzone_fn(min(1.0, max(-1.0, value)))
         )
 
-        if not VJoyInterface.SetAxis(
-                int(self._half_range + self._half_range * self._value),
-                self.vjoy_id,
-                self.axis_id
-        ):
-            raise VJoyError(
-                "Failed setting axis value - {}".format(
-                    _error_string(self.vjoy_id, self.axis_id, self._value)
+    def position(self, value):
+        """Returns the integer vJoy position corresponding to a value.
+
+        :param value the value in the range [-1, 1]
+        :return integer axis position used by vJoy
+        """
+        return int(self._half_range + self._half_range * value)
+
+    def write_position(self, position, value, force=False):
+        """Sets the axis to an already computed integer position.
+
+        Positions identical to the last one sent to vJoy are not sent again
+        unless forced to.
+
+        :param position the integer axis position used by vJoy
+        :param value the value in the range [-1, 1] the position
+            corresponds to
+        :param force if True the position is sent even if it is unchanged
+        """
+        with self.vjoy_dev.output_lock:
+            self._value = value
+            if position == self._sent_position and not force:
+                self.suppressed += 1
+                self.vjoy_dev.used()
+                return
+
+            frame = self.vjoy_dev.output_frame
+            if frame is not None:
+                frame.set_axis(self.axis_id, position)
+                self._sent_position = position
+                _submit_frame(frame)
+                self.vjoy_dev.used()
+                return
+
+            if not self.vjoy_dev.write(
+                    VJoyInterface.SetAxis,
+                    position,
+                    self.vjoy_id,
+                    self.axis_id
+            ):
+                raise VJoyError(
+                    "Failed setting axis value - {}".format(
+                        _error_string(self.vjoy_id, self.axis_id, self._value)
+                    )
                 )
-            )
-        self.vjoy_dev.used()
+            self._sent_position = position
+            self.vjoy_dev.used()
 
     def set_absolute_value(self, value):
         """Sets the position of the axis based on a value between [-1, 1].
@@ -246,21 +492,7 @@ class Axis:
                 " provided value was {:.2f}".format(value)
             )
 
-        # Normalize value to [-1, 1] and apply response curve and deadzone
-        # settings
-        self._value = value
-
-        if not VJoyInterface.SetAxis(
-                int(self._half_range + self._half_range * self._value),
-                self.vjoy_id,
-                self.axis_id
-        ):
-            raise VJoyError(
-                "Failed setting axis value - {}".format(
-                    _error_string(self.vjoy_id, self.axis_id, self._value)
-                )
-            )
-        self.vjoy_dev.used()
+        self.write_position(self.position(value), value)
 
 
 class Button:
@@ -277,6 +509,9 @@ class Button:
         self.vjoy_id = vjoy_dev.vjoy_id
         self.button_id = button_id
         self._is_pressed = False
+        # Last state sent to vJoy, used to skip redundant writes
+        self._sent = None
+        self.suppressed = 0
 
     @property
     def is_pressed(self):
@@ -293,20 +528,50 @@ class Button:
 
         :param is_pressed True if the button is pressed, False otherwise
         """
-        assert(isinstance(is_pressed, bool))
-        self.vjoy_dev.ensure_ownership()
-        self._is_pressed = is_pressed
-        if not VJoyInterface.SetBtn(
-                self._is_pressed,
-                self.vjoy_id,
-                self.button_id
-        ):
-            raise VJoyError(
-                "Failed setting button value - {}".format(
-                    _error_string(self.vjoy_id, self.button_id, self._is_pressed)
+        self.write(is_pressed)
+
+    def write(self, is_pressed, force=False):
+        """Sets the state of the button.
+
+        States identical to the last one sent to vJoy are not sent again
+        unless forced to.
+
+        :param is_pressed True if the button is pressed, False otherwise
+        :param force if True the state is sent even if it is unchanged
+        """
+        with self.vjoy_dev.output_lock:
+            assert(isinstance(is_pressed, bool))
+            self._is_pressed = is_pressed
+            if is_pressed == self._sent and not force:
+                self.suppressed += 1
+                self.vjoy_dev.used()
+                return
+
+            frame = self.vjoy_dev.output_frame
+            if frame is not None:
+                frame.set_button(self.button_id, is_pressed)
+                self._sent = is_pressed
+                _submit_frame(frame)
+                self.vjoy_dev.used()
+                return
+
+            if not self.vjoy_dev.write(
+                    VJoyInterface.SetBtn,
+                    self._is_pressed,
+                    self.vjoy_id,
+                    self.button_id
+            ):
+                raise VJoyError(
+                    "Failed setting button value - {}".format(
+                        _error_string(
+                            self.vjoy_id,
+                            self.button_id,
+                            self._is_pressed
+                        )
+                    )
                 )
-            )
-        self.vjoy_dev.used()
+            self._sent = is_pressed
+            self.vjoy_dev.used()
 
 
 class Hat:
@@ -348,6 +613,9 @@ class Hat:
         self.hat_id = hat_id
         self._direction = (0, 0)
         self.hat_type = hat_type
+        # Last direction sent to vJoy, used to skip redundant writes
+        self._sent = None
+        self.suppressed = 0
 
     @property
     def direction(self):
@@ -364,17 +632,55 @@ class Hat:
 
         :param direction the new direction of the hat
         """
-        self.vjoy_dev.ensure_ownership()
+        self.write(direction)
 
-        if self.hat_type == HatType.Discrete:
-            self._set_discrete_direction(direction)
-        elif self.hat_type == HatType.Continuous:
-            self._set_continuous_direction(direction)
-        else:
-            raise VJoyError("Invalid hat type specified - {}".format(
-                _error_string(self.vjoy_id, self.axis_id, self.direction)
-            ))
-        self.vjoy_dev.used()
+    def write(self, direction, force=False):
+        """Sets the direction of the hat.
+
+        Directions identical to the last one sent to vJoy are not sent again
+        unless forced to.
+
+        :param direction the new direction of the hat
+        :param force if True the direction is sent even if it is unchanged
+        """
+        with self.vjoy_dev.output_lock:
+            if direction == self._sent and not force:
+                self._direction = direction
+                self.suppressed += 1
+                self.vjoy_dev.used()
+                return
+
+            frame = self.vjoy_dev.output_frame
+            if frame is not None:
+                lookup = Hat.to_continuous_direction \
+                    if self.hat_type == HatType.Continuous \
+                    else Hat.to_discrete_direction
+                if direction not in lookup:
+                    raise VJoyError(
+                        "Invalid direction specified - {}".format(
+                            _error_string(self.vjoy_id, self.hat_id, direction)
+                        )
+                    )
+                self._direction = direction
+                if self.hat_type == HatType.Continuous:
+                    frame.set_hat(self.hat_id, lookup[direction])
+                else:
+                    frame.set_discrete_hat(self.hat_id, lookup[direction])
+                self._sent = direction
+                _submit_frame(frame)
+                self.vjoy_dev.used()
+                return
+
+            if self.hat_type == HatType.Discrete:
+                self._set_discrete_direction(direction)
+            elif self.hat_type == HatType.Continuous:
+                self._set_continuous_direction(direction)
+            else:
+                raise VJoyError("Invalid hat type specified - {}".format(
+                    _error_string(self.vjoy_id, self.axis_id, self.direction)
+                ))
+            self._sent = direction
+            self.vjoy_dev.used()
 
     def _set_discrete_direction(self, direction):
         """Sets the direction of a discrete hat.
@@ -389,7 +695,8 @@ class Hat:
             )
 
         self._direction = direction
-        if not VJoyInterface.SetDiscPov(
+        if not self.vjoy_dev.write(
+                VJoyInterface.SetDiscPov,
                 Hat.to_discrete_direction[direction],
                 self.vjoy_id,
                 self.hat_id
@@ -413,7 +720,8 @@ class Hat:
             )
 
         self._direction = direction
-        if not VJoyInterface.SetContPov(
+        if not self.vjoy_dev.write(
+                VJoyInterface.SetContPov,
                 Hat.to_continuous_direction[direction],
                 self.vjoy_id,
                 self.hat_id
@@ -432,6 +740,9 @@ class VJoy:
     # Duration of inactivity after which the keep alive routine is run
     keep_alive_timeout = 60
 
+    # Interval in seconds at which the ownership of the device is verified
+    ownership_check_interval = 1.0
+
     # Axis name mapping
     axis_equivalence = {
         AxisName.X: 1,
@@ -476,6 +787,17 @@ class VJoy:
 
         self.vjoy_id = vjoy_id
         self.pid = os.getpid()
+        self._output_frame = None
+
+        # Cached ownership state, verified periodically by the keep alive
+        # thread and whenever a write to the device fails
+        self._owned = True
+        self._ownership_lock = threading.Lock()
+        # Serializes all changes to the state sent to the driver, which are
+        # made by the thread processing events as well as by the keep alive
+        # thread when restoring the state after a re-acquisition
+        self.output_lock = threading.RLock()
+        self.reacquisitions = 0
 
         # Initialize all controls
         self._axis_lookup = {}
@@ -486,11 +808,10 @@ class VJoy:
 
         # Timestamp of the last time the device was used
         self._last_active = time.time()
-        self._keep_alive_timer = threading.Timer(
-            VJoy.keep_alive_timeout,
-            self._keep_alive
-        )
-        self._keep_alive_timer.start()
+        self._keep_alive_stop = threading.Event()
+        self._keep_alive_thread = threading.Thread(target=self._keep_alive)
+        self._keep_alive_thread.daemon = True
+        self._keep_alive_thread.start()
 
         # Reset all controls
         self.reset()
@@ -504,8 +825,38 @@ class VJoy:
 
         Under certain circumstances the vJoy devices are reset (issue #129).
         By checking for ownership and reacquiring if needed this can be solved.
+        The check relies on the cached ownership state, which is verified
+        with the driver by revalidate_ownership.
+        """
+        if not self._owned:
+            self.revalidate_ownership()
+
+    def revalidate_ownership(self):
+        """Verifies with the driver that the device is owned by the process.
+
+        If the device is no longer owned it is re-acquired and the state of
+        all inputs is sent to the driver again.
+
+        :return True if the device had to be re-acquired, False otherwise
+        """
+        if self._reacquire():
+            self._restore_state()
+            return True
+        return False
+
+    def _reacquire(self):
+        """Re-acquires the device if it is no longer owned by the process.
+
+        :return True if the device had to be re-acquired, False otherwise
         """
-        if self.pid != VJoyInterface.GetOwnerPid(self.vjoy_id):
+        with self._ownership_lock:
+            if self.vjoy_id is None:
+                return False
+            if self.pid == VJoyInterface.GetOwnerPid(self.vjoy_id):
+                self._owned = True
+                return False
+
+            self._owned = False
             if not VJoyInterface.AcquireVJD(self.vjoy_id):
                 logging.getLogger("system").error(
                     "Failed to re-acquire the vJoy device - vid: {}".format(
@@ -515,6 +866,127 @@ class VJoy:
                     "Failed to re-acquire the vJoy device - vid: {}".format(
                         self.vjoy_id
                 ))
+            self._owned = True
+            self.reacquisitions += 1
+            logging.getLogger("system").warning(
+                "Re-acquired vJoy device - vid: {} count: {:d}".format(
+                    self.vjoy_id,
+                    self.reacquisitions
+                )
+            )
+            return True
+
+    def _restore_state(self):
+        """Sends the state of all inputs to the driver after re-acquisition.
+
+        The driver state was reset while the device was not owned, as such
+        none of the previously sent values can be assumed to be present.
+        """
+        with self.output_lock:
+            for axis in self._axis.values():
+                axis._sent_position = None
+            for button in self._button.values():
+                button._sent = None
+            for hat in self._hat.values():
+                hat._sent = None
+
+            # The frame holds the state of all inputs and is sent in full the
+            # next time it is flushed
+            frame = self._output_frame
+            if frame is not None:
+                frame.mark_dirty()
+                return
+
+            for axis in self._axis.values():
+                axis.write_position(
+                    axis.position(axis._value),
+                    axis._value,
+                    force=True
+                )
+            for button in self._button.values():
+                button.write(button._is_pressed, force=True)
+            for hat in self._hat.values():
+                hat.write(hat._direction, force=True)
+
+    def write(self, fn, *args):
+        """Calls a vJoy function modifying the state of this device.
+
+        A failed call results in the ownership of the device being verified
+        and, if the device had to be re-acquired, the call being repeated.
+
+        :param fn the VJoyInterface function to call
+        :param args the arguments to pass to the function
+        :return True if the call succeeded, False otherwise
+        """
+        self.ensure_ownership()
+        if fn(*args):
+            return True
+        return self.revalidate_ownership() and fn(*args)
+
+    @property
+    def suppressed_writes(self):
+        """Returns the number of writes skipped as the value was unchanged.
+
+        :return number of suppressed writes across all inputs of the device
+        """
+        return sum(
+            control.suppressed for control in
+            list(self._axis.values()) +
+            list(self._button.values()) +
+            list(self._hat.values())
+        )
+
+    @property
+    def output_frame(self):
+        """Returns the output frame buffering changes to this device.
+
+        :return OutputFrame instance, None if changes are sent immediately
+        """
+        return self._output_frame
+
+    def enable_output_frame(self, timed=False):
+        """Buffers all changes to this device in an output frame.
+
+        Changes are sent to the driver with a single UpdateVJD call when the
+        frame is flushed instead of one call per change.
+
+        :param timed if True the frame is only sent when flush_output_frame
+            is called, otherwise at the end of each output frame scope
+        """
+        frame = OutputFrame(self, timed)
+        for axis in self._axis.values():
+            frame.set_axis(axis.axis_id, axis.position(axis._value))
+        for button in self._button.values():
+            frame.set_button(button.button_id, button._is_pressed)
+        for hat in self._hat.values():
+            if hat.hat_type == HatType.Continuous:
+                frame.set_hat(
+                    hat.hat_id,
+                    Hat.to_continuous_direction[hat._direction]
+                )
+            else:
+                frame.set_discrete_hat(
+                    hat.hat_id,
+                    Hat.to_discrete_direction[hat._direction]
+                )
+        self._output_frame = frame
+
+    def disable_output_frame(self):
+        """Sends any buffered changes and returns to immediate updates."""
+        frame = self._output_frame
+        self._output_frame = None
+        if frame is not None:
+            frame.flush()
+
+    def flush_output_frame(self):
+        """Sends buffered changes of the output frame to the driver.
+
+        :return True if changes were sent, False otherwise
+        """
+        frame = self._output_frame
+        if frame is None:
+            return False
+        return frame.flush()
 
     @property
     def axis_count(self):
@@ -674,33 +1146,47 @@ class VJoy:
 
     def reset(self):
         """Resets the state of all inputs to their default state."""
-        # Obtain the current state of all inputs
-        axis_states = {}
-        button_states = {}
-        hat_states = {}
-
-        for i, axis in self._axis.items():
-            axis_states[i] = axis.value
-        for i, button in self._button.items():
-            button_states[i] = button.is_pressed
-        for i, hat in self._hat.items():
-            hat_states[i] = hat.direction
-
-        # Perform reset using default vJoy functionality
-        success = VJoyInterface.ResetVJD(self.vjoy_id)
-
-        # Restore input states based on what we recorded
-        if success:
-            for i in self._axis:
-                self._axis[i].value = axis_states[i]
-            for i in self._button:
-                self._button[i].is_pressed = button_states[i]
-            for i in self._hat:
-                self._hat[i].direction = hat_states[i]
-        else:
-            logging.getLogger("system").info(
-                "Could not reset vJoy device, are we using it?"
-            )
+        with self.output_lock:
+            # Obtain the current state of all inputs
+            axis_states = {}
+            button_states = {}
+            hat_states = {}
+
+            for i, axis in self._axis.items():
+                axis_states[i] = axis.value
+            for i, button in self._button.items():
+                button_states[i] = button.is_pressed
+            for i, hat in self._hat.items():
+                hat_states[i] = hat.direction
+
+            # Perform reset using default vJoy functionality
+            success = VJoyInterface.ResetVJD(self.vjoy_id)
+
+            # Restore input states based on what we recorded
+            if success:
+                # The driver no longer holds the previously sent values, thus
+                # they have to be written even if they are unchanged
+                begin_output_frame()
+                try:
+                    for i, axis in self._axis.items():
+                        axis.write_position(
+                            axis.position(axis_states[i]),
+                            axis_states[i],
+                            force=True
+                        )
+                    for i in self._button:
+                        self._button[i].write(button_states[i], force=True)
+                    for i in self._hat:
+                        self._hat[i].write(hat_states[i], force=True)
+                finally:
+                    end_output_frame()
+                # Timed frames are not flushed at the end of the scope but the
+                # driver state has to be restored right away
+                self.flush_output_frame()
+            else:
+                logging.getLogger("system").info(
+                    "Could not reset vJoy device, are we using it?"
+                )
 
     def used(self):
         """Updates the timestamp of the last time the device has been used."""
@@ -710,27 +1196,33 @@ class VJoy:
         """Releases all resources claimed by this instance.
 
         Releases the lock on the vjoy device instance as well as terminating
-        the keep alive timer.
+        the keep alive thread.
         """
         if self.vjoy_id:
             self.reset()
+            self.disable_output_frame()
             VJoyInterface.RelinquishVJD(self.vjoy_id)
             self.vjoy_id = None
-            self._keep_alive_timer.cancel()
+            self._keep_alive_stop.set()
 
     def _keep_alive(self):
-        """Timer callback ensuring the vJoy device stays active.
+        """Thread function ensuring the vJoy device stays active.
 
-        If the device hasn't been used in the last 60 seconds the device will
-        be reset to ensure it doesn't time out.
+        Periodically verifies that the device is still owned by the process
+        and, if the device hasn't been used in the last 60 seconds, resets
+        the device to ensure it doesn't time out.
         """
-        if self._last_active + VJoy.keep_alive_timeout < time.time():
-            self.reset()
-        self._keep_alive_timer = threading.Timer(
-            VJoy.keep_alive_timeout,
-            self._keep_alive
-        )
-        self._keep_alive_timer.start()
+        while not self._keep_alive_stop.wait(VJoy.ownership_check_interval):
+            if self.vjoy_id is None:
+                return
+            try:
+                if self.revalidate_ownership():
+                    self.flush_output_frame()
+                if self._last_active + VJoy.keep_alive_timeout < time.time():
+                    self.reset()
+            except VJoyError:
+                # Already logged, the next write or check tries again
+                pass
 
     def _init_axes(self):
         """Retrieves all axes present on the vJoy device and creates their
@@ -20,8 +20,6 @@ import ctypes
 import enum
 import os
 
-from gremlin.error import GremlinError
-
 
 class VJoyState(enum.Enum):
 
@@ -34,9 +32,55 @@ class VJoyState(enum.Enum):
     Unknown = 4     # Unknown type of error
 
 
-class VJoyInterface:
-
-    """Allows low level interaction with VJoy devices via ctypes."""
+class JoystickPosition(ctypes.Structure):
+
+    """Complete state of a vJoy device as used by UpdateVJD.
+
+    Corresponds to the JOYSTICK_POSITION_V2 structure of the vJoy SDK.
+    """
+
+    _fields_ = [
+        ("bDevice", ctypes.c_ubyte),
+        ("wThrottle", ctypes.c_long),
+        ("wRudder", ctypes.c_long),
+        ("wAileron", ctypes.c_long),
+        ("wAxisX", ctypes.c_long),
+        ("wAxisY", ctypes.c_long),
+        ("wAxisZ", ctypes.c_long),
+        ("wAxisXRot", ctypes.c_long),
+        ("wAxisYRot", ctypes.c_long),
+        ("wAxisZRot", ctypes.c_long),
+        ("wSlider", ctypes.c_long),
+        ("wDial", ctypes.c_long),
+        ("wWheel", ctypes.c_long),
+        ("wAxisVX", ctypes.c_long),
+        ("wAxisVY", ctypes.c_long),
+        ("wAxisVZ", ctypes.c_long),
+        ("wAxisVBRX", ctypes.c_long),
+        ("wAxisVBRY", ctypes.c_long),
+        ("wAxisVBRZ", ctypes.c_long),
+        ("lButtons", ctypes.c_long),
+        ("bHats", ctypes.c_ulong),
+        ("bHatsEx1", ctypes.c_ulong),
+        ("bHatsEx2", ctypes.c_ulong),
+        ("bHatsEx3", ctypes.c_ulong),
+        ("lButtonsEx1", ctypes.c_long),
+        ("lButtonsEx2", ctypes.c_long),
+        ("lButtonsEx3", ctypes.c_long)
+    ]
+
+
+def _load_library():
+    """Returns the library providing the vJoy API.
+
+    The stand-in library of vjoy.vjoy_stub is used instead of the actual
+    vJoy dll if the GREMLIN_VJOY_STUB environment variable is set to 1.
+
+    :return library object providing the vJoy API functions
+    """
+    if os.environ.get("GREMLIN_VJOY_STUB") == "1":
+        from vjoy import vjoy_stub
+        return vjoy_stub.active_library()
 
     # Attempt to find the correct location of the dll for development
     # and installed use cases.
@@ -46,9 +90,19 @@ class VJoyInterface:
     elif os.path.isfile(dev_path):
         dll_path = dev_path
     else:
+        # Importing gremlin here rather than at the top allows loading the
+        # interface before gremlin, as vjoy.vjoy_stub does
+        from gremlin.error import GremlinError
         raise GremlinError("Unable to locate vjoy dll")
 
-    vjoy_dll = ctypes.cdll.LoadLibrary(dll_path)
+    return ctypes.cdll.LoadLibrary(dll_path)
+
+
+class VJoyInterface:
+
+    """Allows low level interaction with VJoy devices via ctypes."""
+
+    vjoy_dll = _load_library()
 
     # Declare argument and return types for all the functions
     # exposed by the dll
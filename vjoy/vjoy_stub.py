@@ -0,0 +1,407 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Stand-in for the vJoy dll which does not require the vJoy driver.
+
+The functions of the stand-in are exposed as ctypes function pointers with
+the same signatures as the ones of the actual dll. Calls therefore pass
+through ctypes in the same way as they would with the driver installed,
+which allows benchmarking the vjoy module on any machine.
+
+The stand-in is used if the GREMLIN_VJOY_STUB environment variable is set
+to 1 when vjoy.vjoy_interface is imported for the first time, which
+install does:
+
+    from vjoy import vjoy_stub
+    vjoy_stub.install()
+    from vjoy import vjoy
+"""
+
+
+import collections
+import ctypes
+import os
+import sys
+import time
+
+
+# Library used by vjoy.vjoy_interface instead of the actual dll
+installed_library = None
+
+
+class StubDevice:
+
+    """State of a single simulated vJoy device."""
+
+    def __init__(self, axis_ids, button_count, hat_count):
+        """Creates a new simulated device.
+
+        :param axis_ids the ids of the axes present on the device
+        :param button_count number of buttons present on the device
+        :param hat_count number of continuous hats present on the device
+        """
+        self.axis_ids = list(axis_ids)
+        self.button_count = button_count
+        self.hat_count = hat_count
+        self.owner_pid = 0
+        self.axes = {axis_id: 0 for axis_id in self.axis_ids}
+        self.buttons = {i: False for i in range(1, button_count + 1)}
+        self.hats = {i: -1 for i in range(1, hat_count + 1)}
+
+
+class StubLibrary:
+
+    """Simulates the functions exported by the vJoy dll."""
+
+    # Value reported for the maximum of every axis
+    axis_maximum = 32768
+
+    # Text reported by the string query functions
+    product_string = "vJoy - Virtual Joystick (stand-in)"
+
+    # Signatures used to create the ctypes function pointers
+    signatures = {
+        "GetvJoyVersion": (ctypes.c_short, []),
+        "vJoyEnabled": (ctypes.c_bool, []),
+        "GetvJoyProductString": (ctypes.c_void_p, []),
+        "GetvJoyManufacturerString": (ctypes.c_void_p, []),
+        "GetvJoySerialNumberString": (ctypes.c_void_p, []),
+        "GetVJDButtonNumber": (ctypes.c_int, [ctypes.c_uint]),
+        "GetVJDDiscPovNumber": (ctypes.c_int, [ctypes.c_uint]),
+        "GetVJDContPovNumber": (ctypes.c_int, [ctypes.c_uint]),
+        "GetVJDAxisExist": (ctypes.c_int, [ctypes.c_uint, ctypes.c_uint]),
+        "GetVJDAxisMax": (
+            ctypes.c_bool,
+            [ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p]
+        ),
+        "GetVJDAxisMin": (
+            ctypes.c_bool,
+            [ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p]
+        ),
+        "GetOwnerPid": (ctypes.c_int, [ctypes.c_uint]),
+        "AcquireVJD": (ctypes.c_bool, [ctypes.c_uint]),
+        "RelinquishVJD": (None, [ctypes.c_uint]),
+        "UpdateVJD": (ctypes.c_bool, [ctypes.c_uint, ctypes.c_void_p]),
+        "GetVJDStatus": (ctypes.c_int, [ctypes.c_uint]),
+        "ResetVJD": (ctypes.c_bool, [ctypes.c_uint]),
+        "ResetAll": (None, []),
+        "ResetButtons": (ctypes.c_bool, [ctypes.c_uint]),
+        "ResetPovs": (ctypes.c_bool, [ctypes.c_uint]),
+        "SetAxis": (
+            ctypes.c_bool,
+            [ctypes.c_long, ctypes.c_uint, ctypes.c_uint]
+        ),
+        "SetBtn": (
+            ctypes.c_bool,
+            [ctypes.c_bool, ctypes.c_uint, ctypes.c_ubyte]
+        ),
+        "SetDiscPov": (
+            ctypes.c_bool,
+            [ctypes.c_int, ctypes.c_uint, ctypes.c_ubyte]
+        ),
+        "SetContPov": (
+            ctypes.c_bool,
+            [ctypes.c_ulong, ctypes.c_uint, ctypes.c_ubyte]
+        ),
+    }
+
+    def __init__(self, device_count=1, axis_ids=range(0x30, 0x38),
+                 button_count=128, hat_count=4, latency=0.0):
+        """Creates a new stand-in library.
+
+        :param device_count number of simulated vJoy devices
+        :param axis_ids the ids of the axes present on each device
+        :param button_count number of buttons present on each device
+        :param hat_count number of continuous hats present on each device
+        :param latency time in seconds each call blocks for, simulating
+            the cost of a round trip to the driver
+        """
+        self.latency = latency
+        self.devices = {}
+        for vjoy_id in range(1, device_count + 1):
+            self.devices[vjoy_id] = StubDevice(
+                axis_ids,
+                button_count,
+                hat_count
+            )
+        self.calls = collections.Counter()
+        self._string = ctypes.create_unicode_buffer(StubLibrary.product_string)
+
+        # The function pointers have to be kept alive for as long as the
+        # library is in use
+        for fn_name, (restype, argtypes) in StubLibrary.signatures.items():
+            fn_type = ctypes.CFUNCTYPE(restype, *argtypes)
+            setattr(self, fn_name, fn_type(self._counted(fn_name)))
+
+    def release_all(self):
+        """Simulates the driver dropping the ownership of all devices."""
+        for device in self.devices.values():
+            device.owner_pid = 0
+
+    def reset_counters(self):
+        """Resets the number of recorded calls of all functions."""
+        self.calls.clear()
+
+    def _counted(self, fn_name):
+        """Returns the implementation of a function which records its calls.
+
+        :param fn_name name of the function to return
+        :return callable implementing the function
+        """
+        fn = getattr(self, "_{}".format(fn_name))
+
+        def wrapper(*args):
+            self.calls[fn_name] += 1
+            if self.latency > 0:
+                end = time.perf_counter() + self.latency
+                while time.perf_counter() < end:
+                    pass
+            return fn(*args)
+        return wrapper
+
+    def _owned_device(self, vjoy_id):
+        """Returns the device if it is owned by this process.
+
+        :param vjoy_id id of the device to return
+        :return StubDevice instance, None if the device is not owned
+        """
+        device = self.devices.get(vjoy_id)
+        if device is None or device.owner_pid != os.getpid():
+            return None
+        return device
+
+    def _GetvJoyVersion(self):
+        return 0x218
+
+    def _vJoyEnabled(self):
+        return True
+
+    def _GetvJoyProductString(self):
+        return ctypes.addressof(self._string)
+
+    def _GetvJoyManufacturerString(self):
+        return ctypes.addressof(self._string)
+
+    def _GetvJoySerialNumberString(self):
+        return ctypes.addressof(self._string)
+
+    def _GetVJDButtonNumber(self, vjoy_id):
+        return self.devices[vjoy_id].button_count \
+            if vjoy_id in self.devices else 0
+
+    def _GetVJDDiscPovNumber(self, vjoy_id):
+        return 0
+
+    def _GetVJDContPovNumber(self, vjoy_id):
+        return self.devices[vjoy_id].hat_count \
+            if vjoy_id in self.devices else 0
+
+    def _GetVJDAxisExist(self, vjoy_id, axis_id):
+        return int(
+            vjoy_id in self.devices and
+            axis_id in self.devices[vjoy_id].axis_ids
+        )
+
+    def _GetVJDAxisMax(self, vjoy_id, axis_id, value):
+        ctypes.c_ulong.from_address(value).value = StubLibrary.axis_maximum
+        return True
+
+    def _GetVJDAxisMin(self, vjoy_id, axis_id, value):
+        ctypes.c_ulong.from_address(value).value = 0
+        return True
+
+    def _GetOwnerPid(self, vjoy_id):
+        return self.devices[vjoy_id].owner_pid
+
+    def _AcquireVJD(self, vjoy_id):
+        if vjoy_id not in self.devices:
+            return False
+        self.devices[vjoy_id].owner_pid = os.getpid()
+        return True
+
+    def _RelinquishVJD(self, vjoy_id):
+        if vjoy_id in self.devices:
+            self.devices[vjoy_id].owner_pid = 0
+
+    def _UpdateVJD(self, vjoy_id, data):
+        from vjoy.vjoy_interface import JoystickPosition
+        from vjoy.vjoy import OutputFrame
+
+        device = self._owned_device(vjoy_id)
+        if device is None:
+            return False
+        position = JoystickPosition.from_address(data)
+        for axis_id in device.axis_ids:
+            device.axes[axis_id] = getattr(
+                position,
+                OutputFrame.axis_fields[axis_id]
+            )
+        for button_id in device.buttons:
+            index, bit = divmod(button_id - 1, 32)
+            field = getattr(position, OutputFrame.button_fields[index])
+            device.buttons[button_id] = bool(field & (1 << bit))
+        for hat_id in device.hats:
+            value = getattr(position, OutputFrame.hat_fields[hat_id - 1])
+            device.hats[hat_id] = -1 if value == 0xFFFFFFFF else value
+        return True
+
+    def _GetVJDStatus(self, vjoy_id):
+        if vjoy_id not in self.devices:
+            return 3
+        owner = self.devices[vjoy_id].owner_pid
+        if owner == 0:
+            return 1
+        return 0 if owner == os.getpid() else 2
+
+    def _ResetVJD(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        if device is None:
+            return False
+        device.axes = {axis_id: 0 for axis_id in device.axis_ids}
+        device.buttons = {i: False for i in device.buttons}
+        device.hats = {i: -1 for i in device.hats}
+        return True
+
+    def _ResetAll(self):
+        for vjoy_id in self.devices:
+            self._ResetVJD(vjoy_id)
+
+    def _ResetButtons(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        if device is None:
+            return False
+        device.buttons = {i: False for i in device.buttons}
+        return True
+
+    def _ResetPovs(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        if device is None:
+            return False
+        device.hats = {i: -1 for i in device.hats}
+        return True
+
+    def _SetAxis(self, value, vjoy_id, axis_id):
+        device = self._owned_device(vjoy_id)
+        if device is None or axis_id not in device.axes:
+            return False
+        device.axes[axis_id] = value
+        return True
+
+    def _SetBtn(self, value, vjoy_id, button_id):
+        device = self._owned_device(vjoy_id)
+        if device is None or button_id not in device.buttons:
+            return False
+        device.buttons[button_id] = value
+        return True
+
+    def _SetDiscPov(self, value, vjoy_id, hat_id):
+        return False
+
+    def _SetContPov(self, value, vjoy_id, hat_id):
+        device = self._owned_device(vjoy_id)
+        if device is None or hat_id not in device.hats:
+            return False
+        device.hats[hat_id] = -1 if value == 0xFFFFFFFF else value
+        return True
+
+
+def active_library():
+    """Returns the stand-in library, creating a default one if needed.
+
+    :return the StubLibrary instance in use
+    """
+    global installed_library
+    if installed_library is None:
+        installed_library = StubLibrary()
+    return installed_library
+
+
+def install(library=None):
+    """Replaces the vJoy dll with a stand-in library.
+
+    :param library the StubLibrary instance to use, a default one is
+        created if none is provided
+    :return the installed StubLibrary instance
+    """
+    global installed_library
+    installed_library = library if library is not None else StubLibrary()
+    os.environ["GREMLIN_VJOY_STUB"] = "1"
+
+    # Rebind the functions if the interface has already been loaded
+    from vjoy.vjoy_interface import VJoyInterface
+    if VJoyInterface.vjoy_dll is not installed_library:
+        VJoyInterface.vjoy_dll = installed_library
+        VJoyInterface.initialize()
+    return installed_library
+
+
+def _benchmark(frames, latency, axis_count=6, button_count=8):
+    """Measures the cost of updating a device with and without frames.
+
+    Each simulated dispatch cycle changes the given number of axes and
+    buttons, as happens when a profile maps several physical inputs.
+
+    :param frames number of dispatch cycles to simulate
+    :param latency simulated duration of a single driver call in seconds
+    :param axis_count number of axes changed per cycle
+    :param button_count number of buttons changed per cycle
+    """
+    library = install(StubLibrary(latency=latency))
+    from vjoy import vjoy
+
+    device = vjoy.VJoy(1)
+    axes = [device.axis(linear_index=i) for i in range(1, axis_count + 1)]
+    buttons = [device.button(i) for i in range(1, button_count + 1)]
+
+    def run():
+        library.reset_counters()
+        start = time.perf_counter()
+        for i in range(frames):
+            vjoy.begin_output_frame()
+            try:
+                value = (i % 200) / 100.0 - 1.0
+                for axis in axes:
+                    axis.set_absolute_value(value)
+                for button in buttons:
+                    button.is_pressed = i % 2 == 0
+            finally:
+                vjoy.end_output_frame()
+        return time.perf_counter() - start, sum(library.calls.values())
+
+    results = []
+    immediate = run()
+    results.append(("immediate", immediate))
+    device.enable_output_frame()
+    results.append(("frame", run()))
+    device.disable_output_frame()
+
+    for name, (duration, calls) in results:
+        print("{:>10}: {:8.2f} us/cycle {:6.2f} driver calls/cycle".format(
+            name,
+            duration / frames * 1e6,
+            calls / frames
+        ))
+    device.invalidate()
+
+
+if __name__ == "__main__":
+    # Usage: vjoy_stub.py [cycles] [driver call latency in microseconds]
+    _benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        float(sys.argv[2]) * 1e-6 if len(sys.argv) > 2 else 5e-6
+    )